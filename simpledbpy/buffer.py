@@ -1,6 +1,7 @@
 import threading
 import time
-from typing import Sequence
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Sequence, Tuple
 
 from simpledbpy.file import BlockId, FileManager, Page
 from simpledbpy.log import LogManager
@@ -16,11 +17,13 @@ class Buffer:
     whether its contents have been modified, and if so, the id and lsn of the modifying transaction.
     """
 
+    __slots__ = ("_file_manager", "_log_manager", "_contents", "_block_id", "_pins", "_pin_lock", "_txnum", "_lsn")
     _file_manager: FileManager
     _log_manager: LogManager
     _contents: Page
     _block_id: BlockId | None
     _pins: int
+    _pin_lock: threading.Lock
     _txnum: int
     _lsn: int
 
@@ -30,6 +33,7 @@ class Buffer:
         self._contents = Page(file_manager.block_size)
         self._block_id = None
         self._pins = 0
+        self._pin_lock = threading.Lock()
         self._txnum = -1
         self._lsn = -1
 
@@ -58,8 +62,11 @@ class Buffer:
             txnum (int): the modifying transaction
             lsn (int): the corresponding log sequence number
         """
-        self._txnum = txnum
-        if lsn >= 0:
+        # a transaction usually modifies the same buffer many times in a row,
+        # and LSNs only grow, so most calls have nothing to store
+        if self._txnum != txnum:
+            self._txnum = txnum
+        if lsn > self._lsn:
             self._lsn = lsn
 
     def is_pinned(self) -> bool:
@@ -79,6 +86,19 @@ class Buffer:
         """
         return self._txnum
 
+    @property
+    def lsn(self) -> int:
+        """Get the log sequence number of the latest modification
+
+        Returns:
+            int: The log sequence number
+        """
+        return self._lsn
+
+    def clear_modified(self) -> None:
+        """Mark the buffer as clean after its contents have been written to disk by the caller"""
+        self._txnum = -1
+
     def assign_to_block(self, block_id: BlockId) -> None:
         """Assign the buffer to a block
 
@@ -99,19 +119,40 @@ class Buffer:
 
     def pin(self) -> None:
         """Pin the buffer"""
-        self._pins += 1
+        with self._pin_lock:
+            self._pins += 1
 
     def unpin(self) -> None:
         """Unpin the buffer"""
-        self._pins -= 1
+        with self._pin_lock:
+            self._pins -= 1
+
+    def unpin_shared(self) -> bool:
+        """Unpin the buffer only if it is pinned more than once, so that it stays pinned afterwards.
+
+        Returns:
+            bool: True if the buffer was unpinned, False if this is its last pin
+        """
+        with self._pin_lock:
+            if self._pins > 1:
+                self._pins -= 1
+                return True
+            return False
 
 
 class BufferManager:
-    """Manages the pinning and unpinning of buffers to blocks."""
+    """Manages the pinning and unpinning of buffers to blocks.
+    Unpinned buffers are kept in a free list ordered by the time they were released,
+    so that the least-recently-used buffer is the one chosen for replacement.
+    """
 
     MAX_TIME = 10
 
+    _file_manager: FileManager
+    _log_manager: LogManager
     _buffer_pool: Sequence[Buffer]
+    _residency: Dict[BlockId, Buffer]
+    _free_list: OrderedDict[Buffer, None]
     _num_available: int
     _cv: threading.Condition
 
@@ -123,10 +164,14 @@ class BufferManager:
             log_manager (LogManager): the log manager
             num_buffers (int): the number of buffer slots
         """
+        self._file_manager = file_manage
+        self._log_manager = log_manager
         self._buffer_pool = []
         self._num_available = num_buffers
         for _ in range(num_buffers):
             self._buffer_pool.append(Buffer(file_manage, log_manager))
+        self._residency = {}
+        self._free_list = OrderedDict((buffer, None) for buffer in self._buffer_pool)
         self._cv = threading.Condition()
 
     @property
@@ -140,15 +185,29 @@ class BufferManager:
             return self._num_available
 
     def flush_all(self, txnum: int) -> None:
-        """Flush all buffers associated with a transaction
+        """Flush all buffers associated with a transaction.
+        The log is flushed once up to the latest modification, and the dirty buffers of each file are sorted
+        by block number so that every run of consecutive blocks is written with a single write.
 
         Args:
             txnum (int): the transaction number to flush
         """
         with self._cv:
+            dirty_buffers: Dict[str, List[Buffer]] = {}
+            max_lsn = -1
             for buffer in self._buffer_pool:
-                if buffer.modifying_txnum == txnum:
-                    buffer.flush()
+                if buffer.modifying_txnum == txnum and buffer.block_id is not None:
+                    dirty_buffers.setdefault(buffer.block_id.file_name, []).append(buffer)
+                    max_lsn = max(max_lsn, buffer.lsn)
+            if not dirty_buffers:
+                return
+            self._log_manager.flush(max_lsn)
+            for file_name, buffers in dirty_buffers.items():
+                buffers.sort(key=lambda buffer: buffer.block_id.block_number)  # type: ignore
+                for start, run in self._contiguous_runs(buffers):
+                    self._file_manager.write_run(file_name, start, [buffer.contents for buffer in run])
+                    for buffer in run:
+                        buffer.clear_modified()
 
     def unpin(self, buffer: Buffer) -> None:
         """Unpin the specified buffer
@@ -156,10 +215,16 @@ class BufferManager:
         Args:
             buffer (Buffer): the buffer to unpin
         """
+        # releasing one of several pins does not change the state of the pool
+        if buffer.unpin_shared():
+            return
         with self._cv:
             buffer.unpin()
             if not buffer.is_pinned():
+                self._free_list[buffer] = None
                 self._num_available += 1
+                # every waiter is woken: a single notification could be taken by a waiter that has just timed out,
+                # leaving another one asleep until its own timeout
                 self._cv.notify_all()
 
     def pin(self, block_id: BlockId) -> Buffer:
@@ -177,13 +242,38 @@ class BufferManager:
         with self._cv:
             timestamp = time.time()
             buffer = self._try_to_pin(block_id)
-            while buffer is None and self._waiting_too_long(timestamp):
-                self._cv.wait(BufferManager.MAX_TIME)
+            while buffer is None and not self._waiting_too_long(timestamp):
+                self._cv.wait(BufferManager.MAX_TIME - (time.time() - timestamp))
                 buffer = self._try_to_pin(block_id)
             if buffer is None:
                 raise BufferAbortError()
             return buffer
 
+    @staticmethod
+    def _contiguous_runs(buffers: List[Buffer]) -> Iterator[Tuple[int, List[Buffer]]]:
+        """Split buffers sorted by block number into runs of consecutive blocks
+
+        Args:
+            buffers (List[Buffer]): the buffers of a single file, sorted by block number
+
+        Yields:
+            Tuple[int, List[Buffer]]: the first block number of the run and the buffers in it
+        """
+        run: List[Buffer] = []
+        start = next_block_number = -1
+        for buffer in buffers:
+            assert buffer.block_id is not None
+            block_number = buffer.block_id.block_number
+            if run and block_number != next_block_number:
+                yield start, run
+                run = []
+            if not run:
+                start = block_number
+            run.append(buffer)
+            next_block_number = block_number + 1
+        if run:
+            yield start, run
+
     def _waiting_too_long(self, start_time: float) -> bool:
         """Check if the waiting time is longer than the maximum time
 
@@ -209,8 +299,12 @@ class BufferManager:
             buffer = self._choose_unpinned_buffer()
             if buffer is None:
                 return None
+            if buffer.block_id is not None:
+                self._residency.pop(buffer.block_id, None)
             buffer.assign_to_block(block_id)
+            self._residency[block_id] = buffer
         if not buffer.is_pinned():
+            self._free_list.pop(buffer, None)
             self._num_available -= 1
         buffer.pin()
         return buffer
@@ -224,18 +318,15 @@ class BufferManager:
         Returns:
             Buffer | None: the buffer pinned to the block, or None if no buffer is pinned to the block
         """
-        for buffer in self._buffer_pool:
-            if buffer.block_id is not None and buffer.block_id == block_id:
-                return buffer
-        return None
+        return self._residency.get(block_id)
 
     def _choose_unpinned_buffer(self) -> Buffer | None:
-        """Choose an unpinned buffer
+        """Choose the least-recently-used unpinned buffer, which is at the head of the free list
 
         Returns:
             Buffer | None: the unpinned buffer, or None if no buffer is unpinned
         """
-        for buffer in self._buffer_pool:
-            if not buffer.is_pinned():
-                return buffer
-        return None
+        if not self._free_list:
+            return None
+        buffer, _ = self._free_list.popitem(last=False)
+        return buffer
@@ -1,12 +1,12 @@
 import os
 import struct
 from dataclasses import dataclass
-from io import BufferedRandom
 from pathlib import Path
 from threading import Lock
+from typing import Sequence
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BlockId:
     file_name: str
     block_number: int
@@ -17,26 +17,38 @@ class BlockId:
 
 class Page:
     CHARSET = "ascii"
+    # Strings are validated as ASCII when they are set, so the stored bytes are also valid latin-1,
+    # which decodes to the same string without checking every byte.
+    DECODE_CHARSET = "latin-1"
     FORMAT = ">i"
+    _INT = struct.Struct(FORMAT)
 
-    def __init__(self, args: int | bytes) -> None:
+    __slots__ = ("_byte_buffer", "_view")
+    _byte_buffer: bytearray
+    _view: memoryview
+
+    def __init__(self, args: int | bytes | bytearray) -> None:
         """Constructor
 
         Args:
-            args (int | bytes):
+            args (int | bytes | bytearray):
                 If int, creates a byte buffer of the specified size.
-                If bytes, creates a byte buffer with the specified contents.
+                If bytes, creates a byte buffer with a copy of the specified contents.
+                If bytearray, uses it as the byte buffer without copying, so the page shares memory with the caller.
 
         Raises:
             ValueError:
-                If the argument is not an int or bytes.
+                If the argument is not an int, bytes or bytearray.
         """
         if isinstance(args, int):
             self._byte_buffer = bytearray(args)
+        elif isinstance(args, bytearray):
+            self._byte_buffer = args
         elif isinstance(args, bytes):
             self._byte_buffer = bytearray(args)
         else:
             raise ValueError("Invalid argument type")
+        self._view = memoryview(self._byte_buffer)
 
     def get_int(self, offset: int) -> int:
         """Get an integer from the byte buffer
@@ -50,9 +62,11 @@ class Page:
         Returns:
             int: The integer at the specified offset
         """
-        if len(self._byte_buffer) <= offset:
-            raise ValueError("Offset is out of bounds")
-        return int(struct.unpack(self.FORMAT, self._byte_buffer[offset : offset + 4])[0])
+        # struct already checks the bounds, so the hot path has no check of its own
+        try:
+            return int(self._INT.unpack_from(self._view, offset)[0])
+        except struct.error as e:
+            raise ValueError("Offset is out of bounds") from e
 
     def set_int(self, offset: int, value: int) -> None:
         """Set an integer in the byte buffer
@@ -64,9 +78,10 @@ class Page:
         Raises:
             ValueError: If the offset is out of bounds
         """
-        if len(self._byte_buffer) < offset + 4:
-            raise ValueError("Byte buffer too small to set the given integer")
-        self._byte_buffer[offset : offset + 4] = struct.pack(self.FORMAT, value)
+        try:
+            self._INT.pack_into(self._view, offset, value)
+        except struct.error as e:
+            raise ValueError("Byte buffer too small to set the given integer") from e
 
     def get_bytes(self, offset: int) -> bytes:
         """Get a sequence of bytes from the byte buffer
@@ -80,29 +95,30 @@ class Page:
         Returns:
             bytes: The bytes at the specified offset
         """
-        if len(self._byte_buffer) <= offset:
-            raise ValueError("Offset is out of bounds")
-        length = self.get_int(offset)
-        start = offset + struct.calcsize(self.FORMAT)
-        byte_array = self._byte_buffer[start : start + length]
-        return bytes(byte_array)
-
-    def set_bytes(self, offset: int, b: bytes) -> None:
+        try:
+            (length,) = self._INT.unpack_from(self._view, offset)
+        except struct.error as e:
+            raise ValueError("Offset is out of bounds") from e
+        start = offset + self._INT.size
+        return bytes(self._view[start : start + length])
+
+    def set_bytes(self, offset: int, b: bytes | memoryview) -> None:
         """Set a sequence of bytes in the byte buffer
 
         Args:
             offset (int): The offset in the byte buffer
-            b (bytes): The bytes to set
+            b (bytes | memoryview): The bytes to set
 
         Raises:
             ValueError: If the offset is out of bounds
         """
-        total_length = struct.calcsize(self.FORMAT) + len(b)
-        if len(self._byte_buffer) < offset + total_length:
+        length = len(b)
+        start = offset + self._INT.size
+        end = start + length
+        if len(self._byte_buffer) < end:
             raise ValueError("Byte buffer too small to set the given bytes")
-        self.set_int(offset, len(b))
-        start = offset + struct.calcsize(self.FORMAT)
-        self._byte_buffer[start : start + len(b)] = b
+        self._INT.pack_into(self._view, offset, length)
+        self._view[start:end] = b
 
     def get_string(self, offset: int) -> str:
         """Get a string from the byte buffer
@@ -116,10 +132,13 @@ class Page:
         Returns:
             str: The string at the specified offset
         """
-        if len(self._byte_buffer) <= offset:
-            raise ValueError("Offset is out of bounds")
-        b = self.get_bytes(offset)
-        return b.decode(Page.CHARSET)
+        try:
+            (length,) = self._INT.unpack_from(self._view, offset)
+        except struct.error as e:
+            raise ValueError("Offset is out of bounds") from e
+        start = offset + self._INT.size
+        # decode straight from the view, without an intermediate bytes copy
+        return str(self._view[start : start + length], Page.DECODE_CHARSET)
 
     def set_string(self, offset: int, s: str) -> None:
         """Set a string in the byte buffer
@@ -144,21 +163,32 @@ class Page:
         bytes_per_char = 1
         return 4 + strlen * bytes_per_char
 
-    def contents(self) -> bytearray:
-        """Get the byte buffer
+    def contents(self) -> memoryview:
+        """Get a writable view of the byte buffer. The view shares memory with the page, so the block can be read
+        into it or written from it without copying.
 
         Returns:
-            bytearray: The byte buffer
+            memoryview: The view of the byte buffer
         """
-        return self._byte_buffer
+        return self._view
 
 
 class FileManager:
+    """Reads and writes blocks of the database files.
+    Blocks are accessed with positional reads and writes (pread/pwrite) on raw file descriptors, which do not
+    share a file position, so reads and writes of different blocks do not need to be serialized.
+    Only opening a file and appending a block to it are done under a lock.
+    The number of blocks in each open file is cached, so appending a block does not need to ask the OS for the size.
+    """
+
     _db_directory: Path
     _block_size: int
+    _zero_block: bytes
     _is_new: bool
-    _open_files: dict[str, BufferedRandom]
+    _open_files: dict[str, int]
+    _file_lengths: dict[str, int]
     _lock: Lock
+    _open_files_lock: Lock
 
     def __init__(self, db_directory: Path, block_size: int) -> None:
         """Constructor
@@ -167,8 +197,12 @@ class FileManager:
             db_directory (Path): The directory where the database files are stored
             block_size (int): The size of a block in bytes
         """
+        # the open files are set first, so that __del__ finds them even if the constructor fails
+        self._open_files = {}
+        self._file_lengths = {}
         self._db_directory = db_directory
         self._block_size = block_size
+        self._zero_block = bytes(block_size)  # immutable, so every append can write the same object
         self._is_new = not db_directory.exists()
 
         # create the directory if the database is new
@@ -180,8 +214,8 @@ class FileManager:
             if file.name.startswith("temp"):
                 file.unlink()
 
-        self._open_files = {}
         self._lock = Lock()
+        self._open_files_lock = Lock()
 
     def read(self, block_id: BlockId, page: Page) -> None:
         """Read a block into a page
@@ -193,13 +227,28 @@ class FileManager:
         Raises:
             IOError: If the block cannot be read
         """
-        with self._lock:
-            try:
-                f = self._get_file(block_id.file_name)
-                f.seek(block_id.block_number * self._block_size)
-                f.readinto(page.contents())
-            except IOError as e:
-                raise IOError(f"Cannot read block {block_id}") from e
+        try:
+            fd = self._get_file(block_id.file_name)
+            os.preadv(fd, [page.contents()], block_id.block_number * self._block_size)
+        except IOError as e:
+            raise IOError(f"Cannot read block {block_id}") from e
+
+    def read_run(self, file_name: str, start_block_number: int, pages: Sequence[Page]) -> None:
+        """Read consecutive blocks of a file into pages with a single read
+
+        Args:
+            file_name (str): The name of the file
+            start_block_number (int): The block to read into the first page
+            pages (Sequence[Page]): The pages to read into, in block order
+
+        Raises:
+            IOError: If the blocks cannot be read
+        """
+        try:
+            fd = self._get_file(file_name)
+            os.preadv(fd, [page.contents() for page in pages], start_block_number * self._block_size)
+        except IOError as e:
+            raise IOError(f"Cannot read {len(pages)} blocks from {BlockId(file_name, start_block_number)}") from e
 
     def write(self, block_id: BlockId, page: Page) -> None:
         """Write a page to a block
@@ -211,14 +260,30 @@ class FileManager:
         Raises:
             IOError: If the block cannot be written
         """
-        with self._lock:
-            try:
-                f = self._get_file(block_id.file_name)
-                f.seek(block_id.block_number * self._block_size)
-                f.write(page.contents())
-                f.flush()
-            except IOError as e:
-                raise IOError(f"Cannot write block {block_id}") from e
+        try:
+            fd = self._get_file(block_id.file_name)
+            os.pwrite(fd, page.contents(), block_id.block_number * self._block_size)
+        except IOError as e:
+            raise IOError(f"Cannot write block {block_id}") from e
+        self._extend_length(block_id.file_name, block_id.block_number + 1)
+
+    def write_run(self, file_name: str, start_block_number: int, pages: Sequence[Page]) -> None:
+        """Write pages to consecutive blocks of a file with a single write
+
+        Args:
+            file_name (str): The name of the file
+            start_block_number (int): The block to write the first page to
+            pages (Sequence[Page]): The pages to write, in block order
+
+        Raises:
+            IOError: If the blocks cannot be written
+        """
+        try:
+            fd = self._get_file(file_name)
+            os.pwritev(fd, [page.contents() for page in pages], start_block_number * self._block_size)
+        except IOError as e:
+            raise IOError(f"Cannot write {len(pages)} blocks from {BlockId(file_name, start_block_number)}") from e
+        self._extend_length(file_name, start_block_number + len(pages))
 
     def append(self, file_name: str) -> BlockId:
         """Append a block to a file
@@ -235,14 +300,54 @@ class FileManager:
         with self._lock:
             new_block_number = self.length(file_name)
             block = BlockId(file_name, new_block_number)
-            b = bytearray(self._block_size)
             try:
-                f = self._get_file(file_name)
-                f.seek(new_block_number * self._block_size)
-                f.write(b)
-                f.flush()
+                fd = self._get_file(file_name)
+                os.pwrite(fd, self._zero_block, new_block_number * self._block_size)
             except IOError as e:
                 raise IOError(f"Cannot append block {block}") from e
+            self._file_lengths[file_name] = new_block_number + 1
+            return block
+
+    def append_from(self, block_id: BlockId, file_name: str) -> BlockId:
+        """Append a copy of an existing block to a file.
+        The block is copied inside the kernel with copy_file_range when the platform supports it,
+        and with a positional read and write otherwise.
+        The copy is made from the file on disk: a modified copy of the block in a buffer is not seen,
+        so the caller must flush that buffer first. Like append, the copy is not logged,
+        so it is neither undone by a rollback nor redone by recovery.
+
+        Args:
+            block_id (BlockId): The block to copy
+            file_name (str): The name of the file to append to
+
+        Raises:
+            IOError: If the block cannot be appended
+
+        Returns:
+            BlockId: The block that was appended
+        """
+        with self._lock:
+            new_block_number = self.length(file_name)
+            block = BlockId(file_name, new_block_number)
+            try:
+                src_fd = self._get_file(block_id.file_name)
+                dst_fd = self._get_file(file_name)
+                src_offset = block_id.block_number * self._block_size
+                dst_offset = new_block_number * self._block_size
+                copied = 0
+                if hasattr(os, "copy_file_range"):
+                    try:
+                        copied = os.copy_file_range(src_fd, dst_fd, self._block_size, src_offset, dst_offset)
+                    except OSError:
+                        copied = 0  # not supported for these files, so copy in user space
+                if copied < self._block_size:
+                    # the rest of the block, zero-filled if the source block is past the end of its file
+                    remaining = self._block_size - copied
+                    b = os.pread(src_fd, remaining, src_offset + copied)
+                    os.pwrite(dst_fd, b.ljust(remaining, b"\0"), dst_offset + copied)
+            except IOError as e:
+                raise IOError(f"Cannot append a copy of {block_id} as block {block}") from e
+            self._file_lengths[file_name] = new_block_number + 1
             return block
 
     def length(self, file_name: str) -> int:
@@ -258,8 +363,46 @@ class FileManager:
             int: The number of blocks in the file
         """
         try:
-            f = self._get_file(file_name)
-            return int(f.seek(0, os.SEEK_END) / self._block_size)
+            self._get_file(file_name)
+        except IOError as e:
+            raise IOError(f"Cannot access {file_name}") from e
+        return self._file_lengths[file_name]
+
+    def modified_time(self, file_name: str) -> int:
+        """Get the time a file was last written to, e.g. to tell whether a table changed since a point in time
+
+        Args:
+            file_name (str): The name of the file
+
+        Raises:
+            IOError: If the file cannot be accessed
+
+        Returns:
+            int: The modification time of the file, in nanoseconds
+        """
+        try:
+            return os.fstat(self._get_file(file_name)).st_mtime_ns
+        except IOError as e:
+            raise IOError(f"Cannot access {file_name}") from e
+
+    def hint_access(self, file_name: str, sequential: bool) -> None:
+        """Tell the OS page cache how the blocks of a file are going to be read.
+        Sequential access enlarges the kernel readahead, and random access turns it off.
+        This is a no-op on platforms without posix_fadvise.
+
+        Args:
+            file_name (str): The name of the file
+            sequential (bool): True if the file is read sequentially, False if it is read randomly
+
+        Raises:
+            IOError: If the file cannot be accessed
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+        advice = os.POSIX_FADV_SEQUENTIAL if sequential else os.POSIX_FADV_RANDOM
+        try:
+            fd = self._get_file(file_name)
+            os.posix_fadvise(fd, 0, 0, advice)
         except IOError as e:
             raise IOError(f"Cannot access {file_name}") from e
 
@@ -271,25 +414,37 @@ class FileManager:
     def is_new(self) -> bool:
         return self._is_new
 
-    def _get_file(self, file_name: str) -> BufferedRandom:
-        """Get a file object
+    def _get_file(self, file_name: str) -> int:
+        """Get the file descriptor of a file, opening (and creating) the file on first use
 
         Args:
             file_name (str): The name of the file
 
         Returns:
-            BufferedRandom: The file object
+            int: The file descriptor
+        """
+        fd = self._open_files.get(file_name)
+        if fd is None:
+            with self._open_files_lock:
+                fd = self._open_files.get(file_name)
+                if fd is None:
+                    fd = os.open(self._db_directory / file_name, os.O_RDWR | os.O_CREAT, 0o666)
+                    self._file_lengths[file_name] = os.fstat(fd).st_size // self._block_size
+                    self._open_files[file_name] = fd
+        return fd
+
+    def _extend_length(self, file_name: str, num_blocks: int) -> None:
+        """Update the cached length of a file after a write that may have gone past its end
+
+        Args:
+            file_name (str): The name of the file
+            num_blocks (int): The number of blocks the file has at least
         """
-        f = self._open_files.get(file_name)
-        if f is None:
-            db_table = self._db_directory / file_name
-            if not db_table.exists():
-                db_table.touch()
-            f = db_table.open("r+b")
-            self._open_files[file_name] = f
-        return f
+        if num_blocks > self._file_lengths[file_name]:
+            with self._lock:
+                self._file_lengths[file_name] = max(self._file_lengths[file_name], num_blocks)
 
     def __del__(self) -> None:
-        for f in self._open_files.values():
-            f.close()
+        for fd in self._open_files.values():
+            os.close(fd)
         self._open_files.clear()
@@ -1,8 +1,11 @@
+import zlib
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
 
 from simpledbpy.query import RID, Constant, TableScan
-from simpledbpy.record import Layout
+from simpledbpy.record import Layout, Types
 from simpledbpy.tx.transaction import Transaction
 
 
@@ -70,56 +73,150 @@ class Index(ABC):
 
 
 class HashIndex(Index):
-    """A static hash implementation of the Index interface. A fixed number of buckets is allocated (currently, 100),
+    """A static hash implementation of the Index interface. A fixed number of buckets is allocated (currently, 128),
     and each bucket is implemented as a file of index records.
+    The indexes created before the number of buckets was a power of two have LEGACY_NUM_BUCKETS buckets,
+    which is given when they are opened, so that their keys are looked up in the buckets they were stored in.
+    The table scans of the most recently used buckets are kept open, so that probing alternately a few buckets
+    (e.g. deleting the old value and inserting the new one when an indexed field is modified) does not reopen them.
+    When a bucket is probed again while its scan is open, a small bloom filter of the bucket's values is built,
+    and later probes for values that are not in the bucket return without reading its records.
+    The filters are kept per transaction and index name, so an insertion through any instance of the index in the
+    transaction updates them. Other transactions cannot write the bucket until the transaction ends,
+    since it keeps the bucket's blocks slocked.
     """
 
-    NUM_BUCKETS = 100
+    NUM_BUCKETS = 128  # a power of two, so that the bucket is chosen with a bit mask
+    LEGACY_NUM_BUCKETS = 100
+    MAX_OPEN_SCANS = 2  # each open scan keeps a buffer pinned
+    FINGERPRINT_MASK = 0x7FFFFFFF  # fingerprints are stored in an integer field
+    FILTER_BITS = 512
+    # The bucket table names of each index and number of buckets. This variable is static so that the names are built
+    # only the first time an index is opened, instead of each time a plan opens it.
+    _bucket_table_names_by_index: Dict[Tuple[str, int], List[str]] = {}
+    # The bucket filters of each index, for each transaction. They are dropped with the transaction.
+    _bucket_filters_by_tx: WeakKeyDictionary[Transaction, Dict[str, List[Optional[int]]]] = WeakKeyDictionary()
+
     _tx: Transaction
     _index_name: str
     _layout: Layout
+    _num_buckets: int
+    _bucket_mask: int
+    _bucket_table_names: List[str]
+    _integer_key: bool
+    _has_fingerprint: bool
     _search_key: Optional[Constant]
+    _search_value: Optional[int | str]
+    _search_fingerprint: int
+    _open_scans: OrderedDict[int, TableScan]
     _table_scan: Optional[TableScan]
+    _bucket_filters: List[Optional[int]]
+    _bucket: int
+    _may_match: bool
 
-    def __init__(self, tx: Transaction, index_name: str, layout: Layout) -> None:
+    def __init__(self, tx: Transaction, index_name: str, layout: Layout, num_buckets: int = NUM_BUCKETS) -> None:
         """Opens a hash index for the specified index.
 
         Args:
             tx (Transaction): the calling transaction
             index_name (str): the name of the index
             layout (Layout): the layout fo the index records
+            num_buckets (int): the number of buckets the index was created with
         """
 
         self._tx = tx
         self._index_name = index_name
         self._layout = layout
+        self._num_buckets = num_buckets
+        # -1 if the number of buckets is not a power of two, and the bucket has to be chosen with a modulo
+        self._bucket_mask = num_buckets - 1 if num_buckets & (num_buckets - 1) == 0 else -1
+        bucket_table_names = HashIndex._bucket_table_names_by_index.get((index_name, num_buckets))
+        if bucket_table_names is None:
+            bucket_table_names = [f"{index_name}{bucket}" for bucket in range(num_buckets)]
+            HashIndex._bucket_table_names_by_index[(index_name, num_buckets)] = bucket_table_names
+        self._bucket_table_names = bucket_table_names
+        self._integer_key = layout.schema.type("dataval") == Types.INTEGER
+        # integer indexes, and string indexes created before the fingerprint was added, have no fingerprint
+        self._has_fingerprint = layout.schema.has_field("fingerprint")
         self._search_key = None
+        self._search_value = None
+        self._search_fingerprint = 0
+        self._open_scans = OrderedDict()
         self._table_scan = None
+        bucket_filters_by_index = HashIndex._bucket_filters_by_tx.setdefault(tx, {})
+        bucket_filters = bucket_filters_by_index.get(index_name)
+        if bucket_filters is None:
+            bucket_filters = [None] * num_buckets
+            bucket_filters_by_index[index_name] = bucket_filters
+        self._bucket_filters = bucket_filters
+        self._bucket = -1
+        self._may_match = True
 
     def before_first(self, search_key: Constant) -> None:
         """Positions the index before the first index record having the specified search key. The method hashes the
         search key to determine the bucket, and then opens a table scan on the file corresponding to the bucket.
-        The table scan for the previous bucket (if any) is closed.
+        If a table scan is already open on that bucket, it is just rewound. Otherwise the least recently used
+        table scan is closed if there are too many open.
+
+        Args:
+            search_key (Constant): the search key value.
+        """
+        self._position(search_key, use_filter=True)
+
+    def _position(self, search_key: Constant, use_filter: bool) -> None:
+        """Positions the index before the first index record having the specified search key.
+        Insertions and deletions do not use the bloom filter, so that they do not build one.
 
         Args:
             search_key (Constant): the search key value.
+            use_filter (bool): whether to check the bucket's bloom filter, building it if necessary
         """
-        self.close()
         self._search_key = search_key
-        bucket = hash(search_key) % self.NUM_BUCKETS
-        table_name = f"{self._index_name}{bucket}"
-        self._table_scan = TableScan(self._tx, table_name, self._layout)
+        self._search_value = search_key.as_int() if self._integer_key else search_key.as_string()
+        if self._has_fingerprint:
+            self._search_fingerprint = self.fingerprint(search_key)
+        hash_value = hash(search_key)
+        bucket = hash_value & self._bucket_mask if self._bucket_mask >= 0 else hash_value % self._num_buckets
+        self._bucket = bucket
+        self._may_match = True
+        table_scan = self._open_scans.get(bucket)
+        if table_scan is not None:
+            self._open_scans.move_to_end(bucket)
+            bucket_filter = self._bucket_filters[bucket]
+            if bucket_filter is None and use_filter:
+                bucket_filter = self._build_filter(table_scan)
+                self._bucket_filters[bucket] = bucket_filter
+            if bucket_filter is not None:
+                filter_bits = self._filter_bits(self._search_value)
+                self._may_match = bucket_filter & filter_bits == filter_bits
+            table_scan.before_first()
+        else:
+            if len(self._open_scans) >= self.MAX_OPEN_SCANS:
+                _, least_recently_used = self._open_scans.popitem(last=False)
+                least_recently_used.close()
+            table_scan = TableScan(self._tx, self._bucket_table_names[bucket], self._layout, count_mutations=False)
+            self._open_scans[bucket] = table_scan
+        self._table_scan = table_scan
 
     def next(self) -> bool:
         """Moves to the next record having the search key. The method loops through the table scan for the bucket,
         looking for a matching record, and returning false if there are no more such records.
+        The raw field value of each record is compared with the search value, so no Constant is built per record,
+        and the records of each block are matched in one loop by the table scan.
+        If the index records have a fingerprint of their value, the fingerprints are matched first, and the value
+        is only read from the records whose fingerprint matches.
 
         Returns:
             bool: False if no other index records have the search key.
         """
-        assert self._table_scan is not None
-        while self._table_scan.next():
-            if self._table_scan.get_val("dataval") == self._search_key:
+        table_scan = self._table_scan
+        assert table_scan is not None and self._search_value is not None
+        if not self._may_match:
+            return False
+        if not self._has_fingerprint:
+            return table_scan.next_matching("dataval", self._search_value)
+        while table_scan.next_matching("fingerprint", self._search_fingerprint):
+            if table_scan.get_string("dataval") == self._search_value:
                 return True
         return False
 
@@ -141,12 +238,18 @@ class HashIndex(Index):
             data_value (Constant): the data value in the new index record.
             data_rid (RID): the data RID in the new index record.
         """
-        self.before_first(data_value)
+        self._position(data_value, use_filter=False)
         assert self._table_scan is not None
         self._table_scan.insert()
         self._table_scan.set_int("block", data_rid.block_number)
         self._table_scan.set_int("id", data_rid.slot)
         self._table_scan.set_value("dataval", data_value)
+        if self._has_fingerprint:
+            self._table_scan.set_int("fingerprint", self.fingerprint(data_value))
+        bucket_filter = self._bucket_filters[self._bucket]
+        if bucket_filter is not None:
+            assert self._search_value is not None
+            self._bucket_filters[self._bucket] = bucket_filter | self._filter_bits(self._search_value)
 
     def delete(self, data_value: Constant, data_rid: RID) -> None:
         """Deletes the specified record from the table scan for the bucket. The method starts at the beginning of
@@ -156,7 +259,7 @@ class HashIndex(Index):
             data_value (Constant): the data value of the deleted index record.
             data_rid (RID): the data RID of the deleted index record.
         """
-        self.before_first(data_value)
+        self._position(data_value, use_filter=False)
         assert self._table_scan is not None
         while self._table_scan.next():
             if self.get_data_rid() == data_rid:
@@ -164,22 +267,69 @@ class HashIndex(Index):
                 return
 
     def close(self) -> None:
-        """Closes the index by closing the current table scan."""
+        """Closes the index by closing the open table scans."""
 
-        if self._table_scan is not None:
-            self._table_scan.close()
+        for table_scan in self._open_scans.values():
+            table_scan.close()
+        self._open_scans.clear()
         self._table_scan = None
 
+    def _build_filter(self, table_scan: TableScan) -> int:
+        """Builds the bloom filter of the values in a bucket, by reading all the records of its table scan.
+
+        Args:
+            table_scan (TableScan): the table scan of the bucket
+
+        Returns:
+            int: the bloom filter, as a bit set
+        """
+        get_data_value = table_scan.get_int if self._integer_key else table_scan.get_string
+        bucket_filter = 0
+        table_scan.before_first()
+        while table_scan.next():
+            bucket_filter |= self._filter_bits(get_data_value("dataval"))
+        return bucket_filter
+
+    @classmethod
+    def _filter_bits(cls, value: int | str) -> int:
+        """Returns the two bloom filter bits of a value. The low bits of the hash are skipped,
+        since they are the same for all the values of a bucket.
+
+        Args:
+            value (int | str): the value
+
+        Returns:
+            int: the bits of the value, as a bit set
+        """
+        hash_value = hash(value)
+        bit1 = (hash_value // cls.NUM_BUCKETS) % cls.FILTER_BITS
+        bit2 = ((hash_value * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) * cls.FILTER_BITS >> 64
+        return (1 << bit1) | (1 << bit2)
+
+    @staticmethod
+    def fingerprint(value: Constant) -> int:
+        """Returns the fingerprint of a string value. Unlike hash(), the fingerprint of a string is the same in every
+        process, so it can be stored in the index records.
+
+        Args:
+            value (Constant): the string value
+
+        Returns:
+            int: the fingerprint of the value
+        """
+        return zlib.crc32(value.as_string().encode()) & HashIndex.FINGERPRINT_MASK
+
     @staticmethod
-    def search_cost(num_blocks: int, records_per_block: int) -> int:
+    def search_cost(num_blocks: int, records_per_block: int, num_buckets: int = NUM_BUCKETS) -> int:
         """Returns the cost of searching an index file having the specified number of blocks. The method assumes
         that all buckets are about the same size, and so the cost is simply the size of the bucket.
 
         Args:
             num_blocks (int): the number of blocks of index records
             records_per_block (int): the number of index records per block
+            num_buckets (int): the number of buckets of the index
 
         Returns:
             int: the cost of traversing the index
         """
-        return num_blocks // HashIndex.NUM_BUCKETS
+        return num_blocks // num_buckets
@@ -1,12 +1,39 @@
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
 from threading import Lock
+from typing import List, Optional
 
 from simpledbpy.file import BlockId, FileManager, Page
 
 
 class LogIterator:
+    """Iterates over the log records from the most recent to the earliest.
+    Since the blocks are visited backwards, the iterator reads them ahead in batches:
+    when it needs a block that has not been read yet, it reads that block and the preceding ones
+    with a single read into a set of reused pages. The pages are allocated as the reads need them,
+    so iterating over a short log does not allocate a full set.
+    Once the iteration has gone past a couple of batches, the preceding batch is read in the background
+    into a spare set of pages while the records of the current batch are processed.
+    """
+
+    READAHEAD_BLOCKS = 8
+    PREFETCH_AFTER_READS = 2
+
+    # The worker that reads the batches in the background. This variable is static because
+    # the iterators are short-lived, and it is created on first use.
+    _prefetch_executor: Optional[ThreadPoolExecutor] = None
+    _prefetch_executor_lock = Lock()
+
     _file_manager: FileManager
     _block_id: BlockId
     _page: Page
+    _pages: List[Page]
+    _spare_pages: List[Page]
+    _first_read_block: int
+    _num_read_blocks: int
+    _num_reads: int
+    _prefetch: Optional["Future[None]"]
+    _prefetch_first_block: int
     _current_position: int
     _boundary: int
 
@@ -19,8 +46,13 @@ class LogIterator:
         """
         self._file_manager = file_manager
         self._block_id = block_id
-        b = bytes(file_manager.block_size)
-        self._page = Page(b)
+        self._pages = []
+        self._spare_pages = []
+        self._first_read_block = 0
+        self._num_read_blocks = 0
+        self._num_reads = 0
+        self._prefetch = None
+        self._prefetch_first_block = -1
         self._move_to_block(block_id)
 
     def __iter__(self) -> "LogIterator":
@@ -61,10 +93,52 @@ class LogIterator:
         Args:
             block_id (BlockId): The block containing the log records
         """
-        self._file_manager.read(block_id, self._page)
+        block_number = block_id.block_number
+        if not self._first_read_block <= block_number < self._first_read_block + self._num_read_blocks:
+            first_block = max(0, block_number - self.READAHEAD_BLOCKS + 1)
+            num_blocks = block_number - first_block + 1
+            if self._prefetch is not None and self._prefetch_first_block == first_block:
+                self._prefetch.result()
+                self._pages, self._spare_pages = self._spare_pages, self._pages
+            else:
+                self._allocate_pages(self._pages, num_blocks)
+                self._file_manager.read_run(block_id.file_name, first_block, self._pages[:num_blocks])
+            self._prefetch = None
+            self._first_read_block = first_block
+            self._num_read_blocks = num_blocks
+            self._num_reads += 1
+            if first_block > 0 and self._num_reads >= self.PREFETCH_AFTER_READS:
+                self._start_prefetch(block_id.file_name, first_block)
+        self._page = self._pages[block_number - self._first_read_block]
         self._boundary = self._page.get_int(0)
         self._current_position = self._boundary
 
+    def _start_prefetch(self, file_name: str, before_block: int) -> None:
+        """Starts reading the batch of blocks that precedes the specified block into the spare pages.
+
+        Args:
+            file_name (str): The name of the log file
+            before_block (int): The first block of the batch being processed
+        """
+        first_block = max(0, before_block - self.READAHEAD_BLOCKS)
+        num_blocks = before_block - first_block
+        self._allocate_pages(self._spare_pages, num_blocks)
+        self._prefetch = self._get_prefetch_executor().submit(
+            self._file_manager.read_run, file_name, first_block, self._spare_pages[:num_blocks]
+        )
+        self._prefetch_first_block = first_block
+
+    def _allocate_pages(self, pages: List[Page], num_pages: int) -> None:
+        while len(pages) < num_pages:
+            pages.append(Page(self._file_manager.block_size))
+
+    @classmethod
+    def _get_prefetch_executor(cls) -> ThreadPoolExecutor:
+        with cls._prefetch_executor_lock:
+            if cls._prefetch_executor is None:
+                cls._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-prefetch")
+            return cls._prefetch_executor
+
 
 class LogManager:
     """
@@ -81,9 +155,12 @@ class LogManager:
     If the block is full, a new block is appended to the end of the log file.
     """
 
+    _INT = struct.Struct(Page.FORMAT)
+
     _file_manager: FileManager
     _log_file: str
     _log_page: Page
+    _log_view: memoryview
     _current_block: BlockId
     _latest_lsn: int
     _lagest_saved_lsn: int
@@ -103,8 +180,10 @@ class LogManager:
         self._lagest_saved_lsn = 0
         self._lock = Lock()
 
-        b = bytes(file_manager.block_size)
-        self._log_page = Page(b)
+        self._log_page = Page(file_manager.block_size)
+        self._log_view = self._log_page.contents()
+        # the log is only appended to, and recovery reads it block after block
+        file_manager.hint_access(log_file, sequential=True)
         log_size = file_manager.length(log_file)
         if log_size == 0:
             self._current_block = self._append_new_block()
@@ -116,11 +195,18 @@ class LogManager:
         """Ensures that the log record corresponding to the specified LSN has been written to disk.
         All earlier log records will also be written to disk.
 
+        Concurrent callers are committed as a group: the page is written under the log lock,
+        and a caller that was waiting for the lock finds that its record has already been saved
+        by the previous write and returns without writing the page again.
+
         Args:
             lsn (int): The log sequence number of a log record
         """
-        if lsn >= self._lagest_saved_lsn:
-            self._flush()
+        if lsn <= self._lagest_saved_lsn:
+            return
+        with self._lock:
+            if lsn > self._lagest_saved_lsn:
+                self._flush()
 
     def __iter__(self) -> LogIterator:
         """Creates an iterator for the log file, positioned at the earliest log record
@@ -128,10 +214,12 @@ class LogManager:
         Returns:
             LogIterator: the log iterator
         """
-        self._flush()
-        return LogIterator(self._file_manager, self._current_block)
+        with self._lock:
+            self._flush()
+            current_block = self._current_block
+        return LogIterator(self._file_manager, current_block)
 
-    def append(self, log_record: bytes) -> int:
+    def append(self, log_record: bytes | memoryview) -> int:
         """Appends a log record to the log buffer.
         The record consists of an arbitrary array of bytes.
         Log records are written right to left in the buffer.
@@ -140,22 +228,27 @@ class LogManager:
         Storing the records backwards makes it easy to read them in reverse order.
 
         Args:
-            log_record (bytes): a byte buffer containing the bytes.
+            log_record (bytes | memoryview): a byte buffer containing the bytes.
 
         Returns:
             int: the LSN of the final value
         """
+        # write straight into the view of the log page: the bounds are known to be valid here,
+        # so the checks done by the Page accessors are not needed
+        int_struct = self._INT
+        log_view = self._log_view
         with self._lock:
-            boundary = self._log_page.get_int(0)
+            (boundary,) = int_struct.unpack_from(log_view, 0)
             record_size = len(log_record)
-            bytes_needed = record_size + 4  # Assuming `Integer.BYTES` is 4
-            if boundary - bytes_needed < 4:
+            bytes_needed = record_size + int_struct.size
+            if boundary - bytes_needed < int_struct.size:
                 self._flush()
                 self._current_block = self._append_new_block()
-                boundary = self._log_page.get_int(0)
+                boundary = self._file_manager.block_size
             record_position = boundary - bytes_needed
-            self._log_page.set_bytes(record_position, log_record)
-            self._log_page.set_int(0, record_position)
+            int_struct.pack_into(log_view, record_position, record_size)
+            log_view[record_position + int_struct.size : boundary] = log_record
+            int_struct.pack_into(log_view, 0, record_position)
             self._latest_lsn += 1
             return self._latest_lsn
 
@@ -171,6 +264,6 @@ class LogManager:
         return block_id
 
     def _flush(self) -> None:
-        """Write the buffer to the log file."""
+        """Write the buffer to the log file. The caller must hold the log lock."""
         self._file_manager.write(self._current_block, self._log_page)
         self._lagest_saved_lsn = self._latest_lsn
@@ -1,24 +1,34 @@
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from threading import Lock
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from simpledbpy.index import HashIndex, Index
-from simpledbpy.query import TableScan
+from simpledbpy.query import MutationCounts, TableScan
 from simpledbpy.record import Layout, Schema, Types
+from simpledbpy.tx.concurrency import LockAbortError
 from simpledbpy.tx.transaction import Transaction
 
 
 class TableManager:
     """The table manager. There are methods to create a table, save the metadata
     in the catalog, and obtain the metadata of a previously-created table.
+    The catalogs are read once at startup and kept in memory, so that looking up a layout does not scan them.
+    The table and field names read from the catalogs are interned, since the same few names are compared and
+    looked up over and over, and so are the names given by the parser.
     """
 
     MAX_NAME = 16  # The max characters a tablename or fieldname can have.
     _table_catalog_layout: Layout
     _field_catalog_layout: Layout
+    _layouts: Dict[str, Layout]
+    _layouts_lock: Lock
 
     def __init__(self, is_new: bool, tx: Transaction) -> None:
         """Create a new catalog manager for the database system.
         If the database is new, the two catalog tables are created.
+        Otherwise, the layouts of the existing tables are loaded from the catalogs.
 
         Args:
             is_new (bool): has the value True if the database is new, and False otherwise.
@@ -38,9 +48,24 @@ class TableManager:
         field_catalog_schema.add_int_field("offset")
         self._field_catalog_layout = Layout(field_catalog_schema)
 
+        self._layouts = {}
+        self._layouts_lock = Lock()
+
         if is_new:
             self.create_table("table_catalog", table_catalog_schema, tx)
             self.create_table("field_catalog", field_catalog_schema, tx)
+        else:
+            self._load_layouts(tx)
+
+    @property
+    def table_names(self) -> List[str]:
+        """Return the names of all tables in the catalog, including the catalog tables themselves.
+
+        Returns:
+            List[str]: the table names
+        """
+        with self._layouts_lock:
+            return list(self._layouts)
 
     def create_table(self, table_name: str, schema: Schema, tx: Transaction) -> None:
         """Create a new table having the specified name and schema.
@@ -52,26 +77,39 @@ class TableManager:
         """
 
         layout = Layout(schema)
+        # the catalogs are only appended to, so the records are inserted at their last blocks
         # insert one record into the table catalog
         table_catalog = TableScan(tx, "table_catalog", self._table_catalog_layout)
+        table_catalog.before_last_block()
         table_catalog.insert()
         table_catalog.set_string("tablename", table_name)
         table_catalog.set_int("slotsize", layout.slot_size)
         table_catalog.close()
 
-        # insert a record into the field catalog for each field
+        # insert a record into the field catalog for each field, logging the records of each block together
+        field_type, field_length, field_offset = schema.type, schema.length, layout.offset
+        field_records: List[Dict[str, int | str]] = [
+            {
+                "tablename": table_name,
+                "fieldname": fldname,
+                "type": field_type(fldname).value,
+                "length": field_length(fldname),
+                "offset": field_offset(fldname),
+            }
+            for fldname in schema.fields
+        ]
         field_catalog = TableScan(tx, "field_catalog", self._field_catalog_layout)
-        for fldname in schema.fields:
-            field_catalog.insert()
-            field_catalog.set_string("tablename", table_name)
-            field_catalog.set_string("fieldname", fldname)
-            field_catalog.set_int("type", schema.type(fldname).value)
-            field_catalog.set_int("length", schema.length(fldname))
-            field_catalog.set_int("offset", layout.offset(fldname))
+        field_catalog.before_last_block()
+        field_catalog.bulk_insert(field_records)
         field_catalog.close()
 
+        with self._layouts_lock:
+            self._layouts[table_name] = layout
+        tx.on_rollback(lambda: self._forget_layout(table_name, layout))
+
     def get_layout(self, table_name: str, tx: Transaction) -> Layout:
         """Retrieve the layout of the specified table from the catalog.
+        If the table does not exist, the layout has an empty schema and a slot size of -1.
 
         Args:
             table_name (str): the name of the table
@@ -80,32 +118,74 @@ class TableManager:
         Returns:
             Layout: the table's stored metadata
         """
-        slot_size = -1
+        with self._layouts_lock:
+            layout = self._layouts.get(table_name)
+        if layout is None:
+            return Layout(Schema(), {}, -1)
+        return layout
+
+    def _forget_layout(self, table_name: str, layout: Layout) -> None:
+        """Remove the layout of a table whose creation was rolled back.
+
+        Args:
+            table_name (str): the name of the table
+            layout (Layout): the layout that was stored for the table
+        """
+        with self._layouts_lock:
+            if self._layouts.get(table_name) is layout:
+                del self._layouts[table_name]
+
+    def _load_layouts(self, tx: Transaction) -> None:
+        """Read the layouts of all tables from the catalogs, with a single scan of each catalog.
+
+        Args:
+            tx (Transaction): the startup transaction
+        """
+        slot_sizes: Dict[str, int] = {}
         table_catalog = TableScan(tx, "table_catalog", self._table_catalog_layout)
         while table_catalog.next():
-            if table_catalog.get_string("tablename") == table_name:
-                slot_size = table_catalog.get_int("slotsize")
-                break
+            slot_sizes[sys.intern(table_catalog.get_string("tablename"))] = table_catalog.get_int("slotsize")
         table_catalog.close()
 
-        schema = Schema()
-        offsets = {}
+        # the field rows of each table are collected first, so that each offsets dict is built in one go
+        field_rows: Dict[str, List[Tuple[str, Types, int, int]]] = {table_name: [] for table_name in slot_sizes}
+        # a dict lookup is cheaper than calling the enum, which validates its argument
+        types_by_value = {field_type.value: field_type for field_type in Types}
         field_catalog = TableScan(tx, "field_catalog", self._field_catalog_layout)
         while field_catalog.next():
-            if field_catalog.get_string("tablename") == table_name:
-                field_name = field_catalog.get_string("fieldname")
-                field_type = Types(field_catalog.get_int("type"))
-                length = field_catalog.get_int("length")
-                offset = field_catalog.get_int("offset")
-                schema.add_field(field_name, field_type, length)
-                offsets[field_name] = offset
+            rows = field_rows.get(field_catalog.get_string("tablename"))
+            if rows is None:
+                continue
+            rows.append(
+                (
+                    sys.intern(field_catalog.get_string("fieldname")),
+                    types_by_value[field_catalog.get_int("type")],
+                    field_catalog.get_int("length"),
+                    field_catalog.get_int("offset"),
+                )
+            )
         field_catalog.close()
-        return Layout(schema, offsets, slot_size)
+
+        layouts: Dict[str, Layout] = {}
+        for table_name, rows in field_rows.items():
+            schema = Schema()
+            for field_name, field_type, length, _ in rows:
+                schema.add_field(field_name, field_type, length)
+            offsets = {field_name: offset for field_name, _, _, offset in rows}
+            layouts[table_name] = Layout(schema, offsets, slot_sizes[table_name])
+        with self._layouts_lock:
+            self._layouts.update(layouts)
 
 
 class StatInfo:
+    """The statistics of a table. There is one per table, and it is shared by every plan on the table,
+    so its values, including the guessed number of distinct values, are calculated once.
+    """
+
+    __slots__ = ("_num_blocks", "_num_records", "_distinct_values")
     _num_blocks: int
     _num_records: int
+    _distinct_values: int
 
     def __init__(self, num_blocks: int, num_records: int) -> None:
         """Create a StatInfo object. Note that the number of distinct values is not passed into the constructor.
@@ -117,6 +197,7 @@ class StatInfo:
         """
         self._num_blocks = num_blocks
         self._num_records = num_records
+        self._distinct_values = 1 + (num_records // 3)
 
     @property
     def blocks_accessed(self) -> int:
@@ -146,33 +227,84 @@ class StatInfo:
         Returns:
             int: a guess as to the number of distinct field values
         """
-        return 1 + (self._num_records // 3)
+        return self._distinct_values
 
 
 class StatManager:
     """The statistics manager is responsible for keeping statistical information about each table.
-    The manager does not store this information in the database.
-    Instead, it calculates this information on system startup, and periodically refreshes it.
+    The manager stores the number of blocks and records of each table in the stat catalog, which it reads on
+    system startup, so that the tables do not have to be traversed again each time the database is opened.
+    The tables without stored statistics are calculated on startup, in batches for at most STARTUP_SECONDS,
+    so that a large database does not delay it; the remaining ones are calculated the first time they are asked for.
+    The statistics are refreshed when they become stale, and the refreshed ones are stored in the stat catalog.
+    The statistics of a table are stale when more than max(MIN_STALE_ROWS, FRACTION_STALE_ROWS * records)
+    of its records were inserted or deleted since the previous refresh, or when the table was modified and
+    twice the average interval between refreshes has elapsed.
+    The mutation counts are kept by the manager for its own database, and do not include the records of
+    rolled-back transactions.
+    A refresh only recalculates the stale tables, one at a time, and the other tables keep their mutation counts.
+    The refreshes run in the background, in their own transaction, while the callers keep getting
+    the previous statistics of a table until its refreshed statistics replace them.
+    The entries of the statistics dict are guarded by striped locks, chosen by the hash of the table name,
+    so that looking up the statistics of different tables does not contend; the main lock only guards the state
+    of the refreshes. No lock is held while the statistics are calculated.
+    The mutation counts are lost when the system stops, so the stat catalog also stores the modification time
+    of each table's file when its statistics were calculated, and the stored statistics of a table whose file
+    was written since then are recalculated on startup. Those of a stat catalog created before the modification
+    times were stored are always recalculated.
     """
 
+    STAT_CATALOG = "statcat"
+    NUM_STRIPES = 16  # a power of two, so that the stripe is chosen with a bit mask
+    MIN_STALE_ROWS = 500
+    FRACTION_STALE_ROWS = 0.2
+    STARTUP_SECONDS = 1.0
+    TARGET_BATCH_SECONDS = 0.05
+    MAX_BATCH_TABLES = 64
+    MAX_MODIFIED_TIME = 20  # the number of digits of a modification time in nanoseconds
+
     _table_manager: TableManager
     _table_stats: Dict[str, StatInfo]
-    _num_calls: int
+    _modified_times: Dict[str, int]
+    _last_refresh_time: float
+    _average_refresh_interval: Optional[float]
+    _refreshing: bool
     _lock: Lock
+    _stripe_locks: List[Lock]
+    _new_transaction: Callable[[], Transaction]
+    _refresh_executor: Optional[ThreadPoolExecutor]
+    _refresh_future: Optional["Future[None]"]
+    _mutation_counts: MutationCounts
 
     def __init__(self, table_manager: TableManager, tx: Transaction) -> None:
-        """Create the statistics manager. The initial statistics are calculated by traversing the entire database.
+        """Create the statistics manager. The stat catalog is created if the database does not have one yet,
+        e.g. when it is new. The initial statistics are read from it, and the other tables are traversed.
 
         Args:
             table_manager (TableManager): the table manager
             tx (Transaction): the startup transaction
         """
+        if self.STAT_CATALOG not in table_manager.table_names:
+            schema = Schema()
+            schema.add_string_field("tablename", TableManager.MAX_NAME)
+            schema.add_int_field("numblocks")
+            schema.add_int_field("numrecords")
+            schema.add_string_field("modtime", self.MAX_MODIFIED_TIME)
+            table_manager.create_table(self.STAT_CATALOG, schema, tx)
         self._table_manager = table_manager
         self._table_stats = {}
-        self._num_calls = 0
+        self._modified_times = {}
+        self._average_refresh_interval = None
+        self._refreshing = False
         self._lock = Lock()
-        with self._lock:
-            self._refresh_statistics(tx)
+        self._stripe_locks = [Lock() for _ in range(self.NUM_STRIPES)]
+        self._new_transaction = tx.new_transaction
+        self._refresh_executor = None
+        self._refresh_future = None
+        self._mutation_counts = MutationCounts()
+        self._mutation_counts.register(tx)
+        self._refresh_all(tx)
+        self._last_refresh_time = time.monotonic()
 
     def get_stat_info(self, table_name: str, layout: Layout, tx: Transaction) -> StatInfo:
         """Return the statistical information about the specified table.
@@ -185,35 +317,265 @@ class StatManager:
         Returns:
             StatInfo: the statistical information about the table
         """
-        with self._lock:
-            self._num_calls += 1
-            if self._num_calls > 100:
-                self._refresh_statistics(tx)
+        stripe_lock = self._stripe_lock(table_name)
+        with stripe_lock:
             stat_info = self._table_stats.get(table_name)
-            if stat_info is None:
-                stat_info = self._calc_table_stats(table_name, layout, tx)
+        if stat_info is None:
+            stat_info = self._calc_table_stats(table_name, layout, tx)
+            with stripe_lock:
+                # another thread may have stored the statistics in the meantime
+                return self._table_stats.setdefault(table_name, stat_info)
+
+        num_mutations = self._mutation_counts.num_mutations(table_name)
+        if num_mutations > 0:
+            with self._lock:
+                if not self._refreshing and self._is_stale(stat_info, num_mutations):
+                    self._refreshing = True
+                    if self._refresh_executor is None:
+                        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stat-refresh")
+                    self._refresh_future = self._refresh_executor.submit(self._refresh_in_background, table_name)
+        return stat_info
+
+    def _is_stale(self, stat_info: StatInfo, num_mutations: int) -> bool:
+        """Return whether the statistics of a table are stale. Must be called with the main lock held.
+
+        Args:
+            stat_info (StatInfo): the current statistics of the table
+            num_mutations (int): the number of records inserted or deleted in the table since the previous refresh
+
+        Returns:
+            bool: True if the statistics should be refreshed
+        """
+        if num_mutations == 0:
+            return False
+        if num_mutations > max(self.MIN_STALE_ROWS, self.FRACTION_STALE_ROWS * stat_info.records_output):
+            return True
+        average_refresh_interval = self._average_refresh_interval
+        return (
+            average_refresh_interval is not None
+            and time.monotonic() - self._last_refresh_time > 2 * average_refresh_interval
+        )
+
+    def _refresh_in_background(self, table_name: str) -> None:
+        """Refresh the stale statistics in a new transaction, and update the average interval between refreshes.
+        If the transaction cannot get a lock, it is rolled back and the previous statistics are kept
+        until the next refresh. On any other error the transaction is rolled back too, so that its locks and
+        buffers are released, and the error is raised into the refresh future.
+
+        Args:
+            table_name (str): the name of the table whose statistics were found stale
+        """
+        try:
+            tx = self._new_transaction()
+            try:
+                self._refresh_stale_tables(table_name, tx)
+            except LockAbortError:
+                tx.rollback()
+                return
+            except BaseException:
+                tx.rollback()
+                raise
+            tx.commit()
+            now = time.monotonic()
+            with self._lock:
+                refresh_interval = now - self._last_refresh_time
+                if self._average_refresh_interval is None:
+                    self._average_refresh_interval = refresh_interval
+                else:
+                    self._average_refresh_interval = (self._average_refresh_interval + refresh_interval) / 2
+                self._last_refresh_time = now
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh_all(self, tx: Transaction) -> None:
+        """Read the statistics stored in the stat catalog, and calculate those of the other tables
+        until STARTUP_SECONDS have elapsed. Used on system startup.
+        The tables are calculated in batches whose statistics are stored after each batch. The first batch has
+        one table, and the size of the next one is doubled or halved depending on whether the previous one
+        took less or more than TARGET_BATCH_SECONDS, so that the time limit is checked at about that interval.
+
+        Args:
+            tx (Transaction): the startup transaction
+        """
+        self._mutation_counts.take()
+        stored_stats = self._load_stats(tx)
+        self._put_stats(stored_stats)
+        table_names = [table_name for table_name in self._table_manager.table_names if table_name not in stored_stats]
+        calculated_stats: Dict[str, StatInfo] = {}
+        deadline = time.monotonic() + self.STARTUP_SECONDS
+        batch_size = 1
+        start = 0
+        while start < len(table_names):
+            batch_start_time = time.monotonic()
+            if batch_start_time >= deadline:
+                break
+            table_stats = {}
+            for table_name in table_names[start : start + batch_size]:
+                layout = self._table_manager.get_layout(table_name, tx)
+                table_stats[table_name] = self._calc_table_stats(table_name, layout, tx)
+            self._put_stats(table_stats)
+            calculated_stats.update(table_stats)
+            start += batch_size
+            if time.monotonic() - batch_start_time < self.TARGET_BATCH_SECONDS:
+                batch_size = min(2 * batch_size, self.MAX_BATCH_TABLES)
+            else:
+                batch_size = max(batch_size // 2, 1)
+        self._store_stats(calculated_stats, tx)
+
+    def _refresh_stale_tables(self, table_name: str, tx: Transaction) -> None:
+        """Recalculate the statistics of the specified table and of the other stale tables.
+        The mutation counts of the tables that are not refreshed are kept.
+
+        Args:
+            table_name (str): the name of the table whose statistics were found stale
+            tx (Transaction): the calling transaction
+        """
+        mutation_counts = self._mutation_counts.take()
+        current_stats = {}
+        for name in mutation_counts:
+            with self._stripe_lock(name):
+                stat_info = self._table_stats.get(name)
+            if stat_info is not None:
+                current_stats[name] = stat_info
+        with self._lock:
+            stale_tables = [
+                name
+                for name, stat_info in current_stats.items()
+                if name == table_name or self._is_stale(stat_info, mutation_counts[name])
+            ]
+        refreshed_stats: Dict[str, StatInfo] = {}
+        for name in stale_tables:
+            try:
+                refreshed_stats[name] = self._refresh_table(name, tx)
+            except BaseException:
+                self._mutation_counts.restore(mutation_counts)
+                raise
+            del mutation_counts[name]
+        self._mutation_counts.restore(mutation_counts)
+        self._store_stats(refreshed_stats, tx)
+
+    def _refresh_table(self, table_name: str, tx: Transaction) -> StatInfo:
+        """Recalculate the statistics of a table, and replace its entry in the statistics dict.
+
+        Args:
+            table_name (str): the name of the table
+            tx (Transaction): the calling transaction
+
+        Returns:
+            StatInfo: the recalculated statistics
+        """
+        layout = self._table_manager.get_layout(table_name, tx)
+        stat_info = self._calc_table_stats(table_name, layout, tx)
+        self._put_stats({table_name: stat_info})
+        return stat_info
+
+    def _stripe_lock(self, table_name: str) -> Lock:
+        """Return the lock that guards the entry of the specified table in the statistics dict.
+
+        Args:
+            table_name (str): the name of the table
+
+        Returns:
+            Lock: the lock of the table's stripe
+        """
+        return self._stripe_locks[hash(table_name) & (self.NUM_STRIPES - 1)]
+
+    def _put_stats(self, table_stats: Dict[str, StatInfo]) -> None:
+        """Replace the entries of the specified tables in the statistics dict.
+
+        Args:
+            table_stats (Dict[str, StatInfo]): the statistics of each table
+        """
+        for table_name, stat_info in table_stats.items():
+            with self._stripe_lock(table_name):
                 self._table_stats[table_name] = stat_info
-            return stat_info
 
-    def _refresh_statistics(self, tx: Transaction) -> None:
-        table_stats = {}
-        table_catalog_layout = self._table_manager.get_layout("table_catalog", tx)
-        table_catalog = TableScan(tx, "table_catalog", table_catalog_layout)
-        while table_catalog.next():
-            table_name = table_catalog.get_string("tablename")
-            layout = self._table_manager.get_layout(table_name, tx)
-            statistic_info = self._calc_table_stats(table_name, layout, tx)
-            table_stats[table_name] = statistic_info
-        table_catalog.close()
+    def _load_stats(self, tx: Transaction) -> Dict[str, StatInfo]:
+        """Read the statistics stored in the stat catalog, of the tables that exist and were not written
+        since their statistics were calculated.
+
+        Args:
+            tx (Transaction): the startup transaction
+
+        Returns:
+            Dict[str, StatInfo]: the stored statistics of each table
+        """
+        table_names = set(self._table_manager.table_names)
+        layout = self._table_manager.get_layout(self.STAT_CATALOG, tx)
+        table_stats: Dict[str, StatInfo] = {}
+        if not layout.schema.has_field("modtime"):
+            return table_stats
+        table_scan = TableScan(tx, self.STAT_CATALOG, layout, count_mutations=False)
+        while table_scan.next():
+            table_name = sys.intern(table_scan.get_string("tablename"))
+            if table_name not in table_names:
+                continue
+            modified_time = tx.file_manager.modified_time(table_name + ".tbl")
+            # the stat catalog is written whenever statistics are stored, which its own statistics do not count
+            if table_name == self.STAT_CATALOG or table_scan.get_string("modtime") == str(modified_time):
+                table_stats[table_name] = StatInfo(table_scan.get_int("numblocks"), table_scan.get_int("numrecords"))
+                self._modified_times[table_name] = modified_time
+        table_scan.close()
+        return table_stats
+
+    def _store_stats(self, table_stats: Dict[str, StatInfo], tx: Transaction) -> None:
+        """Store statistics in the stat catalog, updating the records of the tables that already have one.
+
+        Args:
+            table_stats (Dict[str, StatInfo]): the statistics of each table
+            tx (Transaction): the calling transaction
+        """
+        if not table_stats:
+            return
+        remaining_stats = dict(table_stats)
+        layout = self._table_manager.get_layout(self.STAT_CATALOG, tx)
+        has_modified_times = layout.schema.has_field("modtime")
+        table_scan = TableScan(tx, self.STAT_CATALOG, layout, count_mutations=False)
+        while remaining_stats and table_scan.next():
+            table_name = table_scan.get_string("tablename")
+            stat_info = remaining_stats.pop(table_name, None)
+            if stat_info is not None:
+                table_scan.set_int("numblocks", stat_info.blocks_accessed)
+                table_scan.set_int("numrecords", stat_info.records_output)
+                if has_modified_times:
+                    table_scan.set_string("modtime", self._stored_modified_time(table_name))
+        # the scan is at the end of the catalog if some tables have no record yet
+        records: List[Dict[str, int | str]] = []
+        for table_name, stat_info in remaining_stats.items():
+            record: Dict[str, int | str] = {
+                "tablename": table_name,
+                "numblocks": stat_info.blocks_accessed,
+                "numrecords": stat_info.records_output,
+            }
+            if has_modified_times:
+                record["modtime"] = self._stored_modified_time(table_name)
+            records.append(record)
+        table_scan.bulk_insert(records)
+        table_scan.close()
+
+    def _stored_modified_time(self, table_name: str) -> str:
+        """Return the modification time to store with the statistics of a table, which is the one of its file when
+        they were calculated, or an empty string, which matches no file, if it is not known.
+
+        Args:
+            table_name (str): the name of the table
+
+        Returns:
+            str: the modification time in nanoseconds
+        """
+        with self._stripe_lock(table_name):
+            modified_time = self._modified_times.get(table_name)
+        return "" if modified_time is None else str(modified_time)
 
     def _calc_table_stats(self, table_name: str, layout: Layout, tx: Transaction) -> StatInfo:
-        num_records = 0
-        num_blocks = 0
+        # the time is taken first, so that a write during the calculation makes the statistics stale
+        modified_time = tx.file_manager.modified_time(table_name + ".tbl")
         table_scan = TableScan(tx, table_name, layout)
-        while table_scan.next():
-            num_records += 1
-            num_blocks = table_scan.get_rid().block_number + 1
+        num_records, num_blocks = table_scan.count_records_and_blocks()
         table_scan.close()
+        with self._stripe_lock(table_name):
+            self._modified_times[table_name] = modified_time
         return StatInfo(num_blocks, num_records)
 
 
@@ -221,17 +583,44 @@ class IndexInfo:
     """The information about an index.
     This information is used by the query planner in order to estimate the costs of using the index,
     and to obtain the layout of the index records. Its methods are essentially the same as those of Plan.
+    The planner creates one for each index of each table of a query, so the estimates are calculated once,
+    when it is created, and the object has no instance dict.
+    The version of an index tells the format of its files, which is the one of the code that created it:
+    version 0 indexes have HashIndex.LEGACY_NUM_BUCKETS buckets, and the later ones have HashIndex.NUM_BUCKETS;
+    the records of version 2 indexes on string fields also have a fingerprint of their value.
     """
 
+    VERSION = 2  # the version of the indexes created by this code
+
+    __slots__ = (
+        "_index_name",
+        "_field_name",
+        "_num_buckets",
+        "_tx",
+        "_table_schema",
+        "_index_layout",
+        "_stat_info",
+        "_blocks_accessed",
+        "_records_output",
+    )
     _index_name: str
     _field_name: str
+    _num_buckets: int
     _tx: Transaction
     _table_schema: Schema
     _index_layout: Layout
     _stat_info: StatInfo
+    _blocks_accessed: int
+    _records_output: int
 
     def __init__(
-        self, index_name: str, field_name: str, table_schema: Schema, tx: Transaction, stat_info: StatInfo
+        self,
+        index_name: str,
+        field_name: str,
+        table_schema: Schema,
+        tx: Transaction,
+        stat_info: StatInfo,
+        version: int = VERSION,
     ) -> None:
         """Create an IndexInfo object for the specified index.
 
@@ -241,13 +630,19 @@ class IndexInfo:
             table_schema (Schema): the schema of the table
             tx (Transaction): the calling transaction
             stat_info (StatInfo): the statistical information about the table
+            version (int): the version of the index
         """
         self._index_name = index_name
         self._field_name = field_name
+        self._num_buckets = HashIndex.NUM_BUCKETS if version >= 1 else HashIndex.LEGACY_NUM_BUCKETS
         self._tx = tx
         self._table_schema = table_schema
-        self._index_layout = self._create_index_layout()
+        self._index_layout = self._create_index_layout(version)
         self._stat_info = stat_info
+        records_per_block = tx.block_size // self._index_layout.slot_size
+        num_blocks = stat_info.records_output // records_per_block
+        self._blocks_accessed = HashIndex.search_cost(num_blocks, records_per_block, self._num_buckets)
+        self._records_output = stat_info.records_output // stat_info.distinct_values(field_name)
 
     def open(self) -> Index:
         """Open the index described by this object.
@@ -255,7 +650,7 @@ class IndexInfo:
         Returns:
             Index: the Index object associated with this information
         """
-        return HashIndex(self._tx, self._index_name, self._index_layout)
+        return HashIndex(self._tx, self._index_name, self._index_layout, self._num_buckets)
 
     @property
     def blocks_accessed(self) -> int:
@@ -267,10 +662,7 @@ class IndexInfo:
         Returns:
             int: the number of block accesses rerquired to traverse the index
         """
-
-        records_per_block = self._tx.block_size // self._index_layout.slot_size
-        num_blocks = self._stat_info.records_output // records_per_block
-        return HashIndex.search_cost(num_blocks, records_per_block)
+        return self._blocks_accessed
 
     @property
     def records_output(self) -> int:
@@ -280,7 +672,7 @@ class IndexInfo:
         Returns:
             int: the estimated number of records having a search key
         """
-        return self._stat_info.records_output // self._stat_info.distinct_values(self._field_name)
+        return self._records_output
 
     def distinct_values(self, field_name: str) -> int:
         """Return the distinct values for a specified field in the underlying table, or 1 for the indexed field.
@@ -297,10 +689,15 @@ class IndexInfo:
         else:
             return self._stat_info.distinct_values(field_name)
 
-    def _create_index_layout(self) -> Layout:
+    def _create_index_layout(self, version: int) -> Layout:
         """Return the layout of the index records. The schema consists of the dataRID (which is represented as two
         integers, the block number and the record ID) and the dataval (which is the indexed field).
         Schema information about the indexed field is obtained via the table's schema.
+        If the indexed field is a string and the index is of version 2 or later, the schema also has a fingerprint of
+        the dataval, which lets the index skip most non-matching records without reading their string.
+
+        Args:
+            version (int): the version of the index
 
         Returns:
             Layout: _description_
@@ -313,15 +710,25 @@ class IndexInfo:
         else:
             field_len = self._table_schema.length(self._field_name)
             schema.add_string_field("dataval", field_len)
+            if version >= 2:
+                schema.add_int_field("fingerprint")
         return Layout(schema)
 
 
 class IndexManager:
-    """The index manager. The index manager has similar functionality to the table manager."""
+    """The index manager. The index manager has similar functionality to the table manager.
+    Like the table catalogs, the index catalog is read once at startup and kept in memory.
+    The index catalog stores the version of each index. The catalogs of databases created before the version
+    was stored have no such field: their indexes are version 0, and so are the indexes created in them,
+    since their version could not be stored.
+    """
 
     _layout: Layout
     _table_manager: TableManager
     _stat_manager: StatManager
+    _version: int
+    _indexes: Dict[str, List[Tuple[str, str, int]]]
+    _indexes_lock: Lock
 
     def __init__(self, is_new: bool, table_manager: TableManager, stat_manager: StatManager, tx: Transaction) -> None:
         if is_new:
@@ -329,10 +736,16 @@ class IndexManager:
             schema.add_string_field("indexname", TableManager.MAX_NAME)
             schema.add_string_field("tablename", TableManager.MAX_NAME)
             schema.add_string_field("fieldname", TableManager.MAX_NAME)
+            schema.add_int_field("version")
             table_manager.create_table("idxcat", schema, tx)
         self._table_manager = table_manager
         self._stat_manager = stat_manager
         self._layout = table_manager.get_layout("idxcat", tx)
+        self._version = IndexInfo.VERSION if self._layout.schema.has_field("version") else 0
+        self._indexes = {}
+        self._indexes_lock = Lock()
+        if not is_new:
+            self._load_indexes(tx)
 
     def create_index(self, index_name: str, table_name: str, field_name: str, tx: Transaction) -> None:
         """Create an index of the specified type for the specified field. A unique ID is assigned to this index,
@@ -349,8 +762,15 @@ class IndexManager:
         table_scan.set_string("indexname", index_name)
         table_scan.set_string("tablename", table_name)
         table_scan.set_string("fieldname", field_name)
+        if self._version > 0:
+            table_scan.set_int("version", self._version)
         table_scan.close()
 
+        index = (index_name, field_name, self._version)
+        with self._indexes_lock:
+            self._indexes.setdefault(table_name, []).append(index)
+        tx.on_rollback(lambda: self._forget_index(table_name, index))
+
     def get_index_info(self, table_name: str, tx: Transaction) -> Dict[str, IndexInfo]:
         """Return a map containing the index info for all indexes on the specified table.
 
@@ -361,51 +781,121 @@ class IndexManager:
         Returns:
             Dict[str, IndexInfo]: a map of IndexInfo objects, keyed by their field names
         """
+        with self._indexes_lock:
+            indexes = self._indexes.get(table_name)
+            if not indexes:
+                return {}
+            indexes = list(indexes)
+        # all the indexes are on the same table, so its layout and statistics are looked up once
+        table_layout = self._table_manager.get_layout(table_name, tx)
+        table_stat_info = self._stat_manager.get_stat_info(table_name, table_layout, tx)
         result = {}
+        for index_name, field_name, version in indexes:
+            index_info = IndexInfo(index_name, field_name, table_layout.schema, tx, table_stat_info, version)
+            result[field_name] = index_info
+        return result
+
+    def _forget_index(self, table_name: str, index: Tuple[str, str, int]) -> None:
+        """Remove an index whose creation was rolled back.
+
+        Args:
+            table_name (str): the name of the indexed table
+            index (Tuple[str, str, int]): the name of the index, the name of the indexed field and the version
+        """
+        with self._indexes_lock:
+            indexes = self._indexes.get(table_name)
+            if indexes is not None and index in indexes:
+                indexes.remove(index)
+                if not indexes:
+                    del self._indexes[table_name]
+
+    def _load_indexes(self, tx: Transaction) -> None:
+        """Read all the indexes from the index catalog.
+
+        Args:
+            tx (Transaction): the startup transaction
+        """
         table_scan = TableScan(tx, "idxcat", self._layout)
-        while table_scan.next():
-            if table_scan.get_string("tablename") == table_name:
-                index_name = table_scan.get_string("indexname")
-                field_name = table_scan.get_string("fieldname")
-                table_layout = self._table_manager.get_layout(table_name, tx)
-                table_stat_info = self._stat_manager.get_stat_info(table_name, table_layout, tx)
-                index_info = IndexInfo(index_name, field_name, table_layout.schema, tx, table_stat_info)
-                result[field_name] = index_info
+        has_version = self._version > 0
+        with self._indexes_lock:
+            while table_scan.next():
+                table_name = sys.intern(table_scan.get_string("tablename"))
+                index = (
+                    sys.intern(table_scan.get_string("indexname")),
+                    sys.intern(table_scan.get_string("fieldname")),
+                    table_scan.get_int("version") if has_version else 0,
+                )
+                self._indexes.setdefault(table_name, []).append(index)
         table_scan.close()
-        return result
 
 
 class ViewManager:
+    """The view manager. The view catalog is read once at startup and kept in memory,
+    so that checking whether a table name is a view, which the planner does for every table of a query,
+    does not scan it.
+    """
+
     MAX_VIEWDEF = 100
 
     _table_manager: TableManager
+    _view_defs: Dict[str, str]
+    _view_defs_lock: Lock
 
     def __init__(self, is_new: bool, table_manager: TableManager, tx: Transaction) -> None:
         self._table_manager = table_manager
+        self._view_defs = {}
+        self._view_defs_lock = Lock()
         if is_new:
             schema = Schema()
             schema.add_string_field("viewname", TableManager.MAX_NAME)
             schema.add_string_field("viewdef", self.MAX_VIEWDEF)
             table_manager.create_table("viewcat", schema, tx)
+        else:
+            self._load_view_defs(tx)
 
     def create_view(self, view_name: str, view_def: str, tx: Transaction) -> None:
         layout = self._table_manager.get_layout("viewcat", tx)
         table_scan = TableScan(tx, "viewcat", layout)
+        table_scan.before_last_block()
         table_scan.insert()
         table_scan.set_string("viewname", view_name)
         table_scan.set_string("viewdef", view_def)
         table_scan.close()
 
+        with self._view_defs_lock:
+            self._view_defs.setdefault(view_name, view_def)
+        tx.on_rollback(lambda: self._forget_view_def(view_name, view_def))
+
     def get_view_def(self, view_name: str, tx: Transaction) -> Optional[str]:
-        result = None
+        with self._view_defs_lock:
+            return self._view_defs.get(view_name)
+
+    def _forget_view_def(self, view_name: str, view_def: str) -> None:
+        """Remove a view whose creation was rolled back.
+
+        Args:
+            view_name (str): the name of the view
+            view_def (str): the definition that was stored for the view
+        """
+        with self._view_defs_lock:
+            if self._view_defs.get(view_name) == view_def:
+                del self._view_defs[view_name]
+
+    def _load_view_defs(self, tx: Transaction) -> None:
+        """Read the definitions of all views from the view catalog.
+        As when the catalog was scanned for each lookup, the first definition of a view name is the one used.
+
+        Args:
+            tx (Transaction): the startup transaction
+        """
         layout = self._table_manager.get_layout("viewcat", tx)
         table_scan = TableScan(tx, "viewcat", layout)
+        view_defs: Dict[str, str] = {}
         while table_scan.next():
-            if table_scan.get_string("viewname") == view_name:
-                result = table_scan.get_string("viewdef")
-                break
+            view_defs.setdefault(sys.intern(table_scan.get_string("viewname")), table_scan.get_string("viewdef"))
         table_scan.close()
-        return result
+        with self._view_defs_lock:
+            self._view_defs = view_defs
 
 
 class MetadataManager:
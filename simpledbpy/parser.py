@@ -1,6 +1,8 @@
 import re
+import sys
 from dataclasses import dataclass
-from typing import Collection, List, Optional, Tuple, Union
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
 
 from simpledbpy.query import Constant, Expression, Predicate, Term
 from simpledbpy.record import Schema
@@ -10,17 +12,82 @@ class BadSyntaxException(Exception):
     pass
 
 
+def _first_char_kinds(first_char_patterns: List[str]) -> List[Optional[int]]:
+    """Maps each ASCII character code to the index of the token kind that starts with that character.
+
+    Args:
+        first_char_patterns (List[str]): The patterns of the first character of each token kind, which are disjoint.
+
+    Returns:
+        List[Optional[int]]: The index of the token kind for each character code, or None if no token starts with it.
+    """
+    regexes = [re.compile(pattern) for pattern in first_char_patterns]
+    return [
+        next((kind for kind, regex in enumerate(regexes) if regex.fullmatch(chr(code))), None) for code in range(128)
+    ]
+
+
 class Lexer:
-    """Creates a new lexical analyzer for SQL statement sql."""
+    """Creates a new lexical analyzer for SQL statement sql.
+    The keywords and the tokenizer regexes are built once, when the class is defined, rather than for each statement.
+    Since the kind of a token is known from its first character, each token is scanned by the regex of its kind only,
+    or without any regex for the delimiters and the string literals.
+    """
+
+    KEYWORDS: FrozenSet[str] = frozenset(
+        {
+            "select",
+            "from",
+            "where",
+            "and",
+            "insert",
+            "into",
+            "values",
+            "delete",
+            "update",
+            "set",
+            "create",
+            "table",
+            "int",
+            "varchar",
+            "view",
+            "as",
+            "index",
+            "on",
+        }
+    )
+    # the kind, the pattern of the first character and the pattern of each token
+    _TOKEN_SPECIFICATION: List[Tuple[str, str, str]] = [
+        ("NUMBER", r"\d", r"\d+"),  # Integer
+        ("ID", r"[a-zA-Z_]", r"[a-zA-Z_]\w*"),  # Identifiers
+        ("STRING", r"\'", r"\'[^\']*\'"),  # String literals
+        ("DELIM", r"[=(),]", r"[=(),]"),  # Delimiters
+    ]
+    # the tokens of the keywords and the delimiters are shared by all the statements instead of built for each one
+    _KEYWORD_TOKENS: Dict[str, Tuple[str, str]] = {keyword: (keyword, keyword) for keyword in KEYWORDS}
+    # the keywords spelled in lower or upper case are found as they are, without lowering them first
+    _KEYWORD_TOKENS |= {keyword.upper(): token for keyword, token in _KEYWORD_TOKENS.items()}
+    # an identifier not starting with one of these characters cannot be a keyword, whatever its case
+    _KEYWORD_FIRST_CHARS: FrozenSet[str] = frozenset(keyword[0] for keyword in _KEYWORD_TOKENS)
+    _DELIM_TOKENS: Dict[str, Tuple[str, str]] = {delim: ("DELIM", delim) for delim in "=(),"}
+    # the current token at the end of the statement, so that the current token never needs a None check
+    EOF_TOKEN: Tuple[str, str] = ("EOF", "")
+    _NUMBER, _ID, _STRING, _DELIM = range(len(_TOKEN_SPECIFICATION))
+    _TOKEN_REGEXES: List["re.Pattern[str]"] = [re.compile(pattern) for _, _, pattern in _TOKEN_SPECIFICATION]
+    _FIRST_CHAR_KINDS: List[Optional[int]] = _first_char_kinds(
+        [first_char for _, first_char, _ in _TOKEN_SPECIFICATION]
+    )
+
+    __slots__ = ("_tokens", "_position", "_current_token")
 
-    _keywords: Collection[str]
     _tokens: List[Tuple[str, Union[int, str]]]
-    _current_token: Optional[Tuple[str, Union[int, str]]]
+    _position: int
+    _current_token: Tuple[str, Union[int, str]]
 
     def __init__(self, sql: str) -> None:
-        self._init_keywords()
         self._tokens = self._tokenize(sql)
-        self.current_token = None
+        self._position = 0
+        self._current_token = self.EOF_TOKEN
         self._next_token()
 
     def match_delim(self, delim: str) -> bool:
@@ -32,7 +99,7 @@ class Lexer:
         Returns:
             bool: True if the delimiter is the current token
         """
-        return self._current_token is not None and self._current_token[0] == "DELIM" and self._current_token[1] == delim
+        return self._current_token[0] == "DELIM" and self._current_token[1] == delim
 
     def match_int_constant(self) -> bool:
         """Returns true if the current token is an integer.
@@ -40,7 +107,7 @@ class Lexer:
         Returns:
             bool: True if the current token is an integer
         """
-        return self._current_token is not None and self._current_token[0] == "NUMBER"
+        return self._current_token[0] == "NUMBER"
 
     def match_string_constant(self) -> bool:
         """Returns true if the current token is a string.
@@ -48,7 +115,7 @@ class Lexer:
         Returns:
             bool: True if the current token is a string
         """
-        return self._current_token is not None and self._current_token[0] == "STRING"
+        return self._current_token[0] == "STRING"
 
     def match_keyword(self, keyword: str) -> bool:
         """Returns true if the current token is the specified keyword.
@@ -59,7 +126,7 @@ class Lexer:
         Returns:
             bool: True if the keyword is the current token
         """
-        return self._current_token is not None and self._current_token[0] == keyword
+        return self._current_token[0] == keyword
 
     def match_id(self) -> bool:
         """Returns true if the current token is a legal identifier.
@@ -67,7 +134,7 @@ class Lexer:
         Returns:
             bool: True if the current token is an identifier
         """
-        return self._current_token is not None and self._current_token[0] == "ID"
+        return self._current_token[0] == "ID"
 
     def eat_delim(self, delim: str) -> None:
         """Throws an exception if the current token is not the specified delimiter. Otherwise, moves to the next token.
@@ -75,7 +142,7 @@ class Lexer:
         Args:
             delim (str): a character denoting the delimiter
         """
-        if not self.match_delim(delim):
+        if self._current_token != ("DELIM", delim):
             raise BadSyntaxException(f"Expected delimiter {delim}")
         self._next_token()
 
@@ -86,9 +153,10 @@ class Lexer:
         Returns:
             int: the integer value of the current token
         """
-        if not self.match_int_constant():
+        token = self._current_token
+        if token[0] != "NUMBER":
             raise BadSyntaxException("Expected integer constant")
-        value: int = self._current_token[1]  # type: ignore
+        value: int = token[1]  # type: ignore
         self._next_token()
         return value
 
@@ -99,9 +167,10 @@ class Lexer:
         Returns:
             str: the string value of the current token
         """
-        if not self.match_string_constant():
+        token = self._current_token
+        if token[0] != "STRING":
             raise BadSyntaxException("Expected string constant")
-        value: str = self._current_token[1]  # type: ignore
+        value: str = token[1]  # type: ignore
         self._next_token()
         return value
 
@@ -111,142 +180,189 @@ class Lexer:
         Args:
             keyword (str): the keyword string
         """
-        if not self.match_keyword(keyword):
+        token = self._current_token
+        if token[0] != keyword:
             raise BadSyntaxException(f"Expected keyword {keyword}")
         self._next_token()
 
+    def skip_keyword(self, keyword: str) -> bool:
+        """Moves to the next token if the current token is the specified keyword,
+        which checks for an optional keyword with a single call.
+
+        Args:
+            keyword (str): the keyword string
+
+        Returns:
+            bool: True if the keyword was the current token
+        """
+        if self._current_token[0] != keyword:
+            return False
+        self._next_token()
+        return True
+
     def eat_id(self) -> str:
         """Throws an exception if the current token is not  an identifier.
         Otherwise, returns the identifier string  and moves to the next token.
+        The identifier is interned, like the names read from the catalogs, so that comparing it with them
+        and looking it up in the metadata dicts compare the strings by identity.
 
         Returns:
             str: the string value of the current token
         """
-        if not self.match_id():
+        token = self._current_token
+        if token[0] != "ID":
             raise BadSyntaxException("Expected identifier")
-        value: str = self._current_token[1]  # type: ignore
+        value: str = sys.intern(token[1])  # type: ignore
         self._next_token()
         return value
 
+    def peek(self) -> Tuple[str, Union[int, str]]:
+        """Returns the current token without moving to the next one.
+        The parser inspects the kind of the token directly, rather than trying each match method in turn.
+
+        Returns:
+            Tuple[str, Union[int, str]]: the kind and the value of the current token, or EOF_TOKEN at the end
+        """
+        return self._current_token
+
+    def advance(self) -> Tuple[str, Union[int, str]]:
+        """Throws an exception if there is no current token. Otherwise, returns it and moves to the next token.
+
+        Returns:
+            Tuple[str, Union[int, str]]: the kind and the value of the current token
+        """
+        token = self._current_token
+        if token is self.EOF_TOKEN:
+            raise BadSyntaxException("Unexpected end of statement")
+        self._next_token()
+        return token
+
     def _tokenize(self, s: str) -> List[Tuple[str, Union[int, str]]]:
-        token_specification: List[Tuple[str, str]] = [
-            ("NUMBER", r"\d+"),  # Integer
-            ("ID", r"[a-zA-Z_]\w*"),  # Identifiers
-            ("STRING", r"\'[^\']*\'"),  # String literals
-            ("DELIM", r"[=(),]"),  # Delimiters
-            ("SKIP", r"[ \t]+"),  # Skip whitespace
-            ("MISMATCH", r"."),  # Any other character
-        ]
-        tok_regex: str = "|".join("(?P<%s>%s)" % pair for pair in token_specification)
-        get_token = re.compile(tok_regex).finditer
+        first_char_kinds = self._FIRST_CHAR_KINDS
+        match_number = self._TOKEN_REGEXES[self._NUMBER].match
+        match_id = self._TOKEN_REGEXES[self._ID].match
+        number_kind, string_kind, delim_kind = self._NUMBER, self._STRING, self._DELIM
+        keyword_tokens = self._KEYWORD_TOKENS
+        keyword_first_chars = self._KEYWORD_FIRST_CHARS
+        delim_tokens = self._DELIM_TOKENS
+        intern = sys.intern
         tokens: List[Tuple[str, Union[int, str]]] = []
-        for match in get_token(s):
-            kind = match.lastgroup
-            if kind is None:
-                raise BadSyntaxException("Unexpected None value for token kind")
-            value: str = match.group()
-            if kind == "NUMBER":
-                tokens.append((kind, int(value)))
-            elif kind == "ID" and value.lower() in self._keywords:
-                tokens.append((value.lower(), value))
-            elif kind == "STRING":
-                tokens.append((kind, value[1:-1]))  # Strip quotes
-            elif kind == "SKIP":
+        add_token = tokens.append
+        position = 0
+        end = len(s)
+        while position < end:
+            char = s[position]
+            if char == " ":
+                # spaces separate almost every token, so they are skipped before looking up the kind
+                position += 1
                 continue
-            elif kind == "MISMATCH":
-                raise BadSyntaxException(f"Unexpected character: {value}")
+            code = ord(char)
+            kind = first_char_kinds[code] if code < 128 else None
+            if kind is None:
+                if not char.isspace():
+                    raise BadSyntaxException(f"Unexpected character: {char}")
+                position += 1
+            elif kind == delim_kind:
+                # delimiters are a single character, no regex is needed
+                add_token(delim_tokens[char])
+                position += 1
+            elif kind == string_kind:
+                # a string literal ends at the next quote, which a substring search finds without any regex
+                string_end = s.find("'", position + 1)
+                if string_end < 0:
+                    raise BadSyntaxException(f"Unexpected character: {char}")
+                add_token(("STRING", s[position + 1 : string_end]))  # Strip quotes
+                position = string_end + 1
+            elif kind == number_kind:
+                match = match_number(s, position)
+                add_token(("NUMBER", int(match.group())))  # type: ignore
+                position = match.end()  # type: ignore
             else:
-                tokens.append((kind, value))
+                match = match_id(s, position)
+                value: str = match.group()  # type: ignore
+                keyword_token = keyword_tokens.get(value)
+                if keyword_token is None and value[0] in keyword_first_chars and not value.islower():
+                    keyword_token = keyword_tokens.get(value.lower())
+                # identifiers are interned, so the field names of a query are compared by identity in the schemas
+                add_token(keyword_token if keyword_token is not None else ("ID", intern(value)))
+                position = match.end()  # type: ignore
         return tokens
 
     def _next_token(self) -> None:
-        self._current_token = self._tokens.pop(0) if self._tokens else None
-
-    def _init_keywords(self) -> None:
-        self._keywords = {
-            "select",
-            "from",
-            "where",
-            "and",
-            "insert",
-            "into",
-            "values",
-            "delete",
-            "update",
-            "set",
-            "create",
-            "table",
-            "int",
-            "varchar",
-            "view",
-            "as",
-            "index",
-            "on",
-        }
+        # the tokens are read by position, since popping the first one would shift all the others
+        if self._position < len(self._tokens):
+            self._current_token = self._tokens[self._position]
+            self._position += 1
+        else:
+            self._current_token = self.EOF_TOKEN
 
 
 class ParserData:
-    pass
+    """The data parsed from a statement. It is immutable, including its predicates, since it may be cached."""
 
+    __slots__ = ()
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class QueryData(ParserData):
     """Data for the SQL <i>select</i> statement."""
 
-    field_names: List[str]
-    table_names: List[str]
+    field_names: Tuple[str, ...]
+    table_names: Tuple[str, ...]
     predication: Predicate
 
+    def __post_init__(self) -> None:
+        self.predication.freeze()
+
     def __str__(self) -> str:
-        result = "select "
-        for field in self.field_names:
-            result += field + ", "
-        result = result[:-2]  # remove last comma
-        result += " from "
-        for table in self.table_names:
-            result += table + ", "
-        result = result[:-2]  # remove last comma
+        result = f"select {', '.join(self.field_names)} from {', '.join(self.table_names)}"
         predication_str = str(self.predication)
         if predication_str:
             result += " where " + predication_str
         return result
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class InsertData(ParserData):
     table_name: str
-    field_names: List[str]
-    values: List[Constant]
+    field_names: Tuple[str, ...]
+    values: Tuple[Constant, ...]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DeleteData(ParserData):
     table_name: str
     predication: Predicate
 
+    def __post_init__(self) -> None:
+        self.predication.freeze()
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class ModifyData(ParserData):
     table_name: str
     field_name: str
     new_value: Expression
     predication: Predicate
 
+    def __post_init__(self) -> None:
+        self.predication.freeze()
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CreateTableData(ParserData):
     table_name: str
     schema: Schema
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CreateIndexData(ParserData):
     index_name: str
     table_name: str
     field_name: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CraeteViewData(ParserData):
     view_name: str
     query_data: QueryData
@@ -255,6 +371,8 @@ class CraeteViewData(ParserData):
 class Parser:
     """The SimpleDB parser"""
 
+    __slots__ = ("_lexer",)
+
     _lexer: Lexer
 
     def __init__(self, sql: str) -> None:
@@ -266,16 +384,18 @@ class Parser:
         return self._lexer.eat_id()
 
     def constant(self) -> Constant:
-        if self._lexer.match_string_constant():
-            return Constant(self._lexer.eat_string_constant())
-        else:
-            return Constant(self._lexer.eat_int_constant())
+        token = self._lexer.peek()
+        if token[0] == "STRING":
+            return Constant(self._lexer.advance()[1])
+        return Constant(self._lexer.eat_int_constant())
 
     def expression(self) -> Expression:
-        if self._lexer.match_id():
+        kind = self._lexer.peek()[0]
+        if kind == "ID":
             return Expression(self.field())
-        else:
-            return Expression(self.constant())
+        elif kind == "STRING" or kind == "NUMBER":
+            return Expression(Constant(self._lexer.advance()[1]))
+        raise BadSyntaxException("Expected integer constant")
 
     def term(self) -> Term:
         lhs = self.expression()
@@ -284,11 +404,10 @@ class Parser:
         return Term(lhs, rhs)
 
     def predicate(self) -> Predicate:
-        term = self.term()
-        predication = Predicate(term)
-        if self._lexer.match_keyword("and"):
-            self._lexer.eat_keyword("and")
-            predication.conjoin_with(self.predicate())
+        # the terms are conjoined in a loop, rather than recursing for each "and"
+        predication = Predicate(self.term())
+        while self._lexer.skip_keyword("and"):
+            predication.conjoin_with(Predicate(self.term()))
         return predication
 
     # Methods for parsing queries
@@ -299,10 +418,9 @@ class Parser:
         self._lexer.eat_keyword("from")
         tables = self._table_list()
         predication = Predicate()
-        if self._lexer.match_keyword("where"):
-            self._lexer.eat_keyword("where")
+        if self._lexer.skip_keyword("where"):
             predication = self.predicate()
-        return QueryData(fields, tables, predication)
+        return QueryData(tuple(fields), tuple(tables), predication)
 
     def _select_list(self) -> List[str]:
         fields: List[str] = []
@@ -323,20 +441,22 @@ class Parser:
     # methods for parsing the various update commands
 
     def update_command(self) -> ParserData:
-        if self._lexer.match_keyword("insert"):
+        kind = self._lexer.peek()[0]
+        if kind == "insert":
             return self.insert()
-        elif self._lexer.match_keyword("delete"):
+        elif kind == "delete":
             return self.delete()
-        elif self._lexer.match_keyword("update"):
+        elif kind == "update":
             return self.modify()
         else:
             return self._create()
 
     def _create(self) -> ParserData:
         self._lexer.eat_keyword("create")
-        if self._lexer.match_keyword("table"):
+        kind = self._lexer.peek()[0]
+        if kind == "table":
             return self.create_table()
-        elif self._lexer.match_keyword("view"):
+        elif kind == "view":
             return self.create_view()
         else:
             return self.create_index()
@@ -347,8 +467,7 @@ class Parser:
         self._lexer.eat_keyword("from")
         table_name = self._lexer.eat_id()
         predication = Predicate()
-        if self._lexer.match_keyword("where"):
-            self._lexer.eat_keyword("where")
+        if self._lexer.skip_keyword("where"):
             predication = self.predicate()
         return DeleteData(table_name, predication)
 
@@ -365,7 +484,7 @@ class Parser:
         self._lexer.eat_delim("(")
         values = self._constant_list()
         self._lexer.eat_delim(")")
-        return InsertData(table_name, field_names, values)
+        return InsertData(table_name, tuple(field_names), tuple(values))
 
     def _field_list(self) -> List[str]:
         fields: List[str] = []
@@ -392,8 +511,7 @@ class Parser:
         self._lexer.eat_delim("=")
         new_value = self.expression()
         predication = Predicate()
-        if self._lexer.match_keyword("where"):
-            self._lexer.eat_keyword("where")
+        if self._lexer.skip_keyword("where"):
             predication = self.predicate()
         return ModifyData(table_name, field_name, new_value, predication)
 
@@ -408,21 +526,20 @@ class Parser:
         return CreateTableData(table_name, schema)
 
     def _field_defs(self) -> Schema:
-        schema = self._field_def()
+        # the fields are added to a single schema in a loop, rather than merging a schema per field recursively
+        schema = Schema()
+        self._field_def(schema)
         while self._lexer.match_delim(","):
             self._lexer.eat_delim(",")
-            schema_to_add = self._field_defs()
-            schema.add_all(schema_to_add)
+            self._field_def(schema)
         return schema
 
-    def _field_def(self) -> Schema:
+    def _field_def(self, schema: Schema) -> None:
         field_name = self.field()
-        return self._field_type(field_name)
+        self._field_type(field_name, schema)
 
-    def _field_type(self, field_name: str) -> Schema:
-        schema = Schema()
-        if self._lexer.match_keyword("int"):
-            self._lexer.eat_keyword("int")
+    def _field_type(self, field_name: str, schema: Schema) -> None:
+        if self._lexer.skip_keyword("int"):
             schema.add_int_field(field_name)
         else:
             self._lexer.eat_keyword("varchar")
@@ -430,7 +547,6 @@ class Parser:
             str_len = self._lexer.eat_int_constant()
             self._lexer.eat_delim(")")
             schema.add_string_field(field_name, str_len)
-        return schema
 
     def create_view(self) -> CraeteViewData:
         """Method for parsing create view commands."""
@@ -450,3 +566,44 @@ class Parser:
         field_name = self.field()
         self._lexer.eat_delim(")")
         return CreateIndexData(index_name, table_name, field_name)
+
+
+# The parsed statements are cached by their text, since the same statements are often executed again.
+# The cached data is shared by all the callers, so it is immutable.
+PARSE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_query(sql: str) -> QueryData:
+    """Parses an SQL select statement, or returns the data parsed from the same statement before.
+
+    Args:
+        sql (str): the SQL query string
+
+    Returns:
+        QueryData: the parsed representation of the query
+    """
+    return Parser(sql).query()
+
+
+def parse_update_command(sql: str) -> ParserData:
+    """Parses an SQL insert, delete, modify, or create statement, or returns the data parsed from the same statement
+    before. The schema of a create table statement is mutable, so a copy of it is returned.
+
+    Args:
+        sql (str): the SQL update string
+
+    Returns:
+        ParserData: the parsed representation of the statement
+    """
+    update_data = _parse_update_command(sql)
+    if isinstance(update_data, CreateTableData):
+        schema = Schema()
+        schema.add_all(update_data.schema)
+        return CreateTableData(update_data.table_name, schema)
+    return update_data
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_update_command(sql: str) -> ParserData:
+    return Parser(sql).update_command()
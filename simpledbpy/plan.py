@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from simpledbpy.metadata import MetadataManager, StatInfo
 from simpledbpy.parser import (
@@ -11,12 +11,13 @@ from simpledbpy.parser import (
     DeleteData,
     InsertData,
     ModifyData,
-    Parser,
     ParserData,
     QueryData,
+    parse_query,
+    parse_update_command,
 )
-from simpledbpy.query import Predicate, ProductScan, ProjectScan, SelectScan, TableScan, UpdateScan
-from simpledbpy.record import Layout, Schema
+from simpledbpy.query import EmptyScan, Predicate, ProductScan, ProjectScan, SelectScan, TableScan, UpdateScan
+from simpledbpy.record import Layout, Schema, Types
 from simpledbpy.tx.transaction import Transaction
 
 if TYPE_CHECKING:
@@ -26,8 +27,11 @@ if TYPE_CHECKING:
 class Plan(ABC):
     """The interface implemented by each query plan.
     There is a Plan class for each relational algebra operator.
+    The plans declare __slots__, since a query tree is made of many small plan nodes.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def open(self) -> Scan:
         """Opens a scan corresponding to this plan. The scan will be positioned before its first record.
@@ -86,6 +90,8 @@ class Plan(ABC):
 class TablePlan(Plan):
     """The Plan class corresponding to a table."""
 
+    __slots__ = ("_table_name", "_tx", "_layout", "_stat_info")
+
     _table_name: str
     _tx: Transaction
     _layout: Layout
@@ -153,11 +159,19 @@ class TablePlan(Plan):
 class SelectPlan(Plan):
     """The Plan class corresponding to the <i>select</i> relational algebra operator."""
 
+    __slots__ = ("_plan", "_predication", "_records_output", "_distinct_values", "_is_empty")
+
     _plan: Plan
     _predication: Predicate
+    _records_output: Optional[int]
+    _distinct_values: Dict[str, int]
+    _is_empty: bool
 
     def __init__(self, plan: Plan, predication: Predicate) -> None:
         """Creates a new select node in the query tree, having the specified subquery and predicate.
+        The estimates are kept once computed, since they would otherwise be computed again
+        each time a node above asks for them.
+        If the predicate contradicts itself, the selection is known to be empty and the subquery is never read.
 
         Args:
             plan (Plan): the subquery
@@ -165,6 +179,9 @@ class SelectPlan(Plan):
         """
         self._plan = plan
         self._predication = predication
+        self._records_output = None
+        self._distinct_values = {}
+        self._is_empty = predication.is_unsatisfiable()
 
     def open(self) -> Scan:
         """Creates a select scan for this query.
@@ -172,15 +189,20 @@ class SelectPlan(Plan):
         Returns:
             Scan: a select scan
         """
+        if self._is_empty:
+            return EmptyScan(self.schema)
         scan = self._plan.open()
         return SelectScan(scan, self._predication)
 
     def blocks_accessed(self) -> int:
-        """Estimates the number of block accesses in the selection, which is the same as in the underlying query.
+        """Estimates the number of block accesses in the selection, which is the same as in the underlying query,
+        or none if the selection is empty.
 
         Returns:
             int: the estimated number of block accesses
         """
+        if self._is_empty:
+            return 0
         return self._plan.blocks_accessed()
 
     def records_output(self) -> int:
@@ -190,7 +212,12 @@ class SelectPlan(Plan):
         Returns:
             int: the estimated number of output records
         """
-        return self._plan.records_output() // self._predication.reduction_factor(self._plan)
+        if self._records_output is None:
+            if self._is_empty:
+                self._records_output = 0
+            else:
+                self._records_output = self._plan.records_output() // self._predication.reduction_factor(self._plan)
+        return self._records_output
 
     def distinct_values(self, field_name: str) -> int:
         """Estimates the number of distinct field values in the projection. If the predicate contains a term equating
@@ -203,14 +230,20 @@ class SelectPlan(Plan):
         Returns:
             int: the estimated number of distinct field values
         """
-        if self._predication.equal_with_constant(field_name) is not None:
-            return 1
-        else:
-            field_name2 = self._predication.equal_with_field(field_name)
-            if field_name2 is not None:
-                return min(self._plan.distinct_values(field_name), self._plan.distinct_values(field_name2))
+        distinct_values = self._distinct_values.get(field_name)
+        if distinct_values is None:
+            if self._predication.equal_with_constant(field_name) is not None:
+                distinct_values = 1
             else:
-                return self._plan.distinct_values(field_name)
+                field_name2 = self._predication.equal_with_field(field_name)
+                if field_name2 is not None:
+                    distinct_values = min(
+                        self._plan.distinct_values(field_name), self._plan.distinct_values(field_name2)
+                    )
+                else:
+                    distinct_values = self._plan.distinct_values(field_name)
+            self._distinct_values[field_name] = distinct_values
+        return distinct_values
 
     @property
     def schema(self) -> Schema:
@@ -225,15 +258,17 @@ class SelectPlan(Plan):
 class ProjectPlan(Plan):
     """The Plan class corresponding to the <i>project</i> relational algebra operator."""
 
+    __slots__ = ("_plan", "_schema")
+
     _plan: Plan
     _schema: Schema
 
-    def __init__(self, plan: Plan, field_names: list[str]) -> None:
+    def __init__(self, plan: Plan, field_names: Sequence[str]) -> None:
         """Creates a new project node in the query tree, having the specified subquery and field list.
 
         Args:
             plan (Plan): the subquery
-            field_names (list[str]): the list of field names
+            field_names (Sequence[str]): the field names
         """
         self._plan = plan
         self._schema = Schema()
@@ -290,12 +325,19 @@ class ProjectPlan(Plan):
 class ProductPlan(Plan):
     """The Plan class corresponding to the <i>product</i> relational algebra operator."""
 
+    __slots__ = ("_plan1", "_plan2", "_schema", "_blocks_accessed", "_records_output", "_is_swapped")
+
     _plan1: Plan
     _plan2: Plan
     _schema: Schema
+    _blocks_accessed: Optional[int]
+    _records_output: Optional[int]
+    _is_swapped: bool
 
     def __init__(self, plan1: Plan, plan2: Plan) -> None:
         """Creates a new product node in the query tree, having the two specified subqueries.
+        The estimates are kept once computed, like those of the select node.
+        Since the product is commutative, the subqueries are scanned in the cheaper order, whatever the given one.
 
         Args:
             plan1 (Plan): the left-hand subquery
@@ -303,6 +345,9 @@ class ProductPlan(Plan):
         """
         self._plan1 = plan1
         self._plan2 = plan2
+        self._blocks_accessed = None
+        self._records_output = None
+        self._is_swapped = False
         self._schema = Schema()
         self._schema.add_all(plan1.schema)
         self._schema.add_all(plan2.schema)
@@ -313,18 +358,29 @@ class ProductPlan(Plan):
         Returns:
             Scan: a product scan
         """
+        # the order of the subqueries is chosen along with the estimate of the block accesses
+        self.blocks_accessed()
         s1 = self._plan1.open()
         s2 = self._plan2.open()
+        if self._is_swapped:
+            return ProductScan(s2, s1)
         return ProductScan(s1, s2)
 
     def blocks_accessed(self) -> int:
-        """Estimates the number of block accesses in the product.
-        The formula is: <pre> B(product(p1,p2)) = B(p1) + R(p1)*B(p2) </pre>
+        """Estimates the number of block accesses in the product, scanning the subqueries in the cheaper order.
+        The formula is: <pre> B(product(p1,p2)) = min(B(p1) + R(p1)*B(p2), B(p2) + R(p2)*B(p1)) </pre>
 
         Returns:
             int: the estimated number of block accesses
         """
-        return self._plan1.blocks_accessed() + self._plan1.records_output() * self._plan2.blocks_accessed()
+        if self._blocks_accessed is None:
+            blocks_accessed1 = self._plan1.blocks_accessed()
+            blocks_accessed2 = self._plan2.blocks_accessed()
+            forward = blocks_accessed1 + self._plan1.records_output() * blocks_accessed2
+            backward = blocks_accessed2 + self._plan2.records_output() * blocks_accessed1
+            self._is_swapped = backward < forward
+            self._blocks_accessed = min(forward, backward)
+        return self._blocks_accessed
 
     def records_output(self) -> int:
         """Estimates the number of output records in the product.
@@ -333,7 +389,9 @@ class ProductPlan(Plan):
         Returns:
             int: the estimated number of output records
         """
-        return self._plan1.records_output() * self._plan2.records_output()
+        if self._records_output is None:
+            self._records_output = self._plan1.records_output() * self._plan2.records_output()
+        return self._records_output
 
     def distinct_values(self, field_name: str) -> int:
         """Estimates the distinct number of field values in the product. Since the product does not increase or
@@ -384,8 +442,10 @@ class BasicQueryPlanner(QueryPlanner):
 
     def create_plan(self, query_data: QueryData, tx: Transaction) -> Plan:
         """Creates a query plan as follows.
-        - It first takes the product of all tables and views.
-        - It then selects on the predicate.
+        - It first selects each table and view on the terms of the predicate that apply to it alone.
+        - It then takes the product of the selected tables and views, from the one with the fewest records,
+          and selects each product on the terms that join its two sides.
+        - It then selects on the remaining terms of the predicate, i.e. those naming unknown fields.
         - Finally it projects on the field list.
 
         Args:
@@ -395,27 +455,47 @@ class BasicQueryPlanner(QueryPlanner):
         Returns:
             Plan: a plan for that query
         """
+        return self._create_plan(query_data, tx, {})
 
+    def _create_plan(self, query_data: QueryData, tx: Transaction, view_plans: Dict[str, Plan]) -> Plan:
+        # the plan of a view is shared by all its references in the query, including those from other views
         # Step 1: Create a plan for each mentioned table or view
         plans = []
         for table_name in query_data.table_names:
+            view_plan = view_plans.get(table_name)
+            if view_plan is not None:
+                plans.append(view_plan)
+                continue
             view_def = self._metadata_manager.get_view_def(table_name, tx)
             if view_def is not None:  # Recursively plan the view
-                parser = Parser(view_def)
-                view_data = parser.query()
-                plans.append(self.create_plan(view_data, tx))
+                view_data = parse_query(view_def)
+                view_plan = self._create_plan(view_data, tx, view_plans)
+                view_plans[table_name] = view_plan
+                plans.append(view_plan)
             else:
                 plans.append(TablePlan(tx, table_name, self._metadata_manager))
 
-        # Step 2: Create the product of all table plans
+        # Step 2: Select each table plan on the terms that apply to it alone, before any product
+        predication = query_data.predication
+        for i, table_plan in enumerate(plans):
+            sub_predication = predication.select_sub_predicate(table_plan.schema)
+            if sub_predication is not None:
+                plans[i] = SelectPlan(table_plan, sub_predication)
+
+        # Step 3: Create the product of all table plans, the smallest ones first, since the product scans
+        # its right-hand side once per record of its left-hand side, and select each product on its join terms
+        plans.sort(key=lambda table_plan: table_plan.records_output())
         plan = plans.pop(0)
         for next_plan in plans:
+            join_predication = predication.join_sub_predicate(plan.schema, next_plan.schema)
             plan = ProductPlan(plan, next_plan)
+            if join_predication is not None:
+                plan = SelectPlan(plan, join_predication)
 
-        # Step 3: Add a selection plan for the predicate
-        plan = SelectPlan(plan, query_data.predication)
+        # Step 4: Add a selection plan for the terms that apply to no table nor product, so that they still fail
+        plan = SelectPlan(plan, predication.unapplied_sub_predicate([plan.schema]))
 
-        # Step 4: Project on the field names
+        # Step 5: Project on the field names
         plan = ProjectPlan(plan, query_data.field_names)
 
         return plan
@@ -514,10 +594,7 @@ class BasicUpdatePlanner(UpdatePlanner):
         plan = SelectPlan(plan, delete_data.predication)
         update_scan = plan.open()
         assert isinstance(update_scan, UpdateScan)
-        count = 0
-        while update_scan.next():
-            update_scan.delete()
-            count += 1
+        count = update_scan.delete_all()
         update_scan.close()
         return count
 
@@ -535,12 +612,22 @@ class BasicUpdatePlanner(UpdatePlanner):
         return count
 
     def execute_insert(self, insert_data: InsertData, tx: Transaction) -> int:
+        # A single record is written field by field, so that only the changed bytes are logged; bulk_insert would
+        # log an image of the whole slot. The values are typed first, so that a wrong one inserts no record.
         plan: Plan = TablePlan(tx, insert_data.table_name, self._metadata_manager)
+        schema = plan.schema
+        values: List[Tuple[str, int | str]] = [
+            (field_name, value.as_int() if schema.type(field_name) == Types.INTEGER else value.as_string())
+            for field_name, value in zip(insert_data.field_names, insert_data.values)
+        ]
         update_scan = plan.open()
         assert isinstance(update_scan, UpdateScan)
         update_scan.insert()
-        for field_name, value in zip(insert_data.field_names, insert_data.values):
-            update_scan.set_value(field_name, value)
+        for field_name, field_value in values:
+            if isinstance(field_value, int):
+                update_scan.set_int(field_name, field_value)
+            else:
+                update_scan.set_string(field_name, field_value)
         update_scan.close()
         return 1
 
@@ -564,10 +651,20 @@ class Planner:
 
     _query_planner: QueryPlanner
     _update_planner: UpdatePlanner
+    _update_executors: Dict[type, Callable[[Any, Transaction], int]]
 
     def __init__(self, query_planner: QueryPlanner, update_planner: UpdatePlanner) -> None:
         self._query_planner = query_planner
         self._update_planner = update_planner
+        # the method executing each kind of update statement, looked up by the type of the parsed statement
+        self._update_executors = {
+            InsertData: update_planner.execute_insert,
+            DeleteData: update_planner.execute_delete,
+            ModifyData: update_planner.execute_modify,
+            CreateTableData: update_planner.execute_create_table,
+            CraeteViewData: update_planner.execute_create_view,
+            CreateIndexData: update_planner.execute_create_index,
+        }
 
     def create_query_plan(self, query: str, tx: Transaction) -> Plan:
         """Creates a plan for an SQL select statement, using the supplied planner.
@@ -579,8 +676,7 @@ class Planner:
         Returns:
             Plan: the scan corresponding to the query plan
         """
-        parser = Parser(query)
-        query_data = parser.query()
+        query_data = parse_query(query)
         self._verify_query(query_data)
         return self._query_planner.create_plan(query_data, tx)
 
@@ -595,23 +691,12 @@ class Planner:
         Returns:
             int: the integer donating the number of affected records
         """
-        parser = Parser(update_command)
-        update_data = parser.update_command()
+        update_data = parse_update_command(update_command)
         self._verify_update(update_data)
-        if isinstance(update_data, InsertData):
-            return self._update_planner.execute_insert(update_data, tx)
-        elif isinstance(update_data, DeleteData):
-            return self._update_planner.execute_delete(update_data, tx)
-        elif isinstance(update_data, ModifyData):
-            return self._update_planner.execute_modify(update_data, tx)
-        elif isinstance(update_data, CreateTableData):
-            return self._update_planner.execute_create_table(update_data, tx)
-        elif isinstance(update_data, CraeteViewData):
-            return self._update_planner.execute_create_view(update_data, tx)
-        elif isinstance(update_data, CreateIndexData):
-            return self._update_planner.execute_create_index(update_data, tx)
-        else:
+        execute = self._update_executors.get(type(update_data))
+        if execute is None:
             return 0
+        return execute(update_data, tx)
 
     def _verify_query(self, query_data: QueryData) -> None:
         """SimpleDB does not verify queries, although it should.
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, List, Optional
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
 
-from simpledbpy.file import BlockId
+from simpledbpy.file import BlockId, FileManager
 from simpledbpy.record import Layout, RecordPage, Schema, Types
 from simpledbpy.tx.transaction import Transaction
 
@@ -115,6 +117,22 @@ class Constant:
         )
 
 
+def _constants_differ(constant1: Constant, constant2: Constant) -> bool:
+    """Return true if the two constants are of the same type and differ.
+
+    Args:
+        constant1 (Constant): the first constant
+        constant2 (Constant): the second constant
+
+    Returns:
+        bool: True if the constants are known to differ
+    """
+    try:
+        return constant1 != constant2
+    except ValueError:  # constants of different types cannot be compared
+        return False
+
+
 class Scan(ABC):
     """The interface will be implemented by each query scan.
     There is a Scan class for each relational algebra operator.
@@ -245,6 +263,18 @@ class UpdateScan(Scan):
 
         raise NotImplementedError
 
+    def delete_all(self) -> int:
+        """Delete the current record and every later record of the scan.
+
+        Returns:
+            int: the number of deleted records
+        """
+        count = 0
+        while self.next():
+            self.delete()
+            count += 1
+        return count
+
     @abstractmethod
     def get_rid(self) -> RID:
         """Returns the RID of the current record.
@@ -266,17 +296,134 @@ class UpdateScan(Scan):
         raise NotImplementedError
 
 
+class MutationCounts:
+    """The number of records inserted or deleted in each table of a database since the statistics manager last took
+    them. The statistics manager of the database owns the counts, and registers them for the database's file manager,
+    so that the table scans of every transaction on the database find them. The mutations of a transaction are
+    pending until it commits, so that a transaction's own uncommitted changes never make a table stale
+    (refreshing it would then wait for the transaction's locks), and are dropped if it is rolled back.
+    """
+
+    # The registered counts of each database. The counts are dropped with the database's file manager.
+    _counts_by_database: WeakKeyDictionary[FileManager, MutationCounts] = WeakKeyDictionary()
+
+    _counts: Dict[str, int]
+    _pending_counts: WeakKeyDictionary[Transaction, Dict[str, int]]
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._counts = {}
+        self._pending_counts = WeakKeyDictionary()
+        self._lock = Lock()
+
+    def register(self, tx: Transaction) -> None:
+        """Make these the counts of the database of the specified transaction.
+
+        Args:
+            tx (Transaction): a transaction on the database
+        """
+        MutationCounts._counts_by_database[tx.file_manager] = self
+
+    @staticmethod
+    def of(tx: Transaction) -> Optional[MutationCounts]:
+        """Return the counts registered for the database of the specified transaction.
+
+        Args:
+            tx (Transaction): a transaction on the database
+
+        Returns:
+            Optional[MutationCounts]: the counts, or None if the database has no statistics manager yet
+        """
+        return MutationCounts._counts_by_database.get(tx.file_manager)
+
+    def add(self, table_name: str, num_records: int, tx: Transaction) -> None:
+        """Count records inserted or deleted in a table by a transaction, once the transaction commits.
+
+        Args:
+            table_name (str): the name of the table
+            num_records (int): the number of inserted or deleted records
+            tx (Transaction): the transaction that inserted or deleted them
+        """
+        pending_counts = self._pending_counts.get(tx)
+        if pending_counts is None:
+            pending_counts = {}
+            with self._lock:
+                self._pending_counts[tx] = pending_counts
+            tx.on_commit(lambda: self._commit(tx))
+            tx.on_rollback(lambda: self._rollback(tx))
+        pending_counts[table_name] = pending_counts.get(table_name, 0) + num_records
+
+    def num_mutations(self, table_name: str) -> int:
+        """Return the number of records inserted or deleted in the specified table since the previous call of take.
+
+        Args:
+            table_name (str): the name of the table
+
+        Returns:
+            int: the number of inserted or deleted records
+        """
+        return self._counts.get(table_name, 0)
+
+    def take(self) -> Dict[str, int]:
+        """Return the number of records inserted or deleted in each table since the previous call, and reset them.
+
+        Returns:
+            Dict[str, int]: the number of inserted or deleted records of each modified table
+        """
+        with self._lock:
+            counts = self._counts
+            self._counts = {}
+        return counts
+
+    def restore(self, counts: Dict[str, int]) -> None:
+        """Add back counts returned by take, e.g. when the refresh that took them failed.
+
+        Args:
+            counts (Dict[str, int]): the number of inserted or deleted records of each table
+        """
+        with self._lock:
+            for table_name, num_records in counts.items():
+                self._counts[table_name] = self._counts.get(table_name, 0) + num_records
+
+    def _commit(self, tx: Transaction) -> None:
+        with self._lock:
+            pending_counts = self._pending_counts.pop(tx, {})
+            for table_name, num_records in pending_counts.items():
+                self._counts[table_name] = self._counts.get(table_name, 0) + num_records
+
+    def _rollback(self, tx: Transaction) -> None:
+        with self._lock:
+            self._pending_counts.pop(tx, None)
+
+
 class TableScan(UpdateScan):
     _tx: Transaction
     _layout: Layout
+    _table_name: str
     _file_name: str
     _current_slot: int
     _record_page: Optional[RecordPage]
+    _mutation_counts: Optional[MutationCounts]
+
+    def __init__(self, tx: Transaction, table_name: str, layout: Layout, count_mutations: bool = True) -> None:
+        """Open a scan of the records of a table.
 
-    def __init__(self, tx: Transaction, table_name: str, layout: Layout) -> None:
+        Args:
+            tx (Transaction): the calling transaction
+            table_name (str): the name of the table
+            layout (Layout): the layout of the table's records
+            count_mutations (bool): False if the table has no statistics to refresh, e.g. the bucket table of an
+                index or the statistics catalog, so its inserted and deleted records need not be counted
+        """
         self._tx = tx
         self._layout = layout
+        self._table_name = table_name
         self._file_name = table_name + ".tbl"
+        # temporary tables have no statistics either
+        if count_mutations and not table_name.startswith("temp"):
+            self._mutation_counts = MutationCounts.of(tx)
+        else:
+            self._mutation_counts = None
         self._record_page = None
         if tx.size(self._file_name) == 0:
             self._move_to_new_block()
@@ -286,6 +433,12 @@ class TableScan(UpdateScan):
     def before_first(self) -> None:
         self._move_to_block(0)
 
+    def before_last_block(self) -> None:
+        """Position the scan before the first record of the last block.
+        Records inserted afterwards go to the end of the table, without searching the earlier blocks for free slots.
+        """
+        self._move_to_block(max(0, self._tx.size(self._file_name) - 1))
+
     def next(self) -> bool:
         assert self._record_page is not None
         self._current_slot = self._record_page.next_after(self._current_slot)
@@ -296,6 +449,41 @@ class TableScan(UpdateScan):
             self._current_slot = self._record_page.next_after(self._current_slot)
         return True
 
+    def next_matching(self, field_name: str, value: int | str) -> bool:
+        """Move to the next record whose field holds the specified value.
+
+        Args:
+            field_name (str): the name of the field
+            value (int | str): the value to look for
+
+        Returns:
+            bool: False if there is no such record
+        """
+        assert self._record_page is not None
+        self._current_slot = self._record_page.next_matching_after(self._current_slot, field_name, value)
+        while self._current_slot < 0:
+            if self._at_last_block():
+                return False
+            self._move_to_block(self._record_page.block_id.block_number + 1)
+            self._current_slot = self._record_page.next_matching_after(self._current_slot, field_name, value)
+        return True
+
+    def count_records_and_blocks(self) -> Tuple[int, int]:
+        """Count the records of the table block by block, without visiting them one at a time.
+        The scan is left positioned before the first record.
+
+        Returns:
+            Tuple[int, int]: the number of records and the number of blocks of the table
+        """
+        num_blocks = self._tx.size(self._file_name)
+        num_records = 0
+        for block_number in range(num_blocks):
+            self._move_to_block(block_number)
+            assert self._record_page is not None
+            num_records += self._record_page.num_used_slots()
+        self.before_first()
+        return num_records, num_blocks
+
     def get_int(self, field_name: str) -> int:
         assert self._record_page is not None
         return self._record_page.get_int(self._current_slot, field_name)
@@ -340,10 +528,62 @@ class TableScan(UpdateScan):
             else:
                 self._move_to_block(self._record_page.block_id.block_number + 1)
             self._current_slot = self._record_page.insert_after(self._current_slot)
+        self._count_mutation()
+
+    def bulk_insert(self, records: Sequence[Dict[str, int | str]]) -> None:
+        """Insert the specified records, as consecutive calls of insert and of the setters would.
+        The records inserted in the same block are stored with a single update of the block.
+        The scan is left positioned at the last inserted record.
+
+        Args:
+            records (Sequence[Dict[str, int | str]]): the field values of each record
+        """
+        assert self._record_page is not None
+        while records:
+            slots = self._record_page.insert_records_after(self._current_slot, records)
+            if slots:
+                self._current_slot = slots[-1]
+                self._count_mutation(len(slots))
+                records = records[len(slots) :]
+            elif self._at_last_block():
+                self._move_to_new_block()
+            else:
+                self._move_to_block(self._record_page.block_id.block_number + 1)
 
     def delete(self) -> None:
         assert self._record_page is not None
         self._record_page.delete(self._current_slot)
+        self._count_mutation()
+
+    def delete_where(self, is_satisfied: Callable[[Scan], bool]) -> int:
+        """Delete the records after the current one that satisfy the specified condition.
+        The condition is checked on every record of a block before the matching ones are deleted with a single update
+        of the block. The scan is left positioned after the last record.
+
+        Args:
+            is_satisfied (Callable[[Scan], bool]): the condition, which reads the current record of this scan
+
+        Returns:
+            int: the number of deleted records
+        """
+        assert self._record_page is not None
+        count = 0
+        while True:
+            record_page = self._record_page
+            slots = []
+            slot = record_page.next_after(self._current_slot)
+            while slot >= 0:
+                self._current_slot = slot
+                if is_satisfied(self):
+                    slots.append(slot)
+                slot = record_page.next_after(slot)
+            if slots:
+                record_page.delete_records(slots)
+                self._count_mutation(len(slots))
+                count += len(slots)
+            if self._at_last_block():
+                return count
+            self._move_to_block(record_page.block_id.block_number + 1)
 
     def move_to_rid(self, rid: RID) -> None:
         self.close()
@@ -368,6 +608,10 @@ class TableScan(UpdateScan):
         self._record_page.format()
         self._current_slot = -1
 
+    def _count_mutation(self, num_records: int = 1) -> None:
+        if self._mutation_counts is not None:
+            self._mutation_counts.add(self._table_name, num_records, self._tx)
+
     def _at_last_block(self) -> bool:
         assert self._record_page is not None
         return self._record_page.block_id.block_number == self._tx.size(self._file_name) - 1
@@ -557,9 +801,12 @@ class Term:
 
     _lhs: Expression
     _rhs: Expression
+    _lhs_field_name: Optional[str]
+    _rhs_field_name: Optional[str]
 
     def __init__(self, lhs: Expression, rhs: Expression) -> None:
         """Create a new term that compares two expressions for equality.
+        The field names of the expressions are kept, since the planner's estimates look them up for each term.
 
         Args:
             lhs (Expression): the LHS expression
@@ -567,6 +814,8 @@ class Term:
         """
         self._lhs = lhs
         self._rhs = rhs
+        self._lhs_field_name = lhs.as_field_name() if lhs.is_field_name() else None
+        self._rhs_field_name = rhs.as_field_name() if rhs.is_field_name() else None
 
     def is_satisfied(self, scan: Scan) -> bool:
         """Return true if both of the term's expressions evaluate to the same constant,
@@ -582,6 +831,64 @@ class Term:
         rhs_val = self._rhs.evaluate(scan)
         return lhs_val == rhs_val
 
+    def compile(self) -> Callable[[Scan], bool]:
+        """Return a function equivalent to is_satisfied, specialized for the kinds of the term's expressions,
+        which reads the values from the scan directly rather than evaluating each expression.
+
+        Returns:
+            Callable[[Scan], bool]: the function telling if the term is satisfied with respect to a scan
+        """
+        lhs_name = self._lhs_field_name
+        rhs_name = self._rhs_field_name
+        if lhs_name is not None and rhs_name is not None:
+            return lambda scan: scan.get_val(lhs_name) == scan.get_val(rhs_name)
+        if lhs_name is not None:
+            rhs_val = self._rhs.as_constant()
+            return lambda scan: scan.get_val(lhs_name) == rhs_val
+        if rhs_name is not None:
+            lhs_val = self._lhs.as_constant()
+            return lambda scan: lhs_val == scan.get_val(rhs_name)
+        lhs_val = self._lhs.as_constant()
+        rhs_val = self._rhs.as_constant()
+        try:
+            satisfied = lhs_val == rhs_val
+        except ValueError:
+            # constants of different types cannot be compared, which is an error when a record is evaluated,
+            # as with is_satisfied, rather than when the scan is built
+            return lambda scan: lhs_val == rhs_val
+        return lambda scan: satisfied
+
+    def field_and_constant(self) -> Optional[Tuple[str, Constant]]:
+        """Return the field name and the constant if the term is of the form "F=c" or "c=F", or None otherwise.
+
+        Returns:
+            Optional[Tuple[str, Constant]]: the field name and the constant it is compared with, or None
+        """
+        if self._lhs_field_name is not None and self._rhs_field_name is None:
+            return self._lhs_field_name, self._rhs.as_constant()
+        if self._rhs_field_name is not None and self._lhs_field_name is None:
+            return self._rhs_field_name, self._lhs.as_constant()
+        return None
+
+    def is_unsatisfiable(self) -> bool:
+        """Return true if the term compares two different constants, so that no record can satisfy it.
+        Constants of different types are not considered, since comparing them is an error rather than false.
+
+        Returns:
+            bool: True if the term is of the form "c1=c2" with different constants of the same type
+        """
+        if self._lhs_field_name is not None or self._rhs_field_name is not None:
+            return False
+        return _constants_differ(self._lhs.as_constant(), self._rhs.as_constant())
+
+    def compares_with_constant(self) -> bool:
+        """Return true if the term compares a field with a constant, i.e. reads a single value from each record.
+
+        Returns:
+            bool: True if exactly one of the expressions is a field name
+        """
+        return (self._lhs_field_name is None) != (self._rhs_field_name is None)
+
     def reduction_factor(self, plan: Plan) -> int:
         """Calculate the extent to which selecting on the term reduces the number of records output by a query.
         For example if the reduction factor is 2, then the term cuts the size of the output in half.
@@ -592,15 +899,13 @@ class Term:
         Returns:
             int: the integer reduction factor
         """
-        if self._lhs.is_field_name() and self._rhs.is_field_name():
-            lhs_name = self._lhs.as_field_name()
-            rhs_name = self._rhs.as_field_name()
+        lhs_name = self._lhs_field_name
+        rhs_name = self._rhs_field_name
+        if lhs_name is not None and rhs_name is not None:
             return max(plan.distinct_values(lhs_name), plan.distinct_values(rhs_name))
-        if self._lhs.is_field_name():
-            lhs_name = self._lhs.as_field_name()
+        if lhs_name is not None:
             return plan.distinct_values(lhs_name)
-        if self._rhs.is_field_name():
-            rhs_name = self._rhs.as_field_name()
+        if rhs_name is not None:
             return plan.distinct_values(rhs_name)
         if self._lhs.as_constant() == self._rhs.as_constant():
             return 1
@@ -618,9 +923,9 @@ class Term:
         Returns:
             Optional[Constant]: either the constant or None
         """
-        if self._lhs.is_field_name() and self._lhs.as_field_name() == field_name and not self._rhs.is_field_name():
+        if self._lhs_field_name == field_name and self._rhs_field_name is None:
             return self._rhs.as_constant()
-        elif self._rhs.is_field_name() and self._rhs.as_field_name() == field_name and not self._lhs.is_field_name():
+        elif self._rhs_field_name == field_name and self._lhs_field_name is None:
             return self._lhs.as_constant()
         return None
 
@@ -634,10 +939,10 @@ class Term:
         Returns:
             Optional[str]: either the field name or None
         """
-        if self._lhs.is_field_name() and self._lhs.as_field_name() == field_name and self._rhs.is_field_name():
-            return self._rhs.as_field_name()
-        elif self._rhs.is_field_name() and self._rhs.as_field_name() == field_name and self._lhs.is_field_name():
-            return self._lhs.as_field_name()
+        if self._lhs_field_name == field_name and self._rhs_field_name is not None:
+            return self._rhs_field_name
+        elif self._rhs_field_name == field_name and self._lhs_field_name is not None:
+            return self._lhs_field_name
         else:
             return None
 
@@ -657,9 +962,14 @@ class Term:
 
 
 class Predicate:
-    """A predicate is a Boolean combination of terms."""
+    """A predicate is a Boolean combination of terms.
+    A frozen predicate cannot be conjoined with another one, so that it can be shared, e.g. by the cached data of
+    a parsed statement. Its compiled function only depends on its terms, so it is still built on first use.
+    """
 
-    _terms: List[Term]
+    _terms: Tuple[Term, ...]
+    _compiled: Optional[Callable[[Scan], bool]]
+    _frozen: bool
 
     def __init__(self, term: Optional[Term] = None) -> None:
         """Create a predicate containing a single term.
@@ -667,16 +977,31 @@ class Predicate:
         Args:
             term (Term): the term
         """
-        self._terms = []
-        if term is not None:
-            self._terms.append(term)
+        self._terms = () if term is None else (term,)
+        self._compiled = None
+        self._frozen = False
 
     def conjoin_with(self, predication: "Predicate") -> None:
         """Modifies the predicate to be the conjunction of itself and the specified predicate.
         Args:
             predication (Predicate): the other predicate
+
+        Raises:
+            ValueError: if the predicate is frozen
         """
-        self._terms.extend(predication._terms)
+        if self._frozen:
+            raise ValueError("A frozen predicate cannot be modified")
+        self._terms += predication._terms
+        self._compiled = None
+
+    def freeze(self) -> "Predicate":
+        """Make the predicate immutable.
+
+        Returns:
+            Predicate: the predicate itself
+        """
+        self._frozen = True
+        return self
 
     def is_satisfied(self, scan: Scan) -> bool:
         """Returns true if the predicate evaluates to true with respect to the specified scan.
@@ -692,6 +1017,53 @@ class Predicate:
                 return False
         return True
 
+    def compile(self) -> Callable[[Scan], bool]:
+        """Return a function equivalent to is_satisfied, made of the compiled functions of the terms.
+        The terms comparing a field with a constant are checked first, since they read a single value.
+        The function is built once, and again only if the predicate is conjoined with another one.
+
+        Returns:
+            Callable[[Scan], bool]: the function telling if the predicate is satisfied with respect to a scan
+        """
+        compiled = self._compiled
+        if compiled is None:
+            terms = sorted(self._terms, key=lambda term: not term.compares_with_constant())
+            checks = [term.compile() for term in terms]
+            if not checks:
+                compiled = lambda scan: True  # noqa: E731
+            elif len(checks) == 1:
+                compiled = checks[0]
+            else:
+
+                def compiled(scan: Scan) -> bool:
+                    for check in checks:
+                        if not check(scan):
+                            return False
+                    return True
+
+            self._compiled = compiled
+        return compiled
+
+    def is_unsatisfiable(self) -> bool:
+        """Returns true if no record can satisfy the predicate, because one of its terms compares two different
+        constants, or because two of its terms equate the same field to different constants.
+
+        Returns:
+            bool: True if the predicate contradicts itself
+        """
+        constants: Dict[str, Constant] = {}
+        for term in self._terms:
+            if term.is_unsatisfiable():
+                return True
+            field_and_constant = term.field_and_constant()
+            if field_and_constant is None:
+                continue
+            field_name, constant = field_and_constant
+            other_constant = constants.setdefault(field_name, constant)
+            if _constants_differ(constant, other_constant):
+                return True
+        return False
+
     def reduction_factor(self, plan: Plan) -> int:
         """Calculate the extent to which selecting on the predicate reduces the number of records output by a query.
         For example if the reduction factor is 2, then the predicate cuts the size of the output in half.
@@ -716,13 +1088,10 @@ class Predicate:
         Returns:
             Predicate: the subpredicate applying to the schema
         """
-        result = Predicate()
-        for term in self._terms:
-            if term.applies_to(schema):
-                result._terms.append(term)
-        if len(result._terms) == 0:
+        terms = tuple(term for term in self._terms if term.applies_to(schema))
+        if len(terms) == 0:
             return None
-        return result
+        return Predicate._of(terms)
 
     def join_sub_predicate(self, schema1: Schema, schema2: Schema) -> Optional["Predicate"]:
         """Return the subpredicate consisting of terms that apply to the union of the two specified schemas,
@@ -735,16 +1104,31 @@ class Predicate:
         Returns:
             the subpredicate whose terms apply to the union of two schemas but not either schema separately
         """
-        result = Predicate()
         new_schema = Schema()
         new_schema.add_all(schema1)
         new_schema.add_all(schema2)
-        for term in self._terms:
-            if not term.applies_to(schema1) and not term.applies_to(schema2) and term.applies_to(new_schema):
-                result._terms.append(term)
-        if len(result._terms) == 0:
+        terms = tuple(
+            term
+            for term in self._terms
+            if not term.applies_to(schema1) and not term.applies_to(schema2) and term.applies_to(new_schema)
+        )
+        if len(terms) == 0:
             return None
-        return result
+        return Predicate._of(terms)
+
+    def unapplied_sub_predicate(self, schemas: Sequence[Schema]) -> "Predicate":
+        """Return the subpredicate consisting of terms that apply to none of the specified schemas separately,
+        i.e. the terms left once each schema has been selected on the subpredicate that applies to it.
+
+        Args:
+            schemas (Sequence[Schema]): the schemas
+
+        Returns:
+            Predicate: the subpredicate whose terms apply to none of the schemas separately, which may be empty
+        """
+        return Predicate._of(
+            tuple(term for term in self._terms if not any(term.applies_to(schema) for schema in schemas))
+        )
 
     def equal_with_constant(self, field_name: str) -> Optional[Constant]:
         """Determine if there is a term of the form "F=c" where F is the specified field and c is some constant.
@@ -778,19 +1162,26 @@ class Predicate:
                 return result
         return None
 
+    @staticmethod
+    def _of(terms: Tuple[Term, ...]) -> "Predicate":
+        predication = Predicate()
+        predication._terms = terms
+        return predication
+
     def __str__(self) -> str:
         if not self._terms:
             return ""
         return " and ".join(str(term) for term in self._terms)
 
 
-class SelectScan(Scan):
+class SelectScan(UpdateScan):
     """The scan class corresponding to the <i>select</i> relational algebra operator.
     All methods except next delegate their work to the underlying scan.
     """
 
     _scan: Scan
     _predication: Predicate
+    _is_satisfied: Callable[[Scan], bool]
 
     def __init__(self, scan: Scan, predication: Predicate) -> None:
         """Create a select scan having the specified underlying scan and predicate.
@@ -801,14 +1192,17 @@ class SelectScan(Scan):
         """
         self._scan = scan
         self._predication = predication
+        self._is_satisfied = predication.compile()
 
     # Scan methods
     def before_first(self) -> None:
         self._scan.before_first()
 
     def next(self) -> bool:
-        while self._scan.next():
-            if self._predication.is_satisfied(self._scan):
+        scan = self._scan
+        is_satisfied = self._is_satisfied
+        while scan.next():
+            if is_satisfied(scan):
                 return True
         return False
 
@@ -848,6 +1242,12 @@ class SelectScan(Scan):
             raise RuntimeError("Can't delete records of a non-update scan")
         self._scan.delete()
 
+    def delete_all(self) -> int:
+        # the records of a table are deleted block by block, instead of one at a time through next
+        if isinstance(self._scan, TableScan):
+            return self._scan.delete_where(self._is_satisfied)
+        return super().delete_all()
+
     def insert(self) -> None:
         if not isinstance(self._scan, UpdateScan):
             raise RuntimeError("Can't insert records of a non-update scan")
@@ -864,6 +1264,66 @@ class SelectScan(Scan):
         self._scan.move_to_rid(rid)
 
 
+class EmptyScan(UpdateScan):
+    """The scan of a query that is known to output no record, e.g. a selection on a contradictory predicate.
+    It never reads the underlying query, so it has no current record to read or modify.
+    """
+
+    _schema: Schema
+
+    def __init__(self, schema: Schema) -> None:
+        """Create an empty scan having the specified schema.
+
+        Args:
+            schema (Schema): the schema of the query
+        """
+        self._schema = schema
+
+    # Scan methods
+    def before_first(self) -> None:
+        pass
+
+    def next(self) -> bool:
+        return False
+
+    def get_int(self, field_name: str) -> int:
+        raise RuntimeError("An empty scan has no current record")
+
+    def get_string(self, field_name: str) -> str:
+        raise RuntimeError("An empty scan has no current record")
+
+    def get_val(self, field_name: str) -> Constant:
+        raise RuntimeError("An empty scan has no current record")
+
+    def has_field(self, field_name: str) -> bool:
+        return self._schema.has_field(field_name)
+
+    def close(self) -> None:
+        pass
+
+    # UpdateScan methods
+    def set_int(self, field_name: str, value: int) -> None:
+        raise RuntimeError("An empty scan has no current record")
+
+    def set_string(self, field_name: str, value: str) -> None:
+        raise RuntimeError("An empty scan has no current record")
+
+    def set_value(self, field_name: str, value: Constant) -> None:
+        raise RuntimeError("An empty scan has no current record")
+
+    def delete(self) -> None:
+        raise RuntimeError("An empty scan has no current record")
+
+    def insert(self) -> None:
+        raise RuntimeError("Can't insert records into an empty scan")
+
+    def get_rid(self) -> RID:
+        raise RuntimeError("An empty scan has no current record")
+
+    def move_to_rid(self, rid: RID) -> None:
+        raise RuntimeError("An empty scan has no current record")
+
+
 class ProjectScan(Scan):
     """The scan class corresponding to the <i>project</i> relational algebra operator.
     All methods except hasField delegate their work to the underlying scan.
@@ -1,6 +1,8 @@
+import struct
+import sys
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 
 from simpledbpy.file import BlockId, Page
 from simpledbpy.tx.transaction import Transaction
@@ -11,7 +13,7 @@ class Types(Enum):
     VARCHAR = 12
 
 
-@dataclass
+@dataclass(frozen=True)
 class FieldInfo:
     type: Types
     length: int
@@ -39,6 +41,8 @@ class Schema:
             type (Types): the type of field, according to the constants in simpledbpy.sql.types
             length (int): the conceptual length of a string field.
         """
+        # field names are interned, so the lookups of the planner and the scans are mostly identity comparisons
+        field_name = sys.intern(field_name)
         self._fields.append(field_name)
         self._info[field_name] = FieldInfo(type=type, length=length)
 
@@ -67,9 +71,12 @@ class Schema:
             field_name (str): the name of the field
             schema (Schema): the other schema
         """
-        type = schema.type(field_name)
-        length = schema.length(field_name)
-        self.add_field(field_name, type, length)
+        # the field info is shared with the other schema rather than copied, since it is immutable
+        field_info = schema._info.get(field_name)
+        assert field_info is not None
+        field_name = sys.intern(field_name)
+        self._fields.append(field_name)
+        self._info[field_name] = field_info
 
     def add_all(self, schema: "Schema") -> None:
         """Add all of the fields in the specified schema to the current schema.
@@ -77,8 +84,8 @@ class Schema:
         Args:
             schema (Schema): _description_
         """
-        for field_name in schema.fields:
-            self.add(field_name, schema)
+        self._fields.extend(schema._fields)
+        self._info.update(schema._info)
 
     @property
     def fields(self) -> List[str]:
@@ -278,6 +285,21 @@ class RecordPage:
     def delete(self, slot: int) -> None:
         self._set_flag(slot, self.EMPTY)
 
+    def delete_records(self, slots: Sequence[int]) -> None:
+        """Delete the records of the specified slots, as consecutive calls of delete would.
+        The flags of each run of consecutive slots are set in a copy of the bytes the run spans, which is then
+        stored with a single update, so that they are logged together instead of one log record per slot,
+        and the records between the runs are not logged.
+
+        Args:
+            slots (Sequence[int]): the used slot numbers, in ascending order
+        """
+        run_start = 0
+        for i in range(1, len(slots) + 1):
+            if i == len(slots) or slots[i] != slots[i - 1] + 1:
+                self._delete_run(slots[run_start], slots[i - 1])
+                run_start = i
+
     def format(self) -> None:
         """Use the layout to format a new block of records.
         These values should not be logged because the old values are meaningless.
@@ -295,15 +317,102 @@ class RecordPage:
                     self._tx.set_string(self._block_id, field_position, "", False)
             slot += 1
 
+    def num_used_slots(self) -> int:
+        """Return the number of slots in the block that hold a record.
+        The flags are big-endian integers that are either EMPTY or USED, so the method counts the USED values
+        among the last bytes of the flags, which it takes from the block's contents with a single strided slice.
+
+        Returns:
+            int: the number of used slots
+        """
+        slot_size = self._layout.slot_size
+        end = self._offset(self._tx.block_size // slot_size)
+        view = self._tx.read_view(self._block_id)
+        last_flag_byte = 3  # the flags are 4-byte integers
+        return bytes(view[last_flag_byte:end:slot_size]).count(self.USED)
+
     def next_after(self, slot: int) -> int:
         return self._search_after(slot, self.USED)
 
+    def next_matching_after(self, slot: int, field_name: str, value: int | str) -> int:
+        """Return the next used slot after the specified slot whose field holds the specified value.
+        The value is encoded as it is stored in a record, and its bytes are searched for in the block's contents,
+        so that the records are compared by bytes.find instead of being read one at a time.
+        A hit only counts if it is at the position of the field in a used slot;
+        otherwise the search resumes at the field of the next slot.
+
+        Args:
+            slot (int): the slot number to search after, or -1 to search from the start of the block
+            field_name (str): the name of the field
+            value (int | str): the value to look for
+
+        Returns:
+            int: the matching slot number, or -1 if no later slot in the block matches
+        """
+        try:
+            if isinstance(value, int):
+                target = struct.pack(Page.FORMAT, value)
+            else:
+                encoded = value.encode(Page.CHARSET)
+                target = struct.pack(Page.FORMAT, len(encoded)) + encoded
+        except (struct.error, UnicodeEncodeError):
+            return -1  # a value that cannot be stored matches no record
+        slot_size = self._layout.slot_size
+        field_offset = self._layout.offset(field_name)
+        end = self._offset(self._tx.block_size // slot_size)
+        contents = bytes(self._tx.read_view(self._block_id)[:end])
+        last_flag_byte = 3  # the flags are 4-byte big-endian integers that are either EMPTY or USED
+        position = contents.find(target, self._offset(slot + 1) + field_offset)
+        while position >= 0:
+            record_offset = position - field_offset
+            next_slot = record_offset // slot_size + 1
+            if record_offset % slot_size == 0 and contents[record_offset + last_flag_byte] == self.USED:
+                return next_slot - 1
+            position = contents.find(target, self._offset(next_slot) + field_offset)
+        return -1
+
     def insert_after(self, slot: int) -> int:
         new_slot = self._search_after(slot, self.EMPTY)
         if new_slot >= 0:
             self._set_flag(new_slot, self.USED)
         return new_slot
 
+    def insert_records_after(self, slot: int, records: Sequence[Dict[str, int | str]]) -> List[int]:
+        """Insert records into the empty slots after the specified slot, as many as fit in the block.
+        The records are built in a copy of the bytes they span, which is then stored with a single update,
+        so that they are logged together instead of one log record per field.
+
+        Args:
+            slot (int): the slot number to insert after, or -1 to insert from the start of the block
+            records (Sequence[Dict[str, int | str]]): the field values of each record
+
+        Returns:
+            List[int]: the slots of the inserted records, empty if the block has no empty slot after the specified one
+        """
+        slots: List[int] = []
+        slot = self._search_after(slot, self.EMPTY)
+        while slot >= 0 and len(slots) < len(records):
+            slots.append(slot)
+            slot = self._search_after(slot, self.EMPTY)
+        if not slots:
+            return slots
+        start = self._offset(slots[0])
+        end = self._offset(slots[-1] + 1)
+        region = bytearray(self._tx.read_view(self._block_id)[start:end])
+        page = Page(region)
+        # the bound methods are looked up once, since they are called for every field of every record
+        set_int, set_string, field_offset = page.set_int, page.set_string, self._layout.offset
+        for slot, record in zip(slots, records):
+            position = self._offset(slot) - start
+            set_int(position, self.USED)
+            for field_name, value in record.items():
+                if isinstance(value, int):
+                    set_int(position + field_offset(field_name), value)
+                else:
+                    set_string(position + field_offset(field_name), value)
+        self._tx.set_bytes(self._block_id, start, region, True)
+        return slots
+
     @property
     def block_id(self) -> BlockId:
         return self._block_id
@@ -318,6 +427,15 @@ class RecordPage:
 
         self._tx.set_int(self._block_id, self._offset(slot), flag, True)
 
+    def _delete_run(self, first_slot: int, last_slot: int) -> None:
+        start = self._offset(first_slot)
+        end = self._offset(last_slot) + 4  # Integer.BYTES of the flag
+        region = bytearray(self._tx.read_view(self._block_id)[start:end])
+        page = Page(region)
+        for slot in range(first_slot, last_slot + 1):
+            page.set_int(self._offset(slot) - start, self.EMPTY)
+        self._tx.set_bytes(self._block_id, start, region, True)
+
     def _search_after(self, slot: int, flag: int) -> int:
         slot += 1
         while self._is_valid_slot(slot):
@@ -1,6 +1,6 @@
 import time
 from threading import Condition
-from typing import Dict
+from typing import Dict, List
 
 from simpledbpy.file import BlockId
 
@@ -12,27 +12,30 @@ class LockAbortError(RuntimeError):
 class LockTable:
     """The lock table, which provides methods to lock and unlock blocks.
     If a transaction requests a lock that causes a conflict with an existing lock,
-    then that transaction is placed on a wait list. There is only one wait list for all blocks.
-    When the last lock on a block is unlocked, then all transactions are removed from the wait list and rescheduled.
-    If one of those transactions discovers that the lock it is waiting for is still locked,
+    then that transaction is placed on a wait list.
+    The blocks are spread over a fixed number of stripes by their hash, and each stripe has its own wait list,
+    so that transactions working on unrelated blocks (e.g. different index buckets) do not contend for one mutex.
+    When the last lock on a block is unlocked, then all transactions are removed from the stripe's wait list
+    and rescheduled. If one of those transactions discovers that the lock it is waiting for is still locked,
     it will place itself back on the wait list.
 
     Attributes:
-        _locks (Dict[BlockId, int]): The locks held on each block.
+        _locks (List[Dict[BlockId, int]]): The locks held on each block, per stripe.
         The positive integer value represents the number of slocks held on that block.
         if the value is -1, then an xlock is held on that block.
-        _cv (Condition): The condition variable for the lock table.
+        _cvs (List[Condition]): The condition variable of each stripe.
 
     """
 
     MAX_TIME = 10
+    NUM_STRIPES = 64
 
-    _locks: Dict[BlockId, int]
-    _cv: Condition
+    _locks: List[Dict[BlockId, int]]
+    _cvs: List[Condition]
 
     def __init__(self) -> None:
-        self._locks = {}
-        self._cv = Condition()
+        self._locks = [{} for _ in range(self.NUM_STRIPES)]
+        self._cvs = [Condition() for _ in range(self.NUM_STRIPES)]
 
     def slock(self, block_id: BlockId) -> None:
         """Grant an SLock on the specified block. If an XLock exists when the method is called,
@@ -46,15 +49,17 @@ class LockTable:
         Raises:
             LockAbortError: If the lock cannot be granted.
         """
-        with self._cv:
+        stripe = self._stripe(block_id)
+        cv = self._cvs[stripe]
+        with cv:
             try:
                 timestamp = time.time()
                 while self._has_xlock(block_id) and not self._waiting_too_long(timestamp):
-                    self._cv.wait(self.MAX_TIME)
+                    cv.wait(self.MAX_TIME)
                 if self._has_xlock(block_id):
                     raise LockAbortError()
                 val = self._get_lock_val(block_id)
-                self._locks[block_id] = val + 1
+                self._locks[stripe][block_id] = val + 1
             except InterruptedError:
                 raise LockAbortError()
 
@@ -70,14 +75,16 @@ class LockTable:
         Raises:
             LockAbortError: If the lock cannot be granted.
         """
-        with self._cv:
+        stripe = self._stripe(block_id)
+        cv = self._cvs[stripe]
+        with cv:
             try:
                 timestamp = time.time()
                 while self._has_other_slocks(block_id) and not self._waiting_too_long(timestamp):
-                    self._cv.wait(self.MAX_TIME)
+                    cv.wait(self.MAX_TIME)
                 if self._has_other_slocks(block_id):
                     raise LockAbortError()
-                self._locks[block_id] = -1
+                self._locks[stripe][block_id] = -1
             except InterruptedError:
                 raise LockAbortError()
 
@@ -88,13 +95,15 @@ class LockTable:
         Args:
             block_id (BlockId): The block to be unlocked.
         """
-        with self._cv:
+        stripe = self._stripe(block_id)
+        cv = self._cvs[stripe]
+        with cv:
             val = self._get_lock_val(block_id)
             if val > 1:
-                self._locks[block_id] = val - 1
+                self._locks[stripe][block_id] = val - 1
             else:
-                del self._locks[block_id]
-                self._cv.notify_all()
+                del self._locks[stripe][block_id]
+                cv.notify_all()
 
     def _has_xlock(self, block_id: BlockId) -> bool:
         return self._get_lock_val(block_id) < 0
@@ -105,8 +114,11 @@ class LockTable:
     def _waiting_too_long(self, start_time: float) -> bool:
         return time.time() - start_time > self.MAX_TIME
 
+    def _stripe(self, block_id: BlockId) -> int:
+        return hash(block_id) % self.NUM_STRIPES
+
     def _get_lock_val(self, block_id: BlockId) -> int:
-        ival = self._locks.get(block_id)
+        ival = self._locks[self._stripe(block_id)].get(block_id)
         if ival is None:
             return 0
         return ival
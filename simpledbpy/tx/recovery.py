@@ -19,6 +19,7 @@ class LogType(Enum):
     ROLLBACK = 3
     SETINT = 4
     SETSTRING = 5
+    SETBYTES = 6
 
 
 class LogRecord(ABC):
@@ -45,7 +46,8 @@ class LogRecord(ABC):
     @abstractmethod
     def undo(self, tx: Transaction) -> None:
         """Undoes the operation encoded by this log record.
-        The only log record types for which this method does anything interesting are SETINT and SETSTRING.
+        The only log record types for which this method does anything interesting are SETINT, SETSTRING
+        and SETBYTES.
 
         Args:
             tx (Transaction): the transaction that the log record is undoing
@@ -69,6 +71,8 @@ class LogRecord(ABC):
             return SetIntRecord(page)
         elif record_type == LogType.SETSTRING.value:
             return SetStringRecord(page)
+        elif record_type == LogType.SETBYTES.value:
+            return SetBytesRecord(page)
         else:
             return None
 
@@ -424,6 +428,106 @@ class SetStringRecord(LogRecord):
         return log_manager.append(page.contents())
 
 
+class SetBytesRecord(LogRecord):
+    _txnum: int
+    _offset: int
+    _value: bytes
+    _block_id: BlockId
+
+    def __init__(self, page: Page) -> None:
+        """Create a new setbytes log record.
+
+        Args:
+            page (Page): the page containing the log values.
+            The format of the log record in the page is as follows:
+                0: the transaction id
+                4: file_name
+                4 + file_name.length: block number
+                8 + file_name.length: offset
+                12 + file_name.length: the previous bytes of the range
+        """
+        txnum_position = 4  # Integer.BYTES
+        self._txnum = page.get_int(txnum_position)
+        file_name_position = txnum_position + 4  # Integer.BYTES
+        file_name = page.get_string(file_name_position)
+        block_number_position = file_name_position + Page.max_length(len(file_name))
+        block_number = page.get_int(block_number_position)
+        self._block_id = BlockId(file_name, block_number)
+        offset_position = block_number_position + 4  # Integer.BYTES
+        self._offset = page.get_int(offset_position)
+        value_position = offset_position + 4  # Integer.BYTES
+        self._value = page.get_bytes(value_position)
+
+    def op(self) -> LogType:
+        return LogType.SETBYTES
+
+    def tx_number(self) -> int:
+        return self._txnum
+
+    def __str__(self) -> str:
+        return f"<SETBYTES {self._txnum} {self._block_id} {self._offset} {len(self._value)}>"
+
+    def undo(self, tx: Transaction) -> None:
+        """Replace the specified range of bytes with the bytes saved in the log record.
+        The method pins a buffer to the specified block, calls set_bytes to restore the saved bytes,
+        and unpins the buffer.
+
+        Args:
+            tx (Transaction): the transaction that the log record is undoing
+        """
+        tx.pin(self._block_id)
+        tx.set_bytes(self._block_id, self._offset, self._value, False)
+        tx.unpin(self._block_id)
+
+    @staticmethod
+    def max_value_size(block_size: int, block_id: BlockId) -> int:
+        """Return the largest range of bytes of the specified block that fits in a single setbytes record.
+
+        Args:
+            block_size (int): the size of the log blocks
+            block_id (BlockId): the block containing the range
+
+        Returns:
+            int: the maximum number of bytes
+        """
+        # the log page starts with the boundary, and the log manager writes the record size before the record
+        value_position = 4 + 4 + Page.max_length(len(block_id.file_name)) + 4 + 4
+        return block_size - 4 - 4 - value_position - 4
+
+    @staticmethod
+    def write_to_log(
+        log_manager: LogManager, txnum: int, block_id: BlockId, offset: int, value: bytes | memoryview
+    ) -> int:
+        """A static method to write a setbytes record to the log.
+        This log record contains the SETBYTES operator, followed by the transaction id, the file_name, number,
+        and offset of the modified block, and the previous bytes of the range starting at that offset.
+
+        Args:
+            log_manager (LogManager): the log manager
+            txnum (int): the transaction id
+            block_id (BlockId): the block containing the range
+            offset (int): the offset of the range
+            value (bytes | memoryview): the previous bytes
+
+        Returns:
+            int: the LSN of the last log value
+        """
+        txnum_position = 4  # Integer.BYTES
+        file_name_position = txnum_position + 4  # Integer.BYTES
+        block_number_position = file_name_position + Page.max_length(len(block_id.file_name))
+        offset_position = block_number_position + 4  # Integer.BYTES
+        value_position = offset_position + 4  # Integer.BYTES
+        record_size = value_position + 4 + len(value)  # Integer.BYTES for the length
+        page = Page(record_size)
+        page.set_int(0, LogType.SETBYTES.value)
+        page.set_int(txnum_position, txnum)
+        page.set_string(file_name_position, block_id.file_name)
+        page.set_int(block_number_position, block_id.block_number)
+        page.set_int(offset_position, offset)
+        page.set_bytes(value_position, value)
+        return log_manager.append(page.contents())
+
+
 class RecoveryManager:
     """The recovery manager. Each transaction has its own recovery manager."""
 
@@ -503,6 +607,30 @@ class RecoveryManager:
         lsn = SetStringRecord.write_to_log(self._log_manager, self._txnum, block_id, offset, old_value)
         return lsn
 
+    def set_bytes(self, buffer: Buffer, offset: int, new_value: bytes | bytearray) -> int:
+        """Write setbytes records to the log and return the lsn of the last one.
+        A range too large for a single log record is logged in several records.
+
+        Args:
+            buffer (Buffer): the buffer containing the page
+            offset (int): the ofset of the range in the page
+            new_value (bytes | bytearray): the bytes to be written
+
+        Returns:
+            int: the LSN of the last log value
+        """
+        block_id = buffer.block_id
+        assert block_id is not None
+        contents = buffer.contents.contents()
+        # the log blocks have the same size as the data blocks
+        max_value_size = SetBytesRecord.max_value_size(len(contents), block_id)
+        end = offset + len(new_value)
+        lsn = -1
+        for start in range(offset, end, max_value_size):
+            old_value = contents[start : min(start + max_value_size, end)]
+            lsn = SetBytesRecord.write_to_log(self._log_manager, self._txnum, block_id, start, old_value)
+        return lsn
+
     def _do_rollback(self) -> None:
         """Rollback the transaction, by iterating through the log records until it finds the transaction's START record,
         calling undo() for each of the transaction's log records.
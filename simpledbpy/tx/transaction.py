@@ -1,4 +1,5 @@
 from threading import Lock
+from typing import Callable, List
 
 from simpledbpy.buffer import Buffer, BufferManager
 from simpledbpy.file import BlockId, FileManager
@@ -81,8 +82,11 @@ class Transaction:
     _concurrency_manager: ConcurrencyManager
     _buffer_manager: BufferManager
     _file_manager: FileManager
+    _log_manager: LogManager
     _txnum: int
     _my_buffers: BufferList
+    _rollback_actions: List[Callable[[], None]]
+    _commit_actions: List[Callable[[], None]]
 
     def __init__(self, file_manager: FileManager, log_manager: LogManager, buffer_manager: BufferManager) -> None:
         """Create a new transaction and its associated recovery and concurrency managers.
@@ -95,33 +99,64 @@ class Transaction:
             buffer_manager (BufferManager): buffer manager
         """
         self._file_manager = file_manager
+        self._log_manager = log_manager
         self._buffer_manager = buffer_manager
         self._txnum = self._next_tx_number()
         self._recovery_manager = RecoveryManager(self, self._txnum, log_manager, self._buffer_manager)
         self._concurrency_manager = ConcurrencyManager()
         self._my_buffers = BufferList(self._buffer_manager)
+        self._rollback_actions = []
+        self._commit_actions = []
 
     def commit(self) -> None:
         """Commit the current transaction.
         Flush all modified buffers (and their log records),
         write and flush a commit record to the log,
         release all locks, and unpin any pinned buffers.
+        Finally, run the actions registered with on_commit.
         """
         self._recovery_manager.commit()
         print(f"Transaction {self._txnum} committed")
         self._concurrency_manager.release()
         self._my_buffers.unpin_all()
+        self._rollback_actions.clear()
+        for action in self._commit_actions:
+            action()
+        self._commit_actions.clear()
 
     def rollback(self) -> None:
         """Rollback the current transaction.
         Undo any modified values, flush those buffers,
         write and flush a rollback record to the log,
         release all locks, and unpin any pinned buffers.
+        Finally, run the actions registered with on_rollback.
         """
         self._recovery_manager.rollback()
         print(f"Transaction {self._txnum} rolled back")
         self._concurrency_manager.release()
         self._my_buffers.unpin_all()
+        for action in reversed(self._rollback_actions):
+            action()
+        self._rollback_actions.clear()
+        self._commit_actions.clear()
+
+    def on_rollback(self, action: Callable[[], None]) -> None:
+        """Register an action to run if the transaction is rolled back, e.g. to undo a change to an in-memory cache.
+        The actions run in the reverse order of their registration, and are dropped when the transaction commits.
+
+        Args:
+            action (Callable[[], None]): the action
+        """
+        self._rollback_actions.append(action)
+
+    def on_commit(self, action: Callable[[], None]) -> None:
+        """Register an action to run once the transaction is committed, e.g. to publish a change to an in-memory cache.
+        The actions run in the order of their registration, and are dropped when the transaction is rolled back.
+
+        Args:
+            action (Callable[[], None]): the action
+        """
+        self._commit_actions.append(action)
 
     def recover(self) -> None:
         """Flush all modified buffers.
@@ -132,6 +167,15 @@ class Transaction:
         self._buffer_manager.flush_all(self._txnum)
         self._recovery_manager.recover()
 
+    def new_transaction(self) -> "Transaction":
+        """Create another transaction on the same file, log, and buffer managers,
+        e.g. for work done on behalf of the database rather than of this transaction's client.
+
+        Returns:
+            Transaction: the new transaction
+        """
+        return Transaction(self._file_manager, self._log_manager, self._buffer_manager)
+
     def pin(self, block_id: BlockId) -> None:
         """Pin the specified block. The transaction manages the buffer for the client.
 
@@ -178,6 +222,20 @@ class Transaction:
         buffer = self._my_buffers.get_buffer(block_id)
         return buffer.contents.get_string(offset)
 
+    def read_view(self, block_id: BlockId) -> memoryview:
+        """Return a read-only view of the contents of the specified block, for reading many values at once.
+        The method first obtains an SLock on the block, which the transaction keeps until it completes.
+
+        Args:
+            block_id (BlockId): a reference to the disk block
+
+        Returns:
+            memoryview: the contents of the block
+        """
+        self._concurrency_manager.slock(block_id)
+        buffer = self._my_buffers.get_buffer(block_id)
+        return buffer.contents.contents().toreadonly()
+
     def set_int(self, block_id: BlockId, offset: int, value: int, ok_to_log: bool) -> None:
         """Store an integer at the specified offset of the specified block.
         The method first obtains an XLock on the block. It then reads the current value at that offset,
@@ -220,6 +278,26 @@ class Transaction:
         page.set_string(offset, value)
         buffer.set_modified(self._txnum, lsn)
 
+    def set_bytes(self, block_id: BlockId, offset: int, value: bytes | bytearray, ok_to_log: bool) -> None:
+        """Store a range of raw bytes at the specified offset of the specified block, e.g. several records at once.
+        The method first obtains an XLock on the block. It then puts the current bytes of the range into
+        update log records, and writes them to the log.
+        Finally, it copies the bytes into the buffer, passing in the LSN of the log record and the transaction's id.
+
+        Args:
+            block_id (BlockId): a reference to the disk block
+            offset (int): the byte offset within the block
+            value (bytes | bytearray): the bytes to be stored
+            ok_to_log (bool): a flag indicating whether or not the update should be logged
+        """
+        self._concurrency_manager.xlock(block_id)
+        buffer = self._my_buffers.get_buffer(block_id)
+        lsn = -1
+        if ok_to_log:
+            lsn = self._recovery_manager.set_bytes(buffer, offset, value)
+        buffer.contents.contents()[offset : offset + len(value)] = value
+        buffer.set_modified(self._txnum, lsn)
+
     def size(self, file_name: str) -> int:
         """Return the number of blocks in the specified file.
         This method first obtains an SLock on the "end of the file",
@@ -253,6 +331,10 @@ class Transaction:
     def block_size(self) -> int:
         return self._file_manager.block_size
 
+    @property
+    def file_manager(self) -> FileManager:
+        return self._file_manager
+
     @property
     def available_buffers(self) -> int:
         return self._buffer_manager.available
@@ -1,10 +1,11 @@
+import threading
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, patch
 
 from simpledbpy.buffer import Buffer, BufferAbortError, BufferManager
-from simpledbpy.file import BlockId, FileManager
+from simpledbpy.file import BlockId, FileManager, Page
 from simpledbpy.log import LogManager
 
 
@@ -98,6 +99,41 @@ class TestBufferManager(unittest.TestCase):
         self.assertFalse(buffer.is_pinned())
         self.assertEqual(self.buffer_manager._num_available, self.num_buffers)
 
+    def test_pin_resident_block(self) -> None:
+        block_id = BlockId("testfile", 1)
+        buffer1 = self.buffer_manager.pin(block_id)
+        self.buffer_manager.unpin(buffer1)
+        buffer2 = self.buffer_manager.pin(BlockId("testfile", 1))
+        self.assertIs(buffer1, buffer2)
+        self.assertIs(self.buffer_manager._residency[block_id], buffer2)
+        self.assertNotIn(buffer2, self.buffer_manager._free_list)
+        self.assertEqual(self.buffer_manager._num_available, self.num_buffers - 1)
+
+    def test_unpin_shared_buffer(self) -> None:
+        block_id = BlockId("testfile", 1)
+        buffer = self.buffer_manager.pin(block_id)
+        self.buffer_manager.pin(block_id)
+        self.buffer_manager.unpin(buffer)
+        self.assertTrue(buffer.is_pinned())
+        self.assertNotIn(buffer, self.buffer_manager._free_list)
+        self.assertEqual(self.buffer_manager._num_available, self.num_buffers - 1)
+
+        self.buffer_manager.unpin(buffer)
+        self.assertFalse(buffer.is_pinned())
+        self.assertIn(buffer, self.buffer_manager._free_list)
+        self.assertEqual(self.buffer_manager._num_available, self.num_buffers)
+
+    def test_replace_least_recently_used_buffer(self) -> None:
+        buffers = [self.buffer_manager.pin(BlockId("testfile", i)) for i in range(self.num_buffers)]
+        for buffer in buffers:
+            self.buffer_manager.unpin(buffer)
+
+        # block 0 was released first, so it is the one replaced
+        buffer = self.buffer_manager.pin(BlockId("testfile", self.num_buffers))
+        self.assertIs(buffer, buffers[0])
+        self.assertNotIn(BlockId("testfile", 0), self.buffer_manager._residency)
+        self.assertIn(BlockId("testfile", 1), self.buffer_manager._residency)
+
     def test_flush_all_buffers(self) -> None:
         buffers = []
         for i in range(self.num_buffers):
@@ -107,9 +143,31 @@ class TestBufferManager(unittest.TestCase):
             buffers.append(self.buffer_manager.pin(block_id))
         for i, buffer in enumerate(buffers):
             buffer.set_modified(txnum=1, lsn=i)
-        with patch.object(Buffer, "flush", autospec=True) as mock_flush:
+        with patch.object(FileManager, "write_run", autospec=True) as mock_write_run:
             self.buffer_manager.flush_all(1)
-            self.assertEqual(mock_flush.call_count, self.num_buffers)
+            # the consecutive blocks are written as a single run
+            mock_write_run.assert_called_once_with(
+                self.file_manager, "testfile", 0, [buffer.contents for buffer in buffers]
+            )
+        for buffer in buffers:
+            self.assertEqual(buffer.modifying_txnum, -1)
+
+    def test_flush_all_writes_runs(self) -> None:
+        block_numbers = [4, 0, 1, 5, 2, 9]
+        buffer_manager = BufferManager(self.file_manager, self.log_manager, len(block_numbers))
+        for block_number in block_numbers:
+            buffer = buffer_manager.pin(BlockId("testfile", block_number))
+            buffer.contents.set_int(0, block_number)
+            buffer.set_modified(txnum=1, lsn=-1)
+        with patch.object(FileManager, "write_run", autospec=True, side_effect=FileManager.write_run) as mock_write_run:
+            buffer_manager.flush_all(1)
+            runs = [(call.args[2], len(call.args[3])) for call in mock_write_run.call_args_list]
+            self.assertEqual(runs, [(0, 3), (4, 2), (9, 1)])
+
+        page = Page(self.block_size)
+        for block_number in block_numbers:
+            self.file_manager.read(BlockId("testfile", block_number), page)
+            self.assertEqual(page.get_int(0), block_number)
 
     def test_pin_when_all_buffers_busy(self) -> None:
         blocks = [MagicMock(spec=BlockId) for _ in range(self.num_buffers)]
@@ -118,5 +176,14 @@ class TestBufferManager(unittest.TestCase):
             block.block_number = i
             self.buffer_manager.pin(block)
         new_block = MagicMock(spec=BlockId)
-        with self.assertRaises(BufferAbortError):
+        with patch.object(BufferManager, "MAX_TIME", 0.1), self.assertRaises(BufferAbortError):
             self.buffer_manager.pin(new_block)
+
+    def test_pin_waits_for_unpinned_buffer(self) -> None:
+        buffers = [self.buffer_manager.pin(BlockId("testfile", i)) for i in range(self.num_buffers)]
+        timer = threading.Timer(0.1, self.buffer_manager.unpin, args=(buffers[0],))
+        timer.start()
+        buffer = self.buffer_manager.pin(BlockId("testfile", self.num_buffers))
+        timer.join()
+        self.assertIs(buffer, buffers[0])
+        self.assertEqual(buffer.block_id, BlockId("testfile", self.num_buffers))
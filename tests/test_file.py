@@ -1,7 +1,9 @@
+import gc
 import struct
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from simpledbpy.file import BlockId, FileManager, Page
 
@@ -36,6 +38,18 @@ class TestPage(unittest.TestCase):
         result = self.page.get_string(0)
         self.assertEqual(result, test_string)
 
+    def test_page_from_bytes_is_copied(self) -> None:
+        b = bytes(100)
+        page = Page(b)
+        page.set_int(0, 1)
+        self.assertEqual(b, bytes(100))
+
+    def test_page_from_bytearray_is_shared(self) -> None:
+        b = bytearray(100)
+        page = Page(b)
+        page.set_int(0, 1)
+        self.assertEqual(b[0:4], struct.pack(Page.FORMAT, 1))
+
     def test_max_length(self) -> None:
         strlen = 10
         expected_length = 4 + strlen
@@ -57,6 +71,10 @@ class TestPage(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.page.get_int(100)
 
+    def test_get_int_straddling_end(self) -> None:
+        with self.assertRaises(ValueError):
+            self.page.get_int(98)
+
     def test_set_bytes_out_of_bounds(self) -> None:
         test_bytes = b"\x01\x02\x03\x04"
         with self.assertRaises(ValueError):
@@ -95,6 +113,57 @@ class TestFileManager(unittest.TestCase):
         length_after_append = self.file_manager.length(file_name)
         self.assertEqual(length_after_append, 1)
 
+    def test_length_after_write_past_end(self) -> None:
+        file_name = "testfile"
+        self.file_manager.append(file_name)
+        self.file_manager.write(BlockId(file_name, 3), Page(self.block_size))
+        self.assertEqual(self.file_manager.length(file_name), 4)
+        self.assertEqual(self.file_manager.append(file_name), BlockId(file_name, 4))
+
+        # the cached length matches the size of the file on disk
+        file_manager = FileManager(self.db_directory, self.block_size)
+        self.assertEqual(file_manager.length(file_name), 5)
+
+    def test_append_from(self) -> None:
+        src_block = self.file_manager.append("srcfile")
+        page = Page(self.block_size)
+        page.set_string(0, "hello")
+        page.set_int(self.block_size - 4, 12345678)
+        self.file_manager.write(src_block, page)
+        self.file_manager.append("dstfile")
+
+        block_id = self.file_manager.append_from(src_block, "dstfile")
+        self.assertEqual(block_id, BlockId("dstfile", 1))
+        self.assertEqual(self.file_manager.length("dstfile"), 2)
+        read_page = Page(self.block_size)
+        self.file_manager.read(block_id, read_page)
+        self.assertEqual(page.contents(), read_page.contents())
+
+    def test_append_from_past_end_of_file(self) -> None:
+        block_id = self.file_manager.append_from(BlockId("srcfile", 3), "dstfile")
+        self.assertEqual(block_id, BlockId("dstfile", 0))
+        self.assertEqual(self.file_manager.length("dstfile"), 1)
+        read_page = Page(self.block_size)
+        self.file_manager.read(block_id, read_page)
+        self.assertEqual(read_page.contents(), bytes(self.block_size))
+
+    def test_failed_init(self) -> None:
+        not_a_directory = self.db_directory / "file"
+        not_a_directory.touch()
+        with patch("sys.unraisablehook") as unraisablehook:
+            with self.assertRaises(NotADirectoryError):
+                FileManager(not_a_directory, self.block_size)
+            gc.collect()
+        unraisablehook.assert_not_called()
+
+    def test_hint_access(self) -> None:
+        block_id = self.file_manager.append("testfile")
+        self.file_manager.hint_access("testfile", sequential=True)
+        self.file_manager.hint_access("testfile", sequential=False)
+        page = Page(self.block_size)
+        self.file_manager.read(block_id, page)
+        self.assertEqual(page.contents(), bytes(self.block_size))
+
     def test_write_and_read(self) -> None:
         file_name = "testfile"
         block_id = self.file_manager.append(file_name)
@@ -113,7 +182,7 @@ class TestFileManager(unittest.TestCase):
     def test_concurrent_access(self) -> None:
         from concurrent.futures import ThreadPoolExecutor
 
-        def write_and_read_concurrently(block_id: BlockId, data: bytearray) -> bytearray:
+        def write_and_read_concurrently(block_id: BlockId, data: bytearray) -> memoryview:
             page = Page(self.block_size)
             page.contents()[:] = data
             self.file_manager.write(block_id, page)
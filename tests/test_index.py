@@ -0,0 +1,196 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from simpledbpy.buffer import BufferManager
+from simpledbpy.file import FileManager
+from simpledbpy.index import HashIndex
+from simpledbpy.log import LogManager
+from simpledbpy.query import RID, Constant, TableScan
+from simpledbpy.record import Layout, Schema
+from simpledbpy.tx.transaction import Transaction
+
+
+class TestHashIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.db_directory = Path(self.tmp_dir.name)
+        self.block_size = 400
+        self.file_manager = FileManager(self.db_directory, self.block_size)
+        self.log_manager = LogManager(self.file_manager, "simpledb.log")
+        self.num_buffers = 8
+        self.buffer_manager = BufferManager(self.file_manager, self.log_manager, self.num_buffers)
+
+        schema = Schema()
+        schema.add_int_field("block")
+        schema.add_int_field("id")
+        schema.add_int_field("dataval")
+        self.layout = Layout(schema)
+
+    def test_insert_and_delete(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = HashIndex(tx, "idx", self.layout)
+        for i in range(10):
+            index.insert(Constant(i % 2), RID(i, 0))
+
+        index.before_first(Constant(1))
+        rids = []
+        while index.next():
+            rids.append(index.get_data_rid())
+        self.assertEqual([RID(i, 0) for i in range(1, 10, 2)], rids)
+
+        index.delete(Constant(1), RID(3, 0))
+        index.before_first(Constant(1))
+        rids = []
+        while index.next():
+            rids.append(index.get_data_rid())
+        self.assertEqual([RID(1, 0), RID(5, 0), RID(7, 0), RID(9, 0)], rids)
+
+        index.close()
+        tx.commit()
+
+    def test_string_search_key_with_fingerprint(self) -> None:
+        schema = Schema()
+        schema.add_int_field("block")
+        schema.add_int_field("id")
+        schema.add_string_field("dataval", 9)
+        schema.add_int_field("fingerprint")
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = HashIndex(tx, "fpidx", Layout(schema))
+        for i in range(30):
+            index.insert(Constant(f"rec{i % 3}"), RID(i, 0))
+
+        index.before_first(Constant("rec2"))
+        rids = []
+        with patch.object(TableScan, "get_string", autospec=True, side_effect=TableScan.get_string) as get_string:
+            while index.next():
+                rids.append(index.get_data_rid())
+        self.assertEqual([RID(i, 0) for i in range(2, 30, 3)], rids)
+        # only the records whose fingerprint matches are read
+        self.assertEqual(len(rids), get_string.call_count)
+
+        index.close()
+        tx.commit()
+
+    def test_bucket_filter_skips_missing_keys(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = HashIndex(tx, "idx", self.layout)
+        for i in range(20):
+            index.insert(Constant(1 + i * HashIndex.NUM_BUCKETS), RID(i, 0))
+        missing_key = Constant(1 + 100 * HashIndex.NUM_BUCKETS)
+
+        # the first probe of the bucket reads its records, the next ones build and use the filter
+        index.before_first(Constant(1))
+        self.assertTrue(index.next())
+        index.before_first(Constant(1))
+        self.assertTrue(index.next())
+        with patch.object(TableScan, "next_matching", autospec=True) as next_matching:
+            index.before_first(missing_key)
+            self.assertFalse(index.next())
+        next_matching.assert_not_called()
+
+        # inserted values are added to the filter
+        index.insert(missing_key, RID(100, 0))
+        index.before_first(missing_key)
+        self.assertTrue(index.next())
+        self.assertEqual(RID(100, 0), index.get_data_rid())
+
+        index.close()
+        tx.commit()
+
+    def test_bucket_filter_is_shared(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index1 = HashIndex(tx, "idx", self.layout)
+        index2 = HashIndex(tx, "idx", self.layout)
+        key = Constant(1 + 7 * HashIndex.NUM_BUCKETS)
+        index1.insert(Constant(1), RID(0, 0))
+        index1.before_first(Constant(1))
+        index1.before_first(Constant(1))  # builds the filter of the bucket
+
+        # a value inserted into the bucket through another instance is added to the filter
+        index2.insert(key, RID(1, 0))
+        index1.before_first(key)
+        self.assertTrue(index1.next())
+        self.assertEqual(RID(1, 0), index1.get_data_rid())
+        index2.before_first(key)
+        self.assertTrue(index2.next())
+
+        index1.close()
+        index2.close()
+        tx.commit()
+
+    def test_negative_search_key(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = HashIndex(tx, "idx", self.layout)
+        index.insert(Constant(-3), RID(0, 0))
+        index.before_first(Constant(-3))
+        self.assertTrue(index.next())
+        self.assertEqual(RID(0, 0), index.get_data_rid())
+        self.assertFalse(index.next())
+        index.close()
+        tx.commit()
+
+    def test_bucket_table_names_are_shared(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index1 = HashIndex(tx, "idx", self.layout)
+        index2 = HashIndex(tx, "idx", self.layout)
+        self.assertIs(index1._bucket_table_names, index2._bucket_table_names)
+        self.assertEqual("idx7", index1._bucket_table_names[7])
+        tx.commit()
+
+    def test_string_search_key(self) -> None:
+        schema = Schema()
+        schema.add_int_field("block")
+        schema.add_int_field("id")
+        schema.add_string_field("dataval", 9)
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = HashIndex(tx, "stridx", Layout(schema))
+        for i in range(10):
+            index.insert(Constant(f"rec{i % 3}"), RID(i, 0))
+
+        index.before_first(Constant("rec2"))
+        rids = []
+        while index.next():
+            rids.append(index.get_data_rid())
+        self.assertEqual([RID(2, 0), RID(5, 0), RID(8, 0)], rids)
+
+        index.close()
+        tx.commit()
+
+    def test_before_first_reuses_scan_on_same_bucket(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = HashIndex(tx, "idx", self.layout)
+        index.insert(Constant(1), RID(0, 0))
+        index.insert(Constant(1 + HashIndex.NUM_BUCKETS), RID(0, 1))
+
+        index.before_first(Constant(1))
+        table_scan = index._table_scan
+        self.assertTrue(index.next())
+        self.assertEqual(RID(0, 0), index.get_data_rid())
+        self.assertFalse(index.next())
+
+        index.before_first(Constant(1 + HashIndex.NUM_BUCKETS))
+        self.assertIs(table_scan, index._table_scan)
+        self.assertTrue(index.next())
+        self.assertEqual(RID(0, 1), index.get_data_rid())
+        self.assertFalse(index.next())
+
+        index.before_first(Constant(2))
+        self.assertIsNot(table_scan, index._table_scan)
+        self.assertFalse(index.next())
+
+        # the scan of the previous bucket is still open
+        index.before_first(Constant(1))
+        self.assertIs(table_scan, index._table_scan)
+        self.assertTrue(index.next())
+
+        # opening a third bucket closes the least recently used scan
+        index.before_first(Constant(3))
+        self.assertEqual([1, 3], list(index._open_scans))
+
+        index.close()
+        tx.commit()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
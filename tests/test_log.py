@@ -1,9 +1,12 @@
+import threading
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from typing import Any
+from unittest.mock import patch
 
 from simpledbpy.file import FileManager, Page
-from simpledbpy.log import LogManager
+from simpledbpy.log import LogIterator, LogManager
 
 
 class TestLog(unittest.TestCase):
@@ -96,6 +99,56 @@ class TestLog(unittest.TestCase):
         log_record_actual = page.get_bytes(boundary)
         self.assertEqual(log_record, log_record_actual)
 
+    def test_log_iterator_reads_ahead(self) -> None:
+        log_records = [self._create_log_record(f"record{i}", i + 100) for i in range(200)]
+        for log_record in log_records:
+            self.log_manager.append(log_record)
+        log_records.reverse()
+        num_blocks = self.log_manager._current_block.block_number + 1
+        self.assertGreater(num_blocks, LogIterator.READAHEAD_BLOCKS)
+        with patch.object(FileManager, "read_run", autospec=True, side_effect=FileManager.read_run) as mock_read_run:
+            self.assertEqual(list(self.log_manager), log_records)
+            self.assertEqual(mock_read_run.call_count, -(-num_blocks // LogIterator.READAHEAD_BLOCKS))
+
+    def test_log_iterator_prefetches_in_background(self) -> None:
+        log_records = [self._create_log_record(f"record{i}", i + 100) for i in range(400)]
+        for log_record in log_records:
+            self.log_manager.append(log_record)
+        log_records.reverse()
+        num_blocks = self.log_manager._current_block.block_number + 1
+        self.assertGreater(num_blocks, LogIterator.PREFETCH_AFTER_READS * LogIterator.READAHEAD_BLOCKS)
+        reading_threads = []
+        original_read_run = FileManager.read_run
+
+        def read_run(*args: Any) -> None:
+            reading_threads.append(threading.current_thread())
+            original_read_run(*args)
+
+        with patch.object(FileManager, "read_run", autospec=True, side_effect=read_run):
+            self.assertEqual(list(self.log_manager), log_records)
+        self.assertEqual(len(reading_threads), -(-num_blocks // LogIterator.READAHEAD_BLOCKS))
+        self.assertEqual(
+            reading_threads[: LogIterator.PREFETCH_AFTER_READS],
+            [threading.current_thread()] * LogIterator.PREFETCH_AFTER_READS,
+        )
+        self.assertNotIn(threading.current_thread(), reading_threads[LogIterator.PREFETCH_AFTER_READS :])
+
+    def test_log_iterator_allocates_pages_as_needed(self) -> None:
+        self.log_manager.append(b"record1")
+        log_iterator = iter(self.log_manager)
+        self.assertEqual(list(log_iterator), [b"record1"])
+        self.assertEqual(len(log_iterator._pages), 1)
+
+    def test_flush_skips_saved_records(self) -> None:
+        lsn1 = self.log_manager.append(b"record1")
+        lsn2 = self.log_manager.append(b"record2")
+        with patch.object(FileManager, "write", autospec=True, side_effect=FileManager.write) as mock_write:
+            self.log_manager.flush(lsn2)
+            # lsn1 was written to disk together with lsn2
+            self.log_manager.flush(lsn1)
+            self.log_manager.flush(lsn2)
+            self.assertEqual(mock_write.call_count, 1)
+
     def test_log_iterator(self) -> None:
         log_records = [self._create_log_record(f"record{i}", i + 100) for i in range(100)]
         for i, log_record in enumerate(log_records):
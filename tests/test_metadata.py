@@ -1,15 +1,18 @@
 import math
 import random
+import sys
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
-from simpledbpy.buffer import BufferManager
+from simpledbpy.buffer import BufferAbortError, BufferManager
 from simpledbpy.file import FileManager
+from simpledbpy.index import HashIndex
 from simpledbpy.log import LogManager
-from simpledbpy.metadata import MetadataManager
-from simpledbpy.query import TableScan
-from simpledbpy.record import Schema, Types
+from simpledbpy.metadata import IndexInfo, MetadataManager, StatInfo, StatManager, TableManager, ViewManager
+from simpledbpy.query import RID, Constant, TableScan
+from simpledbpy.record import Layout, Schema, Types
 from simpledbpy.tx.transaction import Transaction
 
 
@@ -48,6 +51,9 @@ class TestMetadataManager(unittest.TestCase):
             else:
                 self.fail("Unknown field")
 
+        # the layout is kept in memory after the table is created
+        self.assertIs(layout, metadata_manager.get_layout("MyTable", tx))
+
         # test stat metadata
         num_records = 50
         table_scan = TableScan(tx, "MyTable", layout)
@@ -88,5 +94,499 @@ class TestMetadataManager(unittest.TestCase):
 
         tx.commit()
 
+    def test_load_layouts_of_existing_database(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_string_field("B", 9)
+        metadata_manager.create_table("MyTable", schema, tx)
+        layout = metadata_manager.get_layout("MyTable", tx)
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        loaded_layout = metadata_manager.get_layout("MyTable", tx)
+        self.assertEqual(layout.schema.fields, loaded_layout.schema.fields)
+        self.assertEqual(layout.slot_size, loaded_layout.slot_size)
+        for field in layout.schema.fields:
+            self.assertEqual(layout.offset(field), loaded_layout.offset(field))
+            self.assertEqual(layout.schema.type(field), loaded_layout.schema.type(field))
+            self.assertEqual(layout.schema.length(field), loaded_layout.schema.length(field))
+        self.assertEqual(-1, metadata_manager.get_layout("NoSuchTable", tx).slot_size)
+        # the names read from the catalogs are interned
+        for field in loaded_layout.schema.fields:
+            self.assertIs(sys.intern(field), field)
+        tx.commit()
+
+    def test_load_indexes_of_existing_database(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_string_field("B", 9)
+        metadata_manager.create_table("MyTable", schema, tx)
+        metadata_manager.create_index("indexA", "MyTable", "A", tx)
+        metadata_manager.create_index("indexB", "MyTable", "B", tx)
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        index_map = metadata_manager.get_index_info("MyTable", tx)
+        self.assertEqual({"A", "B"}, set(index_map))
+        self.assertEqual({}, metadata_manager.get_index_info("NoSuchTable", tx))
+
+        metadata_manager.create_index("indexC", "MyTable", "B", tx)
+        tx.rollback()
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index_map = metadata_manager.get_index_info("MyTable", tx)
+        self.assertEqual({"A", "B"}, set(index_map))
+        self.assertEqual("indexB", index_map["B"]._index_name)
+        tx.commit()
+
+    def test_load_legacy_indexes(self) -> None:
+        # a database created before the index catalog stored the version of the indexes
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        ViewManager(True, table_manager, tx)
+        schema = Schema()
+        schema.add_string_field("indexname", TableManager.MAX_NAME)
+        schema.add_string_field("tablename", TableManager.MAX_NAME)
+        schema.add_string_field("fieldname", TableManager.MAX_NAME)
+        table_manager.create_table("idxcat", schema, tx)
+        table_scan = TableScan(tx, "idxcat", table_manager.get_layout("idxcat", tx))
+        table_scan.insert()
+        table_scan.set_string("indexname", "indexA")
+        table_scan.set_string("tablename", "MyTable")
+        table_scan.set_string("fieldname", "A")
+        table_scan.insert()
+        table_scan.set_string("indexname", "indexC")
+        table_scan.set_string("tablename", "MyTable")
+        table_scan.set_string("fieldname", "C")
+        table_scan.close()
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_int_field("B")
+        schema.add_string_field("C", 9)
+        table_manager.create_table("MyTable", schema, tx)
+        schema = Schema()
+        schema.add_int_field("block")
+        schema.add_int_field("id")
+        schema.add_int_field("dataval")
+        index_layout = Layout(schema)
+        for value in range(1, 300, 7):
+            table_scan = TableScan(tx, f"indexA{value % HashIndex.LEGACY_NUM_BUCKETS}", index_layout)
+            table_scan.insert()
+            table_scan.set_int("block", 0)
+            table_scan.set_int("id", value)
+            table_scan.set_int("dataval", value)
+            table_scan.close()
+        # the records of legacy indexes on string fields have no fingerprint
+        schema = Schema()
+        schema.add_int_field("block")
+        schema.add_int_field("id")
+        schema.add_string_field("dataval", 9)
+        string_index_layout = Layout(schema)
+        for value in range(1, 300, 7):
+            table_scan = TableScan(
+                tx, f"indexC{hash(f'rec{value}') % HashIndex.LEGACY_NUM_BUCKETS}", string_index_layout
+            )
+            table_scan.insert()
+            table_scan.set_int("block", 0)
+            table_scan.set_int("id", value)
+            table_scan.set_string("dataval", f"rec{value}")
+            table_scan.close()
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        metadata_manager.create_index("indexB", "MyTable", "B", tx)
+        index = metadata_manager.get_index_info("MyTable", tx)["A"].open()
+        for value in range(1, 300, 7):
+            index.before_first(Constant(value))
+            self.assertTrue(index.next(), value)
+            self.assertEqual(RID(0, value), index.get_data_rid())
+        index.close()
+        index = metadata_manager.get_index_info("MyTable", tx)["C"].open()
+        for value in range(1, 300, 7):
+            index.before_first(Constant(f"rec{value}"))
+            self.assertTrue(index.next(), value)
+            self.assertEqual(RID(0, value), index.get_data_rid())
+        index.close()
+        tx.commit()
+
+        # the indexes created in the legacy catalog are legacy indexes too
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        self.assertEqual(
+            [("indexA", "A", 0), ("indexC", "C", 0), ("indexB", "B", 0)],
+            metadata_manager._index_manager._indexes["MyTable"],
+        )
+        tx.commit()
+
+    def test_index_version(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        metadata_manager.create_table("MyTable", schema, tx)
+        metadata_manager.create_index("indexA", "MyTable", "A", tx)
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        self.assertEqual([("indexA", "A", IndexInfo.VERSION)], metadata_manager._index_manager._indexes["MyTable"])
+        index = metadata_manager.get_index_info("MyTable", tx)["A"].open()
+        assert isinstance(index, HashIndex)
+        self.assertEqual(HashIndex.NUM_BUCKETS, index._num_buckets)
+        index.close()
+
+        # the index records of a string field have a fingerprint from version 2 on
+        schema = Schema()
+        schema.add_string_field("B", 9)
+        for version, has_fingerprint in [(0, False), (1, False), (2, True)]:
+            index_info = IndexInfo("indexB", "B", schema, tx, StatInfo(0, 0), version)
+            self.assertEqual(has_fingerprint, index_info._index_layout.schema.has_field("fingerprint"))
+        tx.commit()
+
+    def test_index_info_estimates_are_precomputed(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        metadata_manager.create_table("MyTable", schema, tx)
+        metadata_manager.create_index("indexA", "MyTable", "A", tx)
+        index_info = metadata_manager.get_index_info("MyTable", tx)["A"]
+
+        with patch.object(HashIndex, "search_cost") as search_cost:
+            blocks_accessed = index_info.blocks_accessed
+            records_output = index_info.records_output
+        search_cost.assert_not_called()
+        self.assertEqual(0, blocks_accessed)
+        self.assertEqual(0, records_output)
+        self.assertFalse(hasattr(index_info, "__dict__"))
+        tx.commit()
+
+    def test_load_view_defs_of_existing_database(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=True, tx=tx)
+        view_def = "SELECT B FROM MyTable WHERE A = 1"
+        metadata_manager.create_view("viewA", view_def, tx)
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        with patch.object(TableScan, "next", autospec=True) as table_scan_next:
+            self.assertEqual(view_def, metadata_manager.get_view_def("viewA", tx))
+            self.assertIsNone(metadata_manager.get_view_def("NoSuchView", tx))
+        table_scan_next.assert_not_called()
+
+        metadata_manager.create_view("viewB", view_def, tx)
+        self.assertEqual(view_def, metadata_manager.get_view_def("viewB", tx))
+        tx.rollback()
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        self.assertIsNone(metadata_manager.get_view_def("viewB", tx))
+        tx.commit()
+
+    def test_load_stats_of_existing_database(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        metadata_manager.create_table("MyTable", schema, tx)
+        table_scan = TableScan(tx, "MyTable", metadata_manager.get_layout("MyTable", tx))
+        for _ in range(5):
+            table_scan.insert()
+        table_scan.close()
+        tx.commit()
+
+        # the statistics of the new table are calculated on startup, and stored; the first blocks of the empty
+        # catalog tables are written during that startup, so theirs are calculated once more on the next one
+        for _ in range(2):
+            tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+            MetadataManager(is_new=False, tx=tx)
+            tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        with patch.object(StatManager, "_calc_table_stats") as calc_table_stats:
+            metadata_manager = MetadataManager(is_new=False, tx=tx)
+            layout = metadata_manager.get_layout("MyTable", tx)
+            self.assertEqual(5, metadata_manager.get_stat_info("MyTable", layout, tx).records_output)
+        calc_table_stats.assert_not_called()
+        tx.commit()
+
+        # the mutation counts are lost on restart, so the stored statistics of a table written since are not trusted
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_scan = TableScan(tx, "MyTable", layout)
+        table_scan.insert()
+        table_scan.close()
+        tx.commit()
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        metadata_manager = MetadataManager(is_new=False, tx=tx)
+        self.assertEqual(6, metadata_manager.get_stat_info("MyTable", layout, tx).records_output)
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        with patch.object(StatManager, "_calc_table_stats") as calc_table_stats:
+            metadata_manager = MetadataManager(is_new=False, tx=tx)
+            self.assertEqual(6, metadata_manager.get_stat_info("MyTable", layout, tx).records_output)
+        calc_table_stats.assert_not_called()
+        tx.commit()
+
+    def test_rollback_create_table(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        self.assertEqual(schema.fields, table_manager.get_layout("T1", tx).schema.fields)
+        tx.rollback()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        self.assertEqual(-1, table_manager.get_layout("T1", tx).slot_size)
+        self.assertNotIn("T1", table_manager.table_names)
+        tx.commit()
+
+    def test_refresh_only_stale_tables(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        for table_name in ["T1", "T2", "T3"]:
+            table_manager.create_table(table_name, schema, tx)
+        stat_manager = StatManager(table_manager, tx)
+
+        for table_name, num_records in [("T1", 1), ("T2", 3), ("T3", 1)]:
+            table_scan = TableScan(tx, table_name, table_manager.get_layout(table_name, tx))
+            for _ in range(num_records):
+                table_scan.insert()
+            table_scan.close()
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        with (
+            patch.object(StatManager, "MIN_STALE_ROWS", 2),
+            patch.object(StatManager, "_calc_table_stats", wraps=stat_manager._calc_table_stats) as calc_table_stats,
+        ):
+            stat_manager._refresh_stale_tables("T1", tx)
+        # T1 is refreshed because it was found stale, T2 because it has enough mutations
+        refreshed_tables = {call.args[0] for call in calc_table_stats.call_args_list}
+        self.assertLessEqual({"T1", "T2"}, refreshed_tables)
+        self.assertNotIn("T3", refreshed_tables)
+        self.assertEqual(1, stat_manager.get_stat_info("T1", table_manager.get_layout("T1", tx), tx).records_output)
+        self.assertEqual(3, stat_manager.get_stat_info("T2", table_manager.get_layout("T2", tx), tx).records_output)
+        self.assertEqual(0, stat_manager.get_stat_info("T3", table_manager.get_layout("T3", tx), tx).records_output)
+        self.assertEqual(0, stat_manager._mutation_counts.num_mutations("T1"))
+        self.assertEqual(1, stat_manager._mutation_counts.num_mutations("T3"))
+        tx.commit()
+
+    def test_statistics_are_calculated_without_the_lock(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        layout = table_manager.get_layout("T1", tx)
+        stat_manager = StatManager(table_manager, tx)
+        table_scan = TableScan(tx, "T1", layout)
+        table_scan.insert()
+        table_scan.close()
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        original_calc_table_stats = stat_manager._calc_table_stats
+
+        def calc_table_stats(table_name: str, layout: Layout, tx: Transaction) -> StatInfo:
+            self.assertFalse(stat_manager._lock.locked())
+            self.assertFalse(any(lock.locked() for lock in stat_manager._stripe_locks))
+            return original_calc_table_stats(table_name, layout, tx)
+
+        with patch.object(stat_manager, "_calc_table_stats", side_effect=calc_table_stats) as patched:
+            stat_manager._refresh_stale_tables("T1", tx)
+            stat_manager._refresh_all(tx)
+            stat_manager._table_stats.clear()
+            self.assertEqual(1, stat_manager.get_stat_info("T1", layout, tx).records_output)
+        self.assertGreaterEqual(patched.call_count, 2)
+        tx.commit()
+
+    def test_startup_time_limit(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        layout = table_manager.get_layout("T1", tx)
+        table_scan = TableScan(tx, "T1", layout)
+        table_scan.insert()
+        table_scan.close()
+
+        with patch.object(StatManager, "STARTUP_SECONDS", 0):
+            stat_manager = StatManager(table_manager, tx)
+        self.assertEqual({}, stat_manager._table_stats)
+        # the statistics of a table are calculated the first time they are asked for
+        self.assertEqual(1, stat_manager.get_stat_info("T1", layout, tx).records_output)
+
+        stat_manager = StatManager(table_manager, tx)
+        self.assertEqual(set(table_manager.table_names), set(stat_manager._table_stats))
+        tx.commit()
+
+    def test_refresh_when_stale(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        layout = table_manager.get_layout("T1", tx)
+        stat_manager = StatManager(table_manager, tx)
+        tx.commit()
+
+        def insert_record() -> None:
+            insert_tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+            table_scan = TableScan(insert_tx, "T1", layout)
+            table_scan.insert()
+            table_scan.close()
+            insert_tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        with (
+            patch.object(StatManager, "MIN_STALE_ROWS", 10),
+            patch.object(
+                StatManager,
+                "_refresh_stale_tables",
+                side_effect=lambda table_name, tx: stat_manager._mutation_counts.take(),
+            ) as refresh_statistics,
+        ):
+            # reading the statistics does not refresh them
+            for _ in range(10):
+                insert_record()
+                stat_manager.get_stat_info("T1", layout, tx)
+            refresh_statistics.assert_not_called()
+
+            insert_record()
+            stat_manager.get_stat_info("T1", layout, tx)
+            assert stat_manager._refresh_future is not None
+            stat_manager._refresh_future.result()
+            refresh_statistics.assert_called_once()
+            # the refresh runs in its own transaction
+            self.assertEqual("T1", refresh_statistics.call_args.args[0])
+            self.assertIsNot(tx, refresh_statistics.call_args.args[1])
+            self.assertIsNotNone(stat_manager._average_refresh_interval)
+
+            # once the average interval between refreshes is known, a modified table is refreshed
+            # when twice that interval has elapsed
+            insert_record()
+            with patch("simpledbpy.metadata.time.monotonic", return_value=stat_manager._last_refresh_time + 3600):
+                stat_manager.get_stat_info("T1", layout, tx)
+            stat_manager._refresh_future.result()
+            self.assertEqual(2, refresh_statistics.call_count)
+        tx.commit()
+
+    def test_refresh_in_background(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        layout = table_manager.get_layout("T1", tx)
+        stat_manager = StatManager(table_manager, tx)
+        self.assertEqual(0, stat_manager.get_stat_info("T1", layout, tx).records_output)
+        table_scan = TableScan(tx, "T1", layout)
+        table_scan.insert()
+        table_scan.set_int("A", 1)
+        table_scan.close()
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        # the caller that starts the refresh still gets the previous statistics
+        with patch.object(StatManager, "MIN_STALE_ROWS", 0):
+            self.assertEqual(0, stat_manager.get_stat_info("T1", layout, tx).records_output)
+        assert stat_manager._refresh_future is not None
+        stat_manager._refresh_future.result()
+        self.assertEqual(1, stat_manager.get_stat_info("T1", layout, tx).records_output)
+        tx.commit()
+
+    def test_mutation_counts(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        layout = table_manager.get_layout("T1", tx)
+        stat_manager = StatManager(table_manager, tx)
+        tx.commit()
+
+        # another database with a table of the same name has its own counts
+        with TemporaryDirectory() as other_directory:
+            file_manager = FileManager(Path(other_directory), self.block_size)
+            log_manager = LogManager(file_manager, "simpledb.log")
+            buffer_manager = BufferManager(file_manager, log_manager, self.num_buffers)
+            other_tx = Transaction(file_manager, log_manager, buffer_manager)
+            other_table_manager = TableManager(is_new=True, tx=other_tx)
+            other_table_manager.create_table("T1", schema, other_tx)
+            other_stat_manager = StatManager(other_table_manager, other_tx)
+            table_scan = TableScan(other_tx, "T1", other_table_manager.get_layout("T1", other_tx))
+            table_scan.insert()
+            table_scan.close()
+            other_tx.commit()
+            self.assertEqual(1, other_stat_manager._mutation_counts.num_mutations("T1"))
+        self.assertEqual(0, stat_manager._mutation_counts.num_mutations("T1"))
+
+        # the mutations of a transaction are counted when it commits, and not at all if it is rolled back
+        for commit in [False, True]:
+            tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+            table_scan = TableScan(tx, "T1", layout)
+            table_scan.insert()
+            table_scan.bulk_insert([{"A": 1}, {"A": 2}])
+            table_scan.close()
+            self.assertEqual(0, stat_manager._mutation_counts.num_mutations("T1"))
+            if commit:
+                tx.commit()
+                self.assertEqual(3, stat_manager._mutation_counts.num_mutations("T1"))
+            else:
+                tx.rollback()
+                self.assertEqual(0, stat_manager._mutation_counts.num_mutations("T1"))
+
+        # the records of index buckets and temporary tables are not counted
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        index = IndexInfo("index", "A", schema, tx, StatInfo(0, 0)).open()
+        index.insert(Constant(1), RID(0, 0))
+        index.close()
+        table_scan = TableScan(tx, "temp1", layout)
+        table_scan.insert()
+        table_scan.close()
+        tx.commit()
+        self.assertEqual({"T1": 3}, stat_manager._mutation_counts.take())
+
+    def test_failed_refresh_is_rolled_back(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_manager = TableManager(is_new=True, tx=tx)
+        schema = Schema()
+        schema.add_int_field("A")
+        table_manager.create_table("T1", schema, tx)
+        layout = table_manager.get_layout("T1", tx)
+        stat_manager = StatManager(table_manager, tx)
+        table_scan = TableScan(tx, "T1", layout)
+        table_scan.insert()
+        table_scan.close()
+        tx.commit()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        with (
+            patch.object(StatManager, "MIN_STALE_ROWS", 0),
+            patch.object(StatManager, "_refresh_stale_tables", side_effect=BufferAbortError),
+            patch.object(Transaction, "rollback", autospec=True, side_effect=Transaction.rollback) as rollback,
+        ):
+            stat_manager.get_stat_info("T1", layout, tx)
+            assert stat_manager._refresh_future is not None
+            self.assertIsInstance(stat_manager._refresh_future.exception(), BufferAbortError)
+        # the refresh transaction releases its locks and buffers, and a later refresh can start
+        rollback.assert_called_once()
+        self.assertIsNot(tx, rollback.call_args.args[0])
+        self.assertFalse(stat_manager._refreshing)
+        tx.commit()
+
     def tearDown(self) -> None:
         self.tmp_dir.cleanup()
@@ -1,4 +1,5 @@
 import unittest
+from dataclasses import FrozenInstanceError
 
 from simpledbpy.parser import (
     BadSyntaxException,
@@ -10,8 +11,10 @@ from simpledbpy.parser import (
     Lexer,
     ModifyData,
     Parser,
+    parse_query,
+    parse_update_command,
 )
-from simpledbpy.query import Constant, Expression, Schema
+from simpledbpy.query import Constant, Expression, Predicate, Schema, Term
 
 
 class TestLexer(unittest.TestCase):
@@ -19,6 +22,11 @@ class TestLexer(unittest.TestCase):
     def test_keywords(self) -> None:
         sql: str = "SELECT id, name FROM test_table WHERE id = 10"
         lexer: Lexer = Lexer(sql)
+        # the tokens of the keywords and the delimiters are shared
+        self.assertIs(lexer._current_token, Lexer(sql.lower())._current_token)
+        self.assertIs(lexer._tokens[2], Lexer(",")._tokens[0])
+        # the identifiers are interned
+        self.assertIs(lexer._tokens[3][1], Lexer("name")._tokens[0][1])
         self.assertTrue(lexer.match_keyword("select"))
         lexer.eat_keyword("select")
         self.assertTrue(lexer.match_id())
@@ -97,6 +105,33 @@ class TestLexer(unittest.TestCase):
         with self.assertRaises(BadSyntaxException):
             Lexer(sql)  # This should raise exception due to the unexpected character '$'
 
+    def test_peek_and_advance(self) -> None:
+        lexer: Lexer = Lexer("id = 10")
+        self.assertEqual(lexer.peek(), ("ID", "id"))
+        self.assertEqual(lexer.advance(), ("ID", "id"))
+        self.assertEqual(lexer.advance(), ("DELIM", "="))
+        self.assertEqual(lexer.peek(), ("NUMBER", 10))
+        lexer.advance()
+        self.assertIs(lexer.peek(), Lexer.EOF_TOKEN)
+        with self.assertRaises(BadSyntaxException):
+            lexer.advance()
+
+    def test_skip_keyword(self) -> None:
+        lexer: Lexer = Lexer("where id")
+        self.assertFalse(lexer.skip_keyword("and"))
+        self.assertTrue(lexer.skip_keyword("where"))
+        self.assertFalse(lexer.skip_keyword("where"))
+        self.assertEqual(lexer.eat_id(), "id")
+
+    def test_whitespace(self) -> None:
+        sql: str = "  SELECT\tid\nFROM  test_table  "
+        lexer: Lexer = Lexer(sql)
+        lexer.eat_keyword("select")
+        self.assertEqual(lexer.eat_id(), "id")
+        lexer.eat_keyword("from")
+        self.assertEqual(lexer.eat_id(), "test_table")
+        self.assertIs(lexer.peek(), Lexer.EOF_TOKEN)
+
 
 class TestParser(unittest.TestCase):
 
@@ -106,8 +141,8 @@ class TestParser(unittest.TestCase):
         query_data = parser.query()
 
         self.assertEqual(str(query_data), "select id, name from users where age = 30")
-        self.assertEqual(query_data.field_names, ["id", "name"])
-        self.assertEqual(query_data.table_names, ["users"])
+        self.assertEqual(query_data.field_names, ("id", "name"))
+        self.assertEqual(query_data.table_names, ("users",))
         self.assertEqual(len(query_data.predication._terms), 1)
         term = query_data.predication._terms[0]
         self.assertIsInstance(term._lhs, Expression)
@@ -122,7 +157,7 @@ class TestParser(unittest.TestCase):
         assert isinstance(insert_data, InsertData)
 
         self.assertEqual(insert_data.table_name, "users")
-        self.assertEqual(insert_data.field_names, ["id", "name", "age"])
+        self.assertEqual(insert_data.field_names, ("id", "name", "age"))
         self.assertEqual(len(insert_data.values), 3)
         self.assertEqual(insert_data.values[0].as_int(), 1)
         self.assertEqual(insert_data.values[1].as_string(), "John Doe")
@@ -170,6 +205,18 @@ class TestParser(unittest.TestCase):
         expected_schema.add_string_field("name", 100)
         self.assertEqual(create_table_data.schema, expected_schema)
 
+    def test_create_wide_table_query(self) -> None:
+        field_names = [f"f{i}" for i in range(2000)]
+        sql = f"CREATE TABLE wide ({', '.join(f'{field_name} INT' for field_name in field_names)})"
+        create_table_data = Parser(sql).update_command()
+        assert isinstance(create_table_data, CreateTableData)
+        self.assertEqual(create_table_data.schema.fields, field_names)
+
+    def test_wide_predicate(self) -> None:
+        terms = [f"f{i} = {i}" for i in range(2000)]
+        query_data = Parser(f"SELECT f0 FROM wide WHERE {' AND '.join(terms)}").query()
+        self.assertEqual(str(query_data.predication), " and ".join(terms))
+
     def test_create_view_query(self) -> None:
         sql = "CREATE VIEW user_view AS SELECT id, name FROM users"
         parser = Parser(sql)
@@ -177,8 +224,8 @@ class TestParser(unittest.TestCase):
         assert isinstance(create_view_data, CraeteViewData)
 
         self.assertEqual(create_view_data.view_name, "user_view")
-        self.assertEqual(create_view_data.query_data.field_names, ["id", "name"])
-        self.assertEqual(create_view_data.query_data.table_names, ["users"])
+        self.assertEqual(create_view_data.query_data.field_names, ("id", "name"))
+        self.assertEqual(create_view_data.query_data.table_names, ("users",))
 
     def test_create_index_query(self) -> None:
         sql = "CREATE INDEX user_index ON users (id)"
@@ -189,3 +236,35 @@ class TestParser(unittest.TestCase):
         self.assertEqual(create_index_data.index_name, "user_index")
         self.assertEqual(create_index_data.table_name, "users")
         self.assertEqual(create_index_data.field_name, "id")
+
+    def test_parse_cache(self) -> None:
+        sql = "SELECT id FROM users WHERE id = 1"
+        query_data = parse_query(sql)
+        self.assertIs(query_data, parse_query(sql))
+        self.assertEqual(str(query_data), str(Parser(sql).query()))
+        sql = "INSERT INTO users (id) VALUES (1)"
+        insert_data = parse_update_command(sql)
+        self.assertIsInstance(insert_data, InsertData)
+        self.assertIs(insert_data, parse_update_command(sql))
+
+    def test_cached_data_is_immutable(self) -> None:
+        query_data = parse_query("SELECT id FROM users WHERE id = 1")
+        with self.assertRaises(FrozenInstanceError):
+            query_data.predication = Predicate()  # type: ignore[misc]
+        with self.assertRaises(ValueError):
+            query_data.predication.conjoin_with(Predicate(Term(Expression("id"), Expression(Constant(2)))))
+        self.assertEqual("id = 1", str(parse_query("SELECT id FROM users WHERE id = 1").predication))
+
+        delete_data = parse_update_command("DELETE FROM users WHERE id = 1")
+        assert isinstance(delete_data, DeleteData)
+        with self.assertRaises(ValueError):
+            delete_data.predication.conjoin_with(Predicate())
+
+        # the mutable schema of a create table statement is copied
+        sql = "CREATE TABLE users (id INT)"
+        create_table_data = parse_update_command(sql)
+        assert isinstance(create_table_data, CreateTableData)
+        create_table_data.schema.add_int_field("age")
+        create_table_data = parse_update_command(sql)
+        assert isinstance(create_table_data, CreateTableData)
+        self.assertEqual(["id"], create_table_data.schema.fields)
@@ -2,11 +2,13 @@ import random
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from simpledbpy.buffer import BufferManager
 from simpledbpy.file import FileManager
 from simpledbpy.log import LogManager
-from simpledbpy.metadata import MetadataManager
+from simpledbpy.metadata import MetadataManager, StatManager
+from simpledbpy.parser import parse_query
 from simpledbpy.plan import (
     BasicQueryPlanner,
     BasicUpdatePlanner,
@@ -155,6 +157,203 @@ class TestRecordPage(unittest.TestCase):
 
         tx.commit()
 
+    def test_product_order(self) -> None:
+        self._create_student_table()
+        self._create_dept_table()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        plan1 = TablePlan(tx, "student", self.metadata_manager)
+        plan2 = TablePlan(tx, "dept", self.metadata_manager)
+        plan3 = ProductPlan(plan1, plan2)
+        plan4 = ProductPlan(plan2, plan1)
+
+        # the cost of the product does not depend on the order of its subqueries
+        blocks_accessed = min(
+            plan1.blocks_accessed() + plan1.records_output() * plan2.blocks_accessed(),
+            plan2.blocks_accessed() + plan2.records_output() * plan1.blocks_accessed(),
+        )
+        self.assertEqual(blocks_accessed, plan3.blocks_accessed())
+        self.assertEqual(blocks_accessed, plan4.blocks_accessed())
+        self.assertEqual(plan3.schema.fields, plan1.schema.fields + plan2.schema.fields)
+
+        results = []
+        for plan in (plan3, plan4):
+            scan = plan.open()
+            rows = set()
+            while scan.next():
+                rows.add((scan.get_string("SName"), scan.get_string("DName")))
+            scan.close()
+            results.append(rows)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(plan3.records_output(), len(results[0]))
+        tx.commit()
+
+    def test_estimates_are_kept(self) -> None:
+        self._create_student_table()
+        self._create_dept_table()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        plan1 = TablePlan(tx, "student", self.metadata_manager)
+        plan2 = TablePlan(tx, "dept", self.metadata_manager)
+        plan3 = ProductPlan(plan1, plan2)
+        plan4 = SelectPlan(plan3, Predicate(Term(Expression("MajorId"), Expression("DId"))))
+        records_output = plan4.records_output()
+        blocks_accessed = plan3.blocks_accessed()
+        distinct_values = plan4.distinct_values("MajorId")
+
+        # the estimates of the nodes are not computed again from their subqueries
+        with (
+            patch.object(TablePlan, "records_output", side_effect=AssertionError),
+            patch.object(TablePlan, "blocks_accessed", side_effect=AssertionError),
+            patch.object(TablePlan, "distinct_values", side_effect=AssertionError),
+        ):
+            self.assertEqual(records_output, plan4.records_output())
+            self.assertEqual(blocks_accessed, plan3.blocks_accessed())
+            self.assertEqual(distinct_values, plan4.distinct_values("MajorId"))
+        tx.commit()
+
+    def test_view_plan_is_shared(self) -> None:
+        self._create_student_table()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        self.metadata_manager.create_view("majors", "select MajorId from student where GradYear = 2020", tx)
+        query_planner = BasicQueryPlanner(self.metadata_manager)
+        with patch("simpledbpy.plan.parse_query", wraps=parse_query) as mock_parse_query:
+            plan = query_planner.create_plan(parse_query("select MajorId from majors, majors"), tx)
+        mock_parse_query.assert_called_once_with("select MajorId from student where GradYear = 2020")
+
+        scan = plan.open()
+        count = 0
+        while scan.next():
+            self.assertIn(scan.get_int("MajorId"), (20, 30))
+            count += 1
+        scan.close()
+        self.assertEqual(9, count)
+        tx.commit()
+
+    def test_selections_are_pushed_down(self) -> None:
+        self._create_student_table()
+        self._create_dept_table()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        query_planner = BasicQueryPlanner(self.metadata_manager)
+        query = "select SName, DName from dept, student where MajorId = DId and GradYear = 2020"
+        plan = query_planner.create_plan(parse_query(query), tx)
+
+        # the student table is selected on its own term, which makes it smaller than dept, so it comes first,
+        # and the product is selected on the join term, leaving no term to the top selection
+        assert isinstance(plan, ProjectPlan)
+        top_plan = plan._plan
+        assert isinstance(top_plan, SelectPlan)
+        self.assertEqual("", str(top_plan._predication))
+        join_plan = top_plan._plan
+        assert isinstance(join_plan, SelectPlan)
+        self.assertEqual("MajorId = DId", str(join_plan._predication))
+        product_plan = join_plan._plan
+        assert isinstance(product_plan, ProductPlan)
+        student_plan = product_plan._plan1
+        assert isinstance(student_plan, SelectPlan)
+        self.assertEqual("GradYear = 2020", str(student_plan._predication))
+        self.assertIsInstance(product_plan._plan2, TablePlan)
+
+        scan = plan.open()
+        results = set()
+        while scan.next():
+            results.add((scan.get_string("SName"), scan.get_string("DName")))
+        scan.close()
+        self.assertEqual({("amy", "math"), ("bob", "drama"), ("kim", "math")}, results)
+        tx.commit()
+
+    def test_contradictory_selection(self) -> None:
+        self._create_student_table()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        plan1 = TablePlan(tx, "student", self.metadata_manager)
+        for query, is_empty in [
+            ("select SName from student where MajorId = 10 and MajorId = 20", True),
+            ("select SName from student where 1 = 2", True),
+            ("select SName from student where MajorId = 10 and MajorId = 10", False),
+            ("select SName from student where 1 = 1 and MajorId = GradYear", False),
+            ("select SName from student where MajorId = 10 and SName = 'joe'", False),
+        ]:
+            plan2 = SelectPlan(plan1, parse_query(query).predication)
+            if is_empty:
+                self.assertEqual((0, 0), (plan2.blocks_accessed(), plan2.records_output()), query)
+                with patch.object(TablePlan, "open", side_effect=AssertionError):
+                    scan = plan2.open()
+                    self.assertFalse(scan.next())
+                    self.assertTrue(scan.has_field("SName"))
+                    scan.close()
+            else:
+                self.assertEqual(plan1.blocks_accessed(), plan2.blocks_accessed(), query)
+        tx.commit()
+
+    def test_insert(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        planner = Planner(BasicQueryPlanner(self.metadata_manager), BasicUpdatePlanner(self.metadata_manager))
+        planner.execute_update("create table T1(A int, B varchar(9))", tx)
+        # a single record is written field by field, rather than with a logged image of its slot
+        with patch.object(TableScan, "bulk_insert") as bulk_insert:
+            self.assertEqual(1, planner.execute_update("insert into T1(B, A) values('rec1', 1)", tx))
+            self.assertEqual(1, planner.execute_update("insert into T1(A) values(2)", tx))
+        bulk_insert.assert_not_called()
+        with self.assertRaises(ValueError):
+            planner.execute_update("insert into T1(A) values('rec3')", tx)
+
+        scan = planner.create_query_plan("select A, B from T1", tx).open()
+        records = []
+        while scan.next():
+            records.append((scan.get_int("A"), scan.get_string("B")))
+        scan.close()
+        self.assertEqual([(1, "rec1"), (2, "")], records)
+        tx.commit()
+
+    def test_plan_after_uncommitted_inserts(self) -> None:
+        self._create_student_table()
+        stat_manager = self.metadata_manager._stat_manager
+        planner = Planner(BasicQueryPlanner(self.metadata_manager), BasicUpdatePlanner(self.metadata_manager))
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        with patch.object(StatManager, "MIN_STALE_ROWS", 10):
+            for i in range(20):
+                planner.execute_update(f"insert into student(SId, SName) values({10 + i}, 'new')", tx)
+            # the uncommitted inserts do not make the statistics stale, since refreshing them would wait for tx
+            plan = planner.create_query_plan("select SName from student", tx)
+            self.assertIsNone(stat_manager._refresh_future)
+            scan = plan.open()
+            count = 0
+            while scan.next():
+                count += 1
+            scan.close()
+            self.assertEqual(29, count)
+            tx.commit()
+
+            tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+            planner.create_query_plan("select SName from student", tx)
+            assert stat_manager._refresh_future is not None
+            stat_manager._refresh_future.result()
+            self.assertEqual(29, planner.create_query_plan("select SName from student", tx).records_output())
+        tx.commit()
+
+    def test_delete_and_modify(self) -> None:
+        self._create_student_table()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        planner = Planner(BasicQueryPlanner(self.metadata_manager), BasicUpdatePlanner(self.metadata_manager))
+        self.assertEqual(3, planner.execute_update("update student set GradYear = 2024 where GradYear = 2020", tx))
+        self.assertEqual(3, planner.execute_update("delete from student where GradYear = 2024", tx))
+        self.assertEqual(0, planner.execute_update("delete from student where GradYear = 2020", tx))
+        self.assertEqual(0, planner.execute_update("delete from student where MajorId = 10 and MajorId = 20", tx))
+
+        scan = planner.create_query_plan("select SName, GradYear from student", tx).open()
+        count = 0
+        while scan.next():
+            self.assertNotIn(scan.get_int("GradYear"), (2020, 2024))
+            count += 1
+        scan.close()
+        self.assertEqual(6, count)
+        tx.commit()
+
     def tearDown(self) -> None:
         self.tmp_dir.cleanup()
 
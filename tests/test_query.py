@@ -141,5 +141,56 @@ class TestRecordPage(unittest.TestCase):
         scan5.close()
         tx.commit()
 
+    def test_compiled_predicate(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_int_field("B")
+        schema.add_string_field("C", 9)
+        layout = Layout(schema)
+        table_scan = TableScan(tx, "T", layout)
+        for i in range(50):
+            table_scan.insert()
+            table_scan.set_int("A", i % 5)
+            table_scan.set_int("B", i % 3)
+            table_scan.set_string("C", f"rec{i % 2}")
+
+        terms = [
+            Term(Expression("A"), Expression("B")),
+            Term(Expression(Constant("rec1")), Expression("C")),
+            Term(Expression("A"), Expression(Constant(2))),
+            Term(Expression(Constant(1)), Expression(Constant(1))),
+            Term(Expression(Constant(1)), Expression(Constant(2))),
+        ]
+        predications = [Predicate()] + [Predicate(term) for term in terms]
+        for term in terms[:3]:
+            predications.append(Predicate(terms[0]))
+            predications[-1].conjoin_with(Predicate(term))
+        for predication in predications:
+            is_satisfied = predication.compile()
+            self.assertIs(is_satisfied, predication.compile())
+            table_scan.before_first()
+            while table_scan.next():
+                self.assertEqual(predication.is_satisfied(table_scan), is_satisfied(table_scan), str(predication))
+
+        # conjoining a predicate compiles it again
+        predication = Predicate(terms[2])
+        is_satisfied = predication.compile()
+        predication.conjoin_with(Predicate(terms[4]))
+        self.assertIsNot(is_satisfied, predication.compile())
+        table_scan.close()
+
+        # constants of different types are only compared when a record is evaluated
+        predication = Predicate(Term(Expression(Constant(1)), Expression(Constant("rec1"))))
+        select_scan = SelectScan(TableScan(tx, "empty", layout), predication)
+        self.assertFalse(select_scan.next())
+        select_scan.close()
+        table_scan = TableScan(tx, "T", layout)
+        table_scan.next()
+        with self.assertRaises(ValueError):
+            predication.compile()(table_scan)
+        table_scan.close()
+        tx.commit()
+
     def tearDown(self) -> None:
         self.tmp_dir.cleanup()
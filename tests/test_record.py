@@ -2,6 +2,7 @@ import random
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from simpledbpy.buffer import BufferManager
 from simpledbpy.file import FileManager
@@ -52,6 +53,7 @@ class TestRecordPage(unittest.TestCase):
             record_page.set_string(slot, "B", string_value)
             inserted_recoreds[slot] = (int_value, string_value)
             slot = record_page.insert_after(slot)
+        self.assertEqual(len(inserted_recoreds), record_page.num_used_slots())
         slot = record_page.next_after(-1)
         while slot >= 0:
             int_value, string_value = inserted_recoreds[slot]
@@ -72,10 +74,43 @@ class TestRecordPage(unittest.TestCase):
             int_value, string_value = inserted_recoreds[slot]
             self.assertGreaterEqual(int_value, 25)
             slot = record_page.next_after(slot)
+        self.assertEqual(
+            sum(1 for int_value, _ in inserted_recoreds.values() if int_value >= 25), record_page.num_used_slots()
+        )
 
         tx.unpin(block_id)
         tx.commit()
 
+    def test_delete_records(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        layout = Layout(schema)
+        block_id = tx.append("testfile")
+        tx.pin(block_id)
+        record_page = RecordPage(tx, block_id, layout)
+        record_page.format()
+        slots = record_page.insert_records_after(-1, [{"A": i} for i in range(10)])
+
+        # each run of consecutive slots is logged with one update spanning only that run
+        with patch.object(tx, "set_bytes", wraps=tx.set_bytes) as set_bytes:
+            record_page.delete_records([slots[1], slots[2], slots[3], slots[7]])
+        self.assertEqual(
+            [
+                (layout.slot_size * 1, 2 * layout.slot_size + 4),
+                (layout.slot_size * 7, 4),
+            ],
+            [(call.args[1], len(call.args[2])) for call in set_bytes.call_args_list],
+        )
+        values = []
+        slot = record_page.next_after(-1)
+        while slot >= 0:
+            values.append(record_page.get_int(slot, "A"))
+            slot = record_page.next_after(slot)
+        self.assertEqual([0, 4, 5, 6, 8, 9], values)
+        tx.unpin(block_id)
+        tx.commit()
+
     def tearDown(self) -> None:
         self.tmp_dir.cleanup()
 
@@ -128,5 +163,152 @@ class TestTableScan(unittest.TestCase):
         table_scan.close()
         tx.commit()
 
+    def test_next_matching(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_string_field("B", 9)
+        layout = Layout(schema)
+
+        table_scan = TableScan(tx, "T", layout)
+        for i in range(50):
+            table_scan.insert()
+            table_scan.set_int("A", i % 5)
+            table_scan.set_string("B", f"rec{i % 5}")
+        table_scan.before_first()
+        table_scan.next()
+        table_scan.delete()  # A = 0
+
+        table_scan.before_first()
+        matches = []
+        while table_scan.next_matching("A", 0):
+            matches.append(table_scan.get_string("B"))
+        self.assertEqual(["rec0"] * 9, matches)
+        table_scan.before_first()
+        self.assertTrue(table_scan.next_matching("B", "rec3"))
+        self.assertEqual(3, table_scan.get_int("A"))
+
+        # the bytes of these values occur in the blocks, but not at the position of the field in a used slot
+        table_scan.before_first()
+        self.assertFalse(table_scan.next_matching("B", ""))
+        table_scan.before_first()
+        self.assertFalse(table_scan.next_matching("A", 1 << 24))
+        table_scan.before_first()
+        self.assertFalse(table_scan.next_matching("B", "réc3"))
+
+        table_scan.close()
+        tx.commit()
+
+    def test_count_records_and_blocks(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_string_field("B", 9)
+        layout = Layout(schema)
+
+        table_scan = TableScan(tx, "T", layout)
+        for i in range(50):
+            table_scan.insert()
+            table_scan.set_int("A", i)
+        table_scan.before_first()
+        while table_scan.next():
+            if table_scan.get_int("A") % 5 == 0:
+                table_scan.delete()
+        self.assertEqual((40, tx.size("T.tbl")), table_scan.count_records_and_blocks())
+        self.assertEqual(3, tx.size("T.tbl"))
+        self.assertTrue(table_scan.next())
+        self.assertEqual(1, table_scan.get_int("A"))
+
+        table_scan.close()
+        tx.commit()
+
+    def test_insert_after_last_block(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        layout = Layout(schema)
+
+        table_scan = TableScan(tx, "T", layout)
+        for i in range(90):
+            table_scan.insert()
+            table_scan.set_int("A", i)
+        last_block_number = tx.size("T.tbl") - 1
+        self.assertGreater(last_block_number, 0)
+
+        # free a slot in the first block: it is skipped when inserting from the last block
+        table_scan.before_first()
+        table_scan.next()
+        table_scan.delete()
+        table_scan.before_last_block()
+        table_scan.insert()
+        self.assertEqual(last_block_number, table_scan.get_rid().block_number)
+
+        table_scan.close()
+        tx.commit()
+
+    def test_bulk_insert(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_string_field("B", 9)
+        layout = Layout(schema)
+
+        table_scan = TableScan(tx, "T", layout)
+        table_scan.bulk_insert([{"A": i, "B": f"rec{i}"} for i in range(50)])
+        self.assertEqual(49, table_scan.get_int("A"))
+        table_scan.before_first()
+        values = []
+        while table_scan.next():
+            values.append((table_scan.get_int("A"), table_scan.get_string("B")))
+        self.assertEqual([(i, f"rec{i}") for i in range(50)], values)
+        self.assertEqual((50, 3), table_scan.count_records_and_blocks())
+        table_scan.close()
+        tx.commit()
+
+        # the bulk inserted records are undone by a rollback
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_scan = TableScan(tx, "T", layout)
+        table_scan.bulk_insert([{"A": i, "B": f"new{i}"} for i in range(10)])
+        table_scan.close()
+        tx.rollback()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_scan = TableScan(tx, "T", layout)
+        self.assertEqual(50, table_scan.count_records_and_blocks()[0])
+        table_scan.close()
+        tx.commit()
+
+    def test_delete_where(self) -> None:
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        schema = Schema()
+        schema.add_int_field("A")
+        schema.add_string_field("B", 9)
+        layout = Layout(schema)
+
+        table_scan = TableScan(tx, "T", layout)
+        table_scan.bulk_insert([{"A": i, "B": f"rec{i}"} for i in range(50)])
+        table_scan.close()
+        tx.commit()
+
+        # the deleted records are restored by a rollback
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_scan = TableScan(tx, "T", layout)
+        self.assertEqual(50, table_scan.delete_where(lambda scan: True))
+        self.assertEqual(0, table_scan.count_records_and_blocks()[0])
+        table_scan.close()
+        tx.rollback()
+
+        tx = Transaction(self.file_manager, self.log_manager, self.buffer_manager)
+        table_scan = TableScan(tx, "T", layout)
+        self.assertEqual(10, table_scan.delete_where(lambda scan: scan.get_int("A") % 5 == 0))
+        self.assertFalse(table_scan.next())
+        table_scan.before_first()
+        values = []
+        while table_scan.next():
+            values.append((table_scan.get_int("A"), table_scan.get_string("B")))
+        self.assertEqual([(i, f"rec{i}") for i in range(50) if i % 5 != 0], values)
+        table_scan.close()
+        tx.commit()
+
     def tearDown(self) -> None:
         self.tmp_dir.cleanup()
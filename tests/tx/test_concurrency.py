@@ -3,10 +3,12 @@ import time
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from simpledbpy.buffer import BufferManager
 from simpledbpy.file import BlockId, FileManager
 from simpledbpy.log import LogManager
+from simpledbpy.tx.concurrency import LockAbortError, LockTable
 from simpledbpy.tx.transaction import Transaction
 
 
@@ -113,5 +115,28 @@ class TestConcurrency(unittest.TestCase):
         b.join()
         c.join()
 
+    def test_lock_table_stripes(self) -> None:
+        lock_table = LockTable()
+        blk1 = BlockId("testfile", 1)
+        blk2 = BlockId("testfile", 2)
+        lock_table.slock(blk1)
+        lock_table.slock(blk1)
+        lock_table.slock(blk2)
+
+        # a conflict on one block does not block the others
+        with patch.object(LockTable, "MAX_TIME", 0.1):
+            with self.assertRaises(LockAbortError):
+                lock_table.xlock(blk1)
+        lock_table.xlock(blk2)
+        with patch.object(LockTable, "MAX_TIME", 0.1):
+            with self.assertRaises(LockAbortError):
+                lock_table.slock(blk2)
+
+        lock_table.unlock(blk1)
+        lock_table.xlock(blk1)
+        lock_table.unlock(blk1)
+        lock_table.unlock(blk2)
+        self.assertTrue(all(not locks for locks in lock_table._locks))
+
     def tearDown(self) -> None:
         self.tmp_dir.cleanup()